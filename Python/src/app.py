@@ -3,9 +3,9 @@
 # Set breakpoints in your code and use the "Python: Streamlit App" or "Python: Debug chat.py" launch configuration
 
 import streamlit as st
-import asyncio
 import logging
-from chat import process_message, reset_chat_history
+from chat import new_chat_history, process_message, response_cache, timed
+from event_loop import iterate_async, run_async
 from multi_agent import run_multi_agent
 
 # Configure logging
@@ -99,6 +99,35 @@ def configure_sidebar():
     if st.session_state.selected_option == "Chat":
         chat_count = len(st.session_state.get("chat_history", []))
         st.sidebar.metric("Messages", chat_count, delta=None)
+        if "time_to_first_token" in st.session_state:
+            st.sidebar.metric(
+                "Time to first token",
+                f"{st.session_state.time_to_first_token:.2f} s",
+                help="Time from sending the last message until the first words of the answer arrived",
+            )
+        tool_calls = st.session_state.get("tool_calls")
+        if tool_calls:
+            st.sidebar.caption(
+                "Tool calls on the last turn: "
+                + ", ".join(f"{call['name']} {call['seconds']:.2f} s ({call['status']})" for call in tool_calls)
+            )
+        kernel_chat_history = st.session_state.get("kernel_chat_history")
+        if kernel_chat_history is not None:
+            st.sidebar.metric(
+                "Prompt tokens saved",
+                kernel_chat_history.total_prompt_tokens_saved,
+                delta=kernel_chat_history.prompt_tokens_saved or None,
+                help="Tokens kept out of the prompt by the chat history budget: total, and on the last turn",
+            )
+        if response_cache is not None and response_cache.lookups:
+            st.sidebar.metric(
+                "Response cache hit rate",
+                f"{response_cache.hit_rate:.0%}",
+                help=(
+                    f"{response_cache.exact_hits} exact and {response_cache.similar_hits} near-duplicate hits "
+                    f"in {response_cache.lookups} questions; {response_cache.saved_seconds:.1f} s of model time saved"
+                ),
+            )
     else:
         multi_agent_count = len(st.session_state.get("multi_agent_history", []))
         st.sidebar.metric("Team Messages", multi_agent_count, delta=None)
@@ -152,7 +181,7 @@ def render_chat_ui(title, on_submit):
         ):
             if title == "Chat":
                 st.session_state.chat_history = []
-                reset_chat_history()
+                st.session_state.kernel_chat_history = new_chat_history()
                 st.success("Chat reset!")
             elif title == "Multi-Agent":
                 st.session_state.multi_agent_history = []
@@ -175,6 +204,9 @@ def chat():
     """Enhanced chat functionality"""
     if "chat_history" not in st.session_state:
         st.session_state.chat_history = []
+    # The kernel is shared by all sessions; the conversation it sees is per session
+    if "kernel_chat_history" not in st.session_state:
+        st.session_state.kernel_chat_history = new_chat_history()
 
     def on_chat_submit(user_input):
         if user_input:
@@ -184,9 +216,22 @@ def chat():
                     {"role": "user", "message": user_input}
                 )
 
-                # Show processing indicator
-                with st.spinner("Processing..."):
-                    assistant_response = asyncio.run(process_message(user_input))
+                # Stream the answer below the conversation as it is generated
+                display_chat_history(st.session_state.chat_history)
+                metrics = {}
+                with st.chat_message("assistant", avatar="🤖"):
+                    assistant_response = st.write_stream(
+                        iterate_async(
+                            timed(
+                                process_message(
+                                    user_input, st.session_state.kernel_chat_history, metrics
+                                ),
+                                metrics,
+                            )
+                        )
+                    )
+                st.session_state.time_to_first_token = metrics["time_to_first_token"]
+                st.session_state.tool_calls = metrics.get("tool_calls", [])
 
                 # Add assistant response
                 st.session_state.chat_history.append(
@@ -236,7 +281,7 @@ def multi_agent():
                 )
 
                 with st.spinner("Team collaborating..."):
-                    result = asyncio.run(run_multi_agent(user_input))
+                    result = run_async(run_multi_agent(user_input))
 
                 for response in result:
                     st.session_state.multi_agent_history.append(
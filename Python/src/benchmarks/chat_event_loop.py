@@ -0,0 +1,125 @@
+"""
+Connection reuse over sequential chat turns: asyncio.run() per turn vs the persistent background loop.
+
+Runs the same chat completion call for every turn, first the old way
+(asyncio.run() per turn, so each turn needs a client and connections of its
+own) and then on event_loop's long-lived loop with one shared client.
+Against the local fake server (started automatically) it also reports how
+many TCP connections each mode opened; with --azure it calls the Azure
+OpenAI deployment from src/.env, where every new connection is a TLS
+handshake.
+
+Usage (from the src directory):
+    python benchmarks/chat_event_loop.py --turns 100
+    python benchmarks/chat_event_loop.py --turns 100 --azure
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+from dotenv import load_dotenv  # noqa: E402
+from openai import AsyncAzureOpenAI  # noqa: E402
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureChatPromptExecutionSettings  # noqa: E402
+from semantic_kernel.contents import ChatHistory  # noqa: E402
+
+from event_loop import run_async  # noqa: E402
+
+
+def make_service(args):
+    if args.azure:
+        return AzureChatCompletion()
+    client = AsyncAzureOpenAI(azure_endpoint=args.base_url, api_key="fake", api_version="2024-10-21")
+    return AzureChatCompletion(deployment_name="fake", async_client=client)
+
+
+async def turn(service):
+    history = ChatHistory()
+    history.add_user_message("Reply with one word.")
+    await service.get_chat_message_content(history, AzureChatPromptExecutionSettings(max_tokens=5))
+
+
+def fake_server_stats(args, reset=False):
+    if args.azure:
+        return None
+    request = urllib.request.Request(f"{args.base_url}/stats{'/reset' if reset else ''}", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def run_turns(args, run_one):
+    fake_server_stats(args, reset=True)
+    latencies = []
+    for _ in range(args.turns):
+        start = time.perf_counter()
+        run_one()
+        latencies.append(time.perf_counter() - start)
+    stats = fake_server_stats(args)
+    return latencies, stats["connections"] if stats else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=100)
+    parser.add_argument("--azure", action="store_true", help="use the Azure OpenAI deployment configured in src/.env")
+    parser.add_argument("--port", type=int, default=8799, help="port for the local fake server")
+    parser.add_argument("--latency", type=float, default=0.02, help="fake server response latency in seconds")
+    args = parser.parse_args()
+    args.base_url = f"http://127.0.0.1:{args.port}"
+
+    server = None
+    if args.azure:
+        load_dotenv(SRC_DIR / ".env", override=True)
+    else:
+        server = subprocess.Popen([
+            sys.executable, str(SRC_DIR / "benchmarks" / "fake_openai.py"),
+            "--port", str(args.port), "--latency", str(args.latency),
+        ])
+        for _ in range(100):
+            try:
+                fake_server_stats(args)
+                break
+            except OSError:
+                time.sleep(0.1)
+
+    try:
+        async def fresh_turn():
+            service = make_service(args)
+            try:
+                await turn(service)
+            finally:
+                await service.client.close()
+
+        def per_turn_loop():
+            # What app.py did before: a new loop per message, so nothing can be reused between turns
+            asyncio.run(fresh_turn())
+
+        shared_service = make_service(args)
+        results = {
+            "asyncio.run": run_turns(args, per_turn_loop),
+            "persistent": run_turns(args, lambda: run_async(turn(shared_service))),
+        }
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{'mode':<13}{'turns':>7}{'total s':>9}{'p50 ms':>9}{'p99 ms':>9}{'connections':>13}")
+    for mode, (latencies, connections) in results.items():
+        ordered = sorted(latencies)
+        print(
+            f"{mode:<13}{len(ordered):>7}{sum(ordered):>9.2f}{statistics.median(ordered) * 1000:>9.1f}"
+            f"{ordered[int(len(ordered) * 0.99)] * 1000:>9.1f}{connections if connections is not None else 'n/a':>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Per-turn latency of chat.py with a kernel built for every turn (cold) vs one shared kernel (warm).
+
+By default only the kernel setup each turn pays for is timed: building the
+services and registering every plugin (cold) vs fetching the shared kernel
+(warm). With --live every turn also sends --prompt through process_message,
+which needs the Azure settings in src/.env (and the Work Items API if the
+OpenAPI plugin is registered).
+
+Usage (from the src directory):
+    python benchmarks/chat_kernel.py --turns 20
+    python benchmarks/chat_kernel.py --turns 5 --live --prompt "What time is it?"
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+import chat  # noqa: E402
+from event_loop import run_async  # noqa: E402
+
+
+async def ask(prompt):
+    async for _ in chat.process_message(prompt, chat.new_chat_history()):
+        pass
+
+
+def run_turns(turns, get_kernel, prompt):
+    latencies = []
+    for _ in range(turns):
+        start = time.perf_counter()
+        if prompt is None:
+            get_kernel()
+        else:
+            # process_message looks the kernel up through chat.get_kernel
+            chat.get_kernel = get_kernel
+            run_async(ask(prompt))
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=20)
+    parser.add_argument("--live", action="store_true", help="send a prompt to the model on every turn")
+    parser.add_argument("--prompt", default="Hello!")
+    args = parser.parse_args()
+
+    shared_kernel = chat.get_kernel
+    prompt = args.prompt if args.live else None
+    try:
+        results = {
+            "cold": run_turns(args.turns, chat.build_kernel, prompt),
+            "warm": run_turns(args.turns, shared_kernel, prompt),
+        }
+    except NameError as e:
+        sys.exit(f"chat.py is not complete yet ({e}); finish initialize_kernel() and process_message() first")
+
+    print(f"{'kernel':<8}{'turns':>7}{'p50 ms':>10}{'mean ms':>10}{'max ms':>10}")
+    for name, latencies in results.items():
+        print(
+            f"{name:<8}{len(latencies):>7}{statistics.median(latencies) * 1000:>10.1f}"
+            f"{statistics.mean(latencies) * 1000:>10.1f}{max(latencies) * 1000:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,99 @@
+"""
+Query embeddings from many sessions at once: one request per query vs AiSearchPlugin's EmbeddingBatcher.
+
+Simulates --sessions chat sessions searching the handbook at the same
+time, each embedding --queries distinct questions one after another with
+a short random pause between them, against the local fake embeddings
+endpoint in fake_openai.py (started automatically). Runs once per wait
+window in --waits ("0" sends every query on its own) and reports
+embedding requests the server saw, texts per request and per-query
+latency including the wait.
+
+Usage (from the src directory):
+    python benchmarks/embedding_batching.py --sessions 32 --queries 10 --waits 0,0.002,0.005,0.02
+"""
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sessions", type=int, default=32)
+    parser.add_argument("--queries", type=int, default=10, help="queries per session")
+    parser.add_argument("--waits", default="0,0.002,0.005,0.02", help="comma-separated batch wait windows in seconds")
+    parser.add_argument("--max-batch", type=int, default=16)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake embedding endpoint latency")
+    # At 1536 the single-process stub spends most of its time encoding JSON, which hides the request latency
+    parser.add_argument("--dimensions", type=int, default=256, help="embedding size the fake endpoint returns")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    from openai import AsyncAzureOpenAI
+    from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+
+    from event_loop import run_async
+    from plugins.embedding_batcher import EmbeddingBatcher
+
+    def stats():
+        with urllib.request.urlopen(f"{base_url}/stats") as response:
+            return json.load(response)
+
+    async def session(batcher, number, latencies):
+        rng = random.Random(number)
+        for query in range(args.queries):
+            await asyncio.sleep(rng.uniform(0, 0.05))
+            start = time.perf_counter()
+            await batcher.embed(f"Session {number} asks handbook question {query}")
+            latencies.append(time.perf_counter() - start)
+
+    async def run(batcher):
+        latencies = []
+        start = time.perf_counter()
+        await asyncio.gather(*(session(batcher, number, latencies) for number in range(args.sessions)))
+        return latencies, time.perf_counter() - start
+
+    server = subprocess.Popen([sys.executable, str(SRC_DIR / "benchmarks" / "fake_openai.py"),
+                               "--port", str(args.port), "--latency", str(args.latency),
+                               "--dimensions", str(args.dimensions)])
+    rows = []
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base_url}/stats").close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        client = AsyncAzureOpenAI(azure_endpoint=base_url, api_key="fake", api_version="2024-10-21")
+        service = AzureTextEmbedding(deployment_name="fake", async_client=client)
+        for wait in (float(value) for value in args.waits.split(",")):
+            before = stats()
+            latencies, seconds = run_async(run(EmbeddingBatcher(service, max_wait=wait, max_batch=args.max_batch)))
+            after = stats()
+            requests = after["embedding_requests"] - before["embedding_requests"]
+            inputs = after["embedding_inputs"] - before["embedding_inputs"]
+            rows.append((wait, requests, inputs / requests, latencies, seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'wait ms':>8}{'requests':>10}{'texts/req':>11}{'p50 ms':>9}{'p99 ms':>9}{'queries/s':>11}")
+    for wait, requests, per_request, latencies, seconds in rows:
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"{wait * 1000:>8g}{requests:>10}{per_request:>11.1f}{statistics.median(latencies) * 1000:>9.1f}"
+              f"{p99 * 1000:>9.1f}{len(latencies) / seconds:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+Query embeddings for handbook searches: AiSearchPlugin.generate_vector without and with its embedding cache.
+
+Replays a stream of handbook questions in which popular questions come
+back often, sometimes with different case or spacing, against the local
+fake embeddings endpoint in fake_openai.py (started automatically). Runs
+once calling the embedding service directly, once with a new cache and
+once more with a new cache object on the same directory, as after a
+restart, so repeats are served from the memory-mapped file. Reports
+embedding requests sent, cache hit rate and per-query latency.
+
+Usage (from the src directory):
+    python benchmarks/embedding_cache.py --queries 500 --latency 0.05
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+TOPICS = [
+    "vacation policy", "sick leave", "performance review", "workplace safety", "whistleblower policy",
+    "data security", "remote work", "expense reports", "training budget", "parental leave",
+    "code of conduct", "overtime pay", "dress code", "travel policy", "privacy of employee data",
+]
+TEMPLATES = ["What is the {}?", "How does the {} work?", "Who do I ask about the {}?", "Summarize the {}."]
+
+
+def workload(count, seed=7):
+    """Questions with a Zipf-like popularity; one in five repeats changes case or spacing."""
+    questions = [template.format(topic) for topic in TOPICS for template in TEMPLATES]
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(questions) + 1)]
+    for question in rng.choices(questions, weights, k=count):
+        if rng.random() < 0.2:
+            question = "  " + question.upper() if rng.random() < 0.5 else question.replace(" ", "  ")
+        yield question
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--latency", type=float, default=0.05, help="fake embedding endpoint latency")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+    # AiSearchPlugin builds its search store from these; the benchmark never searches
+    os.environ.setdefault("AZURE_AI_SEARCH_ENDPOINT", "https://localhost")
+    os.environ.setdefault("AZURE_AI_SEARCH_API_KEY", "fake")
+
+    from openai import AsyncAzureOpenAI
+    from semantic_kernel import Kernel
+    from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+
+    from event_loop import run_async
+    from plugins.ai_search_plugin import AiSearchPlugin
+    from plugins.embedding_cache import EmbeddingCache
+
+    def stats():
+        with urllib.request.urlopen(f"{base_url}/stats") as response:
+            return json.load(response)
+
+    async def replay(generate, questions):
+        latencies = []
+        for question in questions:
+            start = time.perf_counter()
+            await generate(question)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+
+    questions = list(workload(args.queries))
+    server = subprocess.Popen([sys.executable, str(SRC_DIR / "benchmarks" / "fake_openai.py"),
+                               "--port", str(args.port), "--latency", str(args.latency)])
+    rows = []
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base_url}/stats").close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        kernel = Kernel()
+        client = AsyncAzureOpenAI(azure_endpoint=base_url, api_key="fake", api_version="2024-10-21")
+        kernel.add_service(AzureTextEmbedding(deployment_name="fake", async_client=client))
+        with tempfile.TemporaryDirectory() as directory:
+            runs = [
+                ("no cache", None),
+                ("cold cache", lambda: EmbeddingCache(directory)),
+                ("after restart", lambda: EmbeddingCache(directory)),
+            ]
+            for name, make_cache in runs:
+                before = stats()["embedding_requests"]
+                if make_cache is None:
+                    service = kernel.get_service(type=AzureTextEmbedding)
+                    latencies = run_async(replay(lambda q: service.generate_embeddings([q]), questions))
+                    hit_rate, disk_hits = None, 0
+                else:
+                    plugin = AiSearchPlugin(kernel, embedding_cache=make_cache())
+                    latencies = run_async(replay(plugin.generate_vector, questions))
+                    hit_rate, disk_hits = plugin.cache_stats()["hit_rate"], plugin.cache_stats()["disk_hits"]
+                requests = stats()["embedding_requests"] - before
+                rows.append((name, requests, hit_rate, disk_hits, latencies))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"\n{'run':<16}{'requests':>10}{'hit rate':>10}{'disk hits':>11}{'p50 ms':>9}{'p99 ms':>9}{'total s':>9}")
+    for name, requests, hit_rate, disk_hits, latencies in rows:
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        rate = f"{hit_rate:.0%}" if hit_rate is not None else "-"
+        print(f"{name:<16}{requests:>10}{rate:>10}{disk_hits:>11}{statistics.median(latencies) * 1000:>9.2f}"
+              f"{p99 * 1000:>9.2f}{sum(latencies):>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
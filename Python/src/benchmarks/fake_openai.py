@@ -0,0 +1,208 @@
+"""
+Local stand-in for the Azure OpenAI chat completions and embeddings endpoints, for benchmarks.
+
+Answers chat completions (streamed or not) with a fixed reply and embeddings
+with deterministic pseudo-random vectors, after a configurable latency.
+With --tool-calls, a user message that comes with tools is answered by
+calling every tool at once (arguments made up from their schemas); the
+fixed reply follows once the tool results are sent back. With
+--lexical-embeddings, texts that share words get similar embeddings, so
+vector search over them behaves roughly like a (weak) real model. With
+--throttle, that share of embedding requests is answered 429 with a
+Retry-After of one second, as a deployment over its rate limit would.
+GET /stats reports the number of requests and of distinct client
+connections seen, so benchmarks can tell whether connections are reused.
+
+Usage (from the src directory):
+    python benchmarks/fake_openai.py --port 8799 --latency 0.05
+Point a client at it with azure_endpoint="http://127.0.0.1:8799".
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+
+import numpy as np
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+REPLY = "This is a canned reply from the local fake model."
+
+app = FastAPI()
+app.state.latency = 0.0
+app.state.dimensions = 1536
+app.state.tool_calls = False
+app.state.lexical_embeddings = False
+app.state.throttle = 0.0
+stats = {"requests": 0, "connections": set(), "embedding_inputs": 0, "embedding_requests": 0}
+
+
+def count(request):
+    stats["requests"] += 1
+    # One client (host, port) pair per TCP connection
+    stats["connections"].add(tuple(request.scope["client"]))
+
+
+def embed(text, dimensions):
+    seed = int.from_bytes(hashlib.sha256(text.encode()).digest()[:8], "little")
+    vector = np.random.default_rng(seed).standard_normal(dimensions).astype(np.float32)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def embed_lexical(text, dimensions):
+    """Hashed character trigrams of the words: shared and similar words make vectors close, as in a real model."""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for word in re.findall(r"\w+", text.casefold()):
+        padded = f" {word} "
+        for start in range(len(padded) - 2):
+            digest = hashlib.blake2b(padded[start:start + 3].encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % dimensions
+            vector[bucket] += 1.0 if digest[4] & 1 else -1.0
+    norm = np.linalg.norm(vector)
+    return (vector / norm if norm else vector).tolist()
+
+
+def fake_arguments(parameters):
+    examples = {"string": "Seattle", "number": 47.6, "integer": 3, "boolean": True}
+    properties = parameters.get("properties", {})
+    return json.dumps({
+        name: examples.get(properties.get(name, {}).get("type"), "x") for name in parameters.get("required", [])
+    })
+
+
+def tool_calls_for(body):
+    """Tool calls for every offered tool, if this request should get them."""
+    messages = body.get("messages", [])
+    if not app.state.tool_calls or not body.get("tools") or not messages or messages[-1]["role"] != "user":
+        return None
+    return [
+        {
+            "id": f"call_{index}",
+            "type": "function",
+            "function": {"name": tool["function"]["name"], "arguments": fake_arguments(tool["function"].get("parameters", {}))},
+        }
+        for index, tool in enumerate(body["tools"])
+    ]
+
+
+def chunk(delta, finish_reason=None):
+    return {
+        "id": "fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": "fake",
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+
+
+@app.post("/openai/deployments/{deployment}/chat/completions")
+async def chat_completions(deployment: str, request: Request):
+    count(request)
+    body = await request.json()
+    await asyncio.sleep(app.state.latency)
+    tool_calls = tool_calls_for(body)
+    if not body.get("stream") and tool_calls:
+        return {
+            "id": "fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": None, "tool_calls": tool_calls},
+                "finish_reason": "tool_calls",
+            }],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }
+    if not body.get("stream"):
+        return {
+            "id": "fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": "fake",
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": REPLY}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }
+
+    async def events():
+        if tool_calls:
+            for index, call in enumerate(tool_calls):
+                delta = {"role": "assistant"} if index == 0 else {}
+                yield f"data: {json.dumps(chunk(delta | {'tool_calls': [call | {'index': index}]}))}\n\n"
+            yield f"data: {json.dumps(chunk({}, 'tool_calls'))}\n\n"
+            yield "data: [DONE]\n\n"
+            return
+        for position, word in enumerate(REPLY.split(" ")):
+            delta = {"role": "assistant"} if position == 0 else {}
+            yield f"data: {json.dumps(chunk(delta | {'content': word + ' '}))}\n\n"
+        yield f"data: {json.dumps(chunk({}, 'stop'))}\n\n"
+        yield "data: [DONE]\n\n"
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+
+@app.post("/openai/deployments/{deployment}/embeddings")
+async def embeddings(deployment: str, request: Request):
+    count(request)
+    body = await request.json()
+    inputs = body["input"] if isinstance(body["input"], list) else [body["input"]]
+    if random.random() < app.state.throttle:
+        return JSONResponse(
+            {"error": {"code": "429", "message": "Rate limit exceeded. Try again in 1 second."}},
+            status_code=429,
+            headers={"Retry-After": "1"},
+        )
+    stats["embedding_requests"] += 1
+    stats["embedding_inputs"] += len(inputs)
+    await asyncio.sleep(app.state.latency)
+    dimensions = body.get("dimensions") or app.state.dimensions
+    embedder = embed_lexical if app.state.lexical_embeddings else embed
+    return {
+        "object": "list",
+        "model": "fake",
+        "data": [
+            {"object": "embedding", "index": index, "embedding": embedder(str(text), dimensions)}
+            for index, text in enumerate(inputs)
+        ],
+        "usage": {"prompt_tokens": len(inputs), "total_tokens": len(inputs)},
+    }
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "requests": stats["requests"],
+        "connections": len(stats["connections"]),
+        "embedding_requests": stats["embedding_requests"],
+        "embedding_inputs": stats["embedding_inputs"],
+    }
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    stats.update(requests=0, connections=set(), embedding_inputs=0, embedding_requests=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8799)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--dimensions", type=int, default=1536, help="embedding size")
+    parser.add_argument("--tool-calls", action="store_true", help="call every offered tool before replying")
+    parser.add_argument("--lexical-embeddings", action="store_true", help="embed texts by their words instead of at random")
+    parser.add_argument("--throttle", type=float, default=0.0, help="share of embedding requests answered 429")
+    args = parser.parse_args()
+    app.state.throttle = args.throttle
+    app.state.lexical_embeddings = args.lexical_embeddings
+    app.state.latency = args.latency
+    app.state.tool_calls = args.tool_calls
+    app.state.dimensions = args.dimensions
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
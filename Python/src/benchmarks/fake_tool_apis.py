@@ -0,0 +1,142 @@
+"""
+Local stand-in for the geocoding (geocode.maps.co) and weather (Open-Meteo) APIs the plugins call, for benchmarks.
+
+Answers after a configurable latency, and with --fail-rate answers that
+share of requests with 503 so retries can be exercised. GET /stats reports
+requests, distinct client connections, and the most requests that were in
+flight at once, which shows whether concurrent tool calls overlap.
+
+Usage (from the src directory):
+    python benchmarks/fake_tool_apis.py --port 8798 --latency 0.2
+Point the plugins at it with GEOCODING_API_URL=http://127.0.0.1:8798/search
+and WEATHER_API_URL=http://127.0.0.1:8798/v1/forecast.
+"""
+import argparse
+import asyncio
+import hashlib
+import random
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse
+
+app = FastAPI()
+app.state.latency = 0.0
+app.state.fail_rate = 0.0
+stats = {"requests": 0, "connections": set(), "in_flight": 0, "max_in_flight": 0, "failures": 0}
+
+
+async def serve(request, answer):
+    stats["requests"] += 1
+    stats["connections"].add(tuple(request.scope["client"]))
+    stats["in_flight"] += 1
+    stats["max_in_flight"] = max(stats["max_in_flight"], stats["in_flight"])
+    try:
+        await asyncio.sleep(app.state.latency)
+        if random.random() < app.state.fail_rate:
+            stats["failures"] += 1
+            return JSONResponse({"error": "injected failure"}, status_code=503)
+        return answer()
+    finally:
+        stats["in_flight"] -= 1
+
+
+@app.get("/search")
+async def geocode(request: Request, q: str = ""):
+    def answer():
+        # Like the real API, unknown places get an empty list
+        if not q.strip() or "nowhere" in q.casefold():
+            return []
+        # Deterministic made-up coordinates for every place name
+        digest = hashlib.sha256(q.casefold().encode()).digest()
+        lat = int.from_bytes(digest[:4], "little") / 2**32 * 180 - 90
+        lon = int.from_bytes(digest[4:8], "little") / 2**32 * 360 - 180
+        return [{"lat": f"{lat:.7f}", "lon": f"{lon:.7f}", "display_name": q}]
+
+    return await serve(request, answer)
+
+
+# Plausible value ranges, so payload sizes are close to real responses
+RANGES = {
+    "temperature": (20.0, 75.0), "humidity": (30, 100), "probability": (0, 100), "cloud_cover": (0, 100),
+    "wind_direction": (0, 360), "wind": (0.0, 25.0), "uv_index": (0.0, 8.0), "daylight_duration": (30000.0, 55000.0),
+    "precipitation_hours": (0.0, 24.0), "precipitation": (0.0, 0.3), "rain": (0.0, 0.3), "showers": (0.0, 0.1),
+    "snowfall": (0.0, 0.05),
+}
+CODES = [0, 1, 2, 3, 45, 51, 61, 63, 71, 80, 95]
+# Units as Open-Meteo reports them for the units the plugin asks for, by first matching name fragment
+UNIT_NAMES = [
+    ("weather_code", "wmo code"), ("sunrise", "iso8601"), ("sunset", "iso8601"), ("precipitation_hours", "h"),
+    ("probability", "%"), ("humidity", "%"), ("cloud_cover", "%"), ("temperature", "°F"), ("wind_direction", "°"),
+    ("wind", "mp/h"), ("daylight_duration", "s"), ("uv_index", ""), ("", "inch"),
+]
+
+
+def fake_value(rng, name, time):
+    if name == "weather_code":
+        return rng.choice(CODES)
+    if name in ("sunrise", "sunset"):
+        return f"{time}T{'07' if name == 'sunrise' else '17'}:{rng.randint(0, 59):02d}"
+    low, high = next((r for key, r in RANGES.items() if key in name), (0.0, 100.0))
+    return rng.randint(low, high) if isinstance(low, int) else round(rng.uniform(low, high), 2 if high < 1 else 1)
+
+
+@app.get("/v1/forecast")
+async def forecast(request: Request, latitude: float, longitude: float, forecast_days: int = 7, past_days: int = 0,
+                   current: str = "", hourly: str = "", daily: str = ""):
+    def answer():
+        rng = random.Random(f"{latitude:.2f},{longitude:.2f}")
+        days = [f"2026-01-{day + 1:02d}" for day in range(past_days + forecast_days)]
+        times = {
+            "current": None,
+            "hourly": [f"{day}T{hour:02d}:00" for day in days for hour in range(24)],
+            "daily": days,
+        }
+        response = {"latitude": latitude, "longitude": longitude, "generationtime_ms": 0.1, "utc_offset_seconds": 0,
+                    "timezone": "GMT", "timezone_abbreviation": "GMT", "elevation": 50.0}
+        for section, variables in (("current", current), ("hourly", hourly), ("daily", daily)):
+            if not variables:
+                continue
+            names = variables.split(",")
+            response[f"{section}_units"] = {"time": "iso8601", **{name: next(unit for key, unit in UNIT_NAMES if key in name) for name in names}}
+            if times[section] is None:
+                response[section] = {"time": "2026-01-01T12:00", "interval": 900,
+                                     **{name: fake_value(rng, name, "2026-01-01") for name in names}}
+            else:
+                response[section] = {
+                    "time": times[section],
+                    **{name: [fake_value(rng, name, time[:10]) for time in times[section]] for name in names},
+                }
+        return response
+
+    return await serve(request, answer)
+
+
+@app.get("/stats")
+async def get_stats():
+    return {
+        "requests": stats["requests"],
+        "connections": len(stats["connections"]),
+        "max_in_flight": stats["max_in_flight"],
+        "failures": stats["failures"],
+    }
+
+
+@app.post("/stats/reset")
+async def reset_stats():
+    stats.update(requests=0, connections=set(), max_in_flight=0, failures=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds added to every response")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of requests answered with 503")
+    args = parser.parse_args()
+    app.state.latency = args.latency
+    app.state.fail_rate = args.fail_rate
+    uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
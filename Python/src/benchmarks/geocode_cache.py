@@ -0,0 +1,114 @@
+"""
+Upstream geocoding calls saved by GeoPlugin's cache on a workload of repeated office cities.
+
+The cache is pre-warmed with the office cities, then --calls lookups are
+made with random case, spacing and punctuation, plus some places the API
+does not know (cached as not found). A second plugin with a fresh
+in-memory LRU over the same SQLite file then repeats the workload, as a
+restarted process would. Runs against the stub APIs in fake_tool_apis.py
+(started automatically).
+
+Usage (from the src directory):
+    python benchmarks/geocode_cache.py --calls 500
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+OFFICES = ["Seattle, WA", "Redmond, WA", "New York, NY", "London", "Paris", "Tokyo", "Sydney", "Bangalore"]
+UNKNOWN = ["Nowhere Springs", "Atlantis Nowhere"]
+
+
+def stub_stats(base_url):
+    with urllib.request.urlopen(f"{base_url}/stats") as response:
+        return json.load(response)
+
+
+def workload(count, seed):
+    rng = random.Random(seed)
+    for _ in range(count):
+        location = rng.choice(UNKNOWN) if rng.random() < 0.1 else rng.choice(OFFICES)
+        if rng.random() < 0.3:
+            location = location.upper()
+        if rng.random() < 0.3:
+            location = f"  {location.replace(', ', ',')} "
+        yield location
+
+
+async def run(plugin, locations):
+    start = time.perf_counter()
+    for location in locations:
+        await plugin.get_latitude_longitude(location)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=500)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--latency", type=float, default=0.1, help="stub API latency in seconds")
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ["GEOCODING_API_URL"] = f"{base_url}/search"
+
+    # Imported after the environment points it at the stub
+    from event_loop import run_async
+    from plugins.geo_cache import GeocodeCache
+    from plugins.geo_coding_plugin import GeoPlugin
+    from plugins.http_client import close_session
+
+    server = subprocess.Popen([
+        sys.executable, str(SRC_DIR / "benchmarks" / "fake_tool_apis.py"),
+        "--port", str(args.port), "--latency", str(args.latency),
+    ])
+    rows = []
+    try:
+        for _ in range(100):
+            try:
+                stub_stats(base_url)
+                break
+            except OSError:
+                time.sleep(0.1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = str(Path(directory) / "geocode_cache.db")
+            locations = list(workload(args.calls, args.seed))
+            for name in ("pre-warmed", "restarted"):
+                cache = GeocodeCache(path)
+                plugin = GeoPlugin(cache)
+                # The plugin prints every location it is asked for
+                with contextlib.redirect_stdout(io.StringIO()):
+                    if name == "pre-warmed":
+                        run_async(plugin.prewarm(OFFICES))
+                    prewarm_calls = plugin.upstream_calls
+                    seconds = run_async(run(plugin, locations))
+                rows.append((name, prewarm_calls, plugin.upstream_calls - prewarm_calls, cache.stats(), seconds))
+                cache.close()
+        run_async(close_session())
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"without a cache every one of the {args.calls} calls goes upstream, about {args.calls * args.latency:.1f} s")
+    print(f"{'run':<12}{'calls':>7}{'prewarm':>9}{'upstream':>10}{'memory hits':>13}{'disk hits':>11}{'hit rate':>10}{'total s':>9}")
+    for name, prewarm_calls, upstream, stats, seconds in rows:
+        print(
+            f"{name:<12}{args.calls:>7}{prewarm_calls:>9}{upstream:>10}{stats['memory_hits']:>13}"
+            f"{stats['disk_hits']:>11}{stats['hit_rate']:>10.1%}{seconds:>9.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
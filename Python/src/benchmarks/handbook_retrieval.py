@@ -0,0 +1,144 @@
+"""
+Handbook retrieval quality: vector vs hybrid (BM25 + vector, fused) vs hybrid with reranking, per answer.
+
+Ingests data/employee_handbook.pdf with ingest.py into a local vector
+store in a temporary directory, then asks each question in
+benchmarks/fixtures/handbook_questions.json through
+AiSearchPlugin.get_employeehandbook_response. A question is answered
+when a returned chunk contains its expected answer text. If not, the
+harness calls the tool again with each of the question's rephrasings in
+turn, the way the model retries, so tool calls per answer counts the
+searches until the answer is found. Embeddings come from the
+fake endpoint in fake_openai.py with --lexical-embeddings (started
+automatically; texts sharing words get similar vectors), or from the
+embedding deployment in .env with --live.
+
+Usage (from the src directory):
+    python benchmarks/handbook_retrieval.py --tops 3,5 --chunk-tokens 128
+    python benchmarks/handbook_retrieval.py --live
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+QUESTIONS = SRC_DIR / "benchmarks" / "fixtures" / "handbook_questions.json"
+# Name, search mode, rerank
+MODES = [("vector", "vector", False), ("hybrid", "hybrid", False), ("hybrid + rerank", "hybrid", True)]
+
+
+def answered(results, answer):
+    return any(answer.casefold() in " ".join(result.record.content.split()).casefold() for result in results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tops", default="3", help="comma-separated numbers of chunks per search")
+    parser.add_argument("--chunk-tokens", type=int, default=128)
+    parser.add_argument("--overlap-tokens", type=int, default=24)
+    parser.add_argument("--live", action="store_true", help="use the embedding deployment configured in .env")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+    # AiSearchPlugin builds its Azure store from these unless it is given one; the local store is used here
+    os.environ.setdefault("AZURE_AI_SEARCH_ENDPOINT", "https://localhost")
+    os.environ.setdefault("AZURE_AI_SEARCH_API_KEY", "fake")
+
+    from openai import AsyncAzureOpenAI
+    from semantic_kernel import Kernel
+    from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+
+    import ingest
+    from event_loop import run_async
+    from models.employee_handbook_model import EmployeeHandbookModel
+    from plugins.ai_search_plugin import AiSearchPlugin
+    from plugins.embedding_cache import EmbeddingCache
+    from plugins.local_vector_store import LocalVectorStore
+
+    questions = json.loads(QUESTIONS.read_text())
+
+    async def evaluate(plugin):
+        per_question = []
+        for item in questions:
+            calls, found, latencies = 0, False, []
+            for query in [item["question"], *item["rephrasings"]]:
+                calls += 1
+                start = time.perf_counter()
+                results = await plugin.get_employeehandbook_response(query)
+                latencies.append(time.perf_counter() - start)
+                if answered(results, item["answer"]):
+                    found = True
+                    break
+            per_question.append((calls, found, latencies))
+        return per_question
+
+    async def embed_all(plugin):
+        for item in questions:
+            for query in [item["question"], *item["rephrasings"]]:
+                await plugin.generate_vector(query)
+
+    server = None
+    if not args.live:
+        server = subprocess.Popen([sys.executable, str(SRC_DIR / "benchmarks" / "fake_openai.py"),
+                                   "--port", str(args.port), "--lexical-embeddings"])
+    rows = []
+    try:
+        if args.live:
+            service = AzureTextEmbedding()
+        else:
+            for _ in range(100):
+                try:
+                    urllib.request.urlopen(f"{base_url}/stats").close()
+                    break
+                except OSError:
+                    time.sleep(0.1)
+            client = AsyncAzureOpenAI(azure_endpoint=base_url, api_key="fake", api_version="2024-10-21")
+            service = AzureTextEmbedding(deployment_name="fake", async_client=client)
+        kernel = Kernel()
+        kernel.add_service(service)
+        with tempfile.TemporaryDirectory() as directory:
+            store = LocalVectorStore(directory=directory)
+            collection = store.get_collection(collection_name="employeehandbook", record_type=EmployeeHandbookModel)
+            result = run_async(ingest.ingest(
+                SRC_DIR / "data" / "employee_handbook.pdf", collection, service, args.chunk_tokens, args.overlap_tokens,
+                manifest_path=os.path.join(directory, "manifest.json"),
+            ))
+            print(f"Ingested {result['chunks']} chunks of about {args.chunk_tokens} tokens")
+            with contextlib.redirect_stdout(io.StringIO()):
+                plugin = AiSearchPlugin(kernel, embedding_cache=EmbeddingCache(os.path.join(directory, "embeddings")), store=store)
+                # Every mode then finds the query embeddings in the cache, so latencies compare the searches alone
+                run_async(embed_all(plugin))
+            for top in (int(value) for value in args.tops.split(",")):
+                for name, mode, rerank in MODES:
+                    plugin.search_mode, plugin.top, plugin.rerank = mode, top, rerank
+                    # The plugin narrates every search; only the numbers matter here
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        per_question = run_async(evaluate(plugin))
+                    rows.append((f"{name}, top {top}", per_question))
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{'mode':<24}{'first-call hits':>16}{'answered':>10}{'tool calls/answer':>19}{'p50 ms':>8}")
+    for name, per_question in rows:
+        first = sum(calls == 1 and found for calls, found, _ in per_question) / len(per_question)
+        found = sum(found for _, found, _ in per_question) / len(per_question)
+        calls = statistics.fmean(calls for calls, _, _ in per_question)
+        latency = statistics.median(seconds for _, _, latencies in per_question for seconds in latencies)
+        print(f"{name:<24}{first:>16.0%}{found:>10.0%}{calls:>19.2f}{latency * 1000:>8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Ingesting data/employee_handbook.pdf with ingest.py: chunk-at-a-time vs batched parallel embedding, and re-runs.
+
+Embeds against the local fake embeddings endpoint in fake_openai.py
+(started automatically) and writes to a LocalVectorStore in a temporary
+directory. Runs a first ingest embedding one chunk per request, one
+request at a time; a first ingest into an empty store with --batch-size
+chunks per request and --concurrency requests in flight; a re-run with
+nothing changed; and a re-run after one page's text changes. Reports
+embedding requests and chunks sent, and time spent. With --throttle, that
+share of embedding requests is refused with 429, and the OpenAI client's
+own retries are turned off, so ingest.py's retries show in the report.
+
+Usage (from the src directory):
+    python benchmarks/ingest.py --chunk-tokens 128 --latency 0.2
+    python benchmarks/ingest.py --throttle 0.2
+"""
+import argparse
+import json
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--chunk-tokens", type=int, default=128)
+    parser.add_argument("--overlap-tokens", type=int, default=24)
+    parser.add_argument("--batch-size", type=int, default=16)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake embedding endpoint latency")
+    parser.add_argument("--throttle", type=float, default=0.0, help="share of embedding requests the endpoint refuses with 429")
+    parser.add_argument("--port", type=int, default=8799)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+
+    from openai import AsyncAzureOpenAI
+    from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+
+    import ingest
+    from event_loop import run_async
+    from models.employee_handbook_model import EmployeeHandbookModel
+    from plugins.local_vector_store import LocalVectorStore
+
+    def stats():
+        with urllib.request.urlopen(f"{base_url}/stats") as response:
+            return json.load(response)
+
+    read_pages = ingest.iter_pages
+
+    def edited_pages(path):
+        for number, text in read_pages(path):
+            yield number, text.replace("performance review", "annual performance review") if number == 4 else text
+
+    server = subprocess.Popen([sys.executable, str(SRC_DIR / "benchmarks" / "fake_openai.py"),
+                               "--port", str(args.port), "--latency", str(args.latency), "--throttle", str(args.throttle)])
+    rows = []
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base_url}/stats").close()
+                break
+            except OSError:
+                time.sleep(0.1)
+        client = AsyncAzureOpenAI(azure_endpoint=base_url, api_key="fake", api_version="2024-10-21",
+                                  max_retries=0 if args.throttle else 2)
+        service = AzureTextEmbedding(deployment_name="fake", async_client=client)
+        runs = [
+            ("first, 1 chunk/request, sequential", 1, 1, True, None),
+            (f"first, {args.batch_size}/request, {args.concurrency} in flight", args.batch_size, args.concurrency, True, None),
+            ("re-run, unchanged", args.batch_size, args.concurrency, False, None),
+            ("re-run, page 4 edited", args.batch_size, args.concurrency, False, edited_pages),
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            for name, batch_size, concurrency, fresh_store, pages in runs:
+                store_directory = Path(directory) / name.split(",")[0] / str(batch_size) if fresh_store else store_directory
+                collection = LocalVectorStore(directory=str(store_directory)).get_collection(
+                    collection_name="employeehandbook", record_type=EmployeeHandbookModel
+                )
+                ingest.iter_pages = pages or read_pages
+                before = stats()
+                start = time.perf_counter()
+                result = run_async(ingest.ingest(
+                    SRC_DIR / "data" / "employee_handbook.pdf", collection, service,
+                    args.chunk_tokens, args.overlap_tokens, batch_size, concurrency,
+                    limiter=ingest.RateLimiter(ingest.EMBEDDING_REQUESTS_PER_MINUTE, ingest.EMBEDDING_TOKENS_PER_MINUTE),
+                    manifest_path=str(store_directory / "manifest.json"),
+                ))
+                seconds = time.perf_counter() - start
+                after = stats()
+                rows.append((name, result, after["embedding_requests"] - before["embedding_requests"],
+                             after["embedding_inputs"] - before["embedding_inputs"], seconds))
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'run':<40}{'chunks':>8}{'embedded':>10}{'deleted':>9}{'requests':>10}{'retries':>9}{'texts':>7}{'seconds':>9}")
+    for name, result, requests, inputs, seconds in rows:
+        print(f"{name:<40}{result['chunks']:>8}{result['embedded']:>10}{result['deleted']:>9}"
+              f"{requests:>10}{result['embedding_retries']:>9}{inputs:>7}{seconds:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
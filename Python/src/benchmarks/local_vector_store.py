@@ -0,0 +1,108 @@
+"""
+Handbook vector search on the local store: exact (flat) vs IVF search, recall@3 and latency.
+
+Fills a LocalVectorStore collection of EmployeeHandbookModel records with
+synthetic 1536-dimension embeddings that cluster around topics, as chunks
+of a document do, then runs queries near random chunks through the
+collection's search (the same call AiSearchPlugin makes). Recall@3 is the
+share of the exact top 3 that each mode returns. The store lives in a
+temporary directory, so the vectors are read through the memory map.
+
+Usage (from the src directory):
+    python benchmarks/local_vector_store.py --records 5000 --queries 500 --probes 1,2,4,8
+"""
+import argparse
+import asyncio
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+from models.employee_handbook_model import EmployeeHandbookModel  # noqa: E402
+from plugins.local_vector_store import LocalVectorStore  # noqa: E402
+
+TOP = 3
+
+
+def synthetic_embeddings(records, topics, dimensions, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((topics, dimensions))
+    vectors = centers[rng.integers(topics, size=records)] + 0.8 * rng.standard_normal((records, dimensions))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+
+async def fill(collection, vectors):
+    await collection.ensure_collection_exists()
+    records = [
+        EmployeeHandbookModel.model_validate({
+            "id": str(row), "content": f"Handbook chunk {row}", "title": "employee_handbook.pdf", "url": "",
+            "filepath": "employee_handbook.pdf", "meta_json_string": "{}", "contentVector": vector.tolist(),
+        })
+        for row, vector in enumerate(vectors)
+    ]
+    await collection.upsert(records)
+
+
+async def search(collection, query):
+    results = await collection.search(vector=query.tolist(), vector_property_name="contentVector", top=TOP)
+    return [result.record.id async for result in results.results]
+
+
+async def measure(collection, queries):
+    found, latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        found.append(await search(collection, query))
+        latencies.append(time.perf_counter() - start)
+    return found, latencies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--records", type=int, default=5000)
+    parser.add_argument("--topics", type=int, default=60)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--probes", default="1,2,4,8", help="comma-separated IVF probe counts")
+    args = parser.parse_args()
+
+    vectors = synthetic_embeddings(args.records, args.topics, 1536)
+    rng = np.random.default_rng(1)
+    queries = vectors[rng.integers(args.records, size=args.queries)] + 0.03 * rng.standard_normal((args.queries, 1536))
+
+    rows = []
+    with tempfile.TemporaryDirectory() as directory:
+        start = time.perf_counter()
+        flat = LocalVectorStore(directory=directory).get_collection(
+            collection_name="employeehandbook", record_type=EmployeeHandbookModel
+        )
+        asyncio.run(fill(flat, vectors))
+        print(f"Upserted {args.records} records in {time.perf_counter() - start:.1f}s")
+        exact, latencies = asyncio.run(measure(flat, queries))
+        rows.append(("flat (exact)", 1.0, latencies))
+        for probes in (int(value) for value in args.probes.split(",")):
+            start = time.perf_counter()
+            ivf = LocalVectorStore(directory=directory, index_kind="ivf", probes=probes).get_collection(
+                collection_name="employeehandbook", record_type=EmployeeHandbookModel
+            )
+            # The first search builds the IVF groups (saving them for the next load), so it is timed with the open
+            ivf.nearest("contentVector", queries[0], TOP)
+            opened = time.perf_counter() - start
+            found, latencies = asyncio.run(measure(ivf, queries))
+            recall = statistics.fmean(len(set(f) & set(e)) / TOP for f, e in zip(found, exact))
+            rows.append((f"ivf, {probes} of {len(ivf._indexes['contentVector'].centroids)} lists (ready {opened:.2f}s)",
+                         recall, latencies))
+
+    print(f"{'mode':<40}{'recall@3':>10}{'p50 ms':>9}{'p99 ms':>9}")
+    for name, recall, latencies in rows:
+        p99 = statistics.quantiles(latencies, n=100)[98]
+        print(f"{name:<40}{recall:>10.3f}{statistics.median(latencies) * 1000:>9.2f}{p99 * 1000:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+Concurrent GeoPlugin and WeatherPlugin calls: blocking requests.get (before) vs the shared aiohttp session.
+
+Each round issues --parallel tool calls at once with asyncio.gather, the
+way Semantic Kernel runs the function calls of one model response,
+against the local stub APIs in fake_tool_apis.py (started
+automatically). With blocking requests.get inside the async functions the
+calls run one after another; on the pooled aiohttp session they overlap,
+which the stub's "max in flight" count shows. --fail-rate makes the stub
+answer that share of requests with 503, to show retries with backoff.
+
+Usage (from the src directory):
+    python benchmarks/plugin_http.py --rounds 10 --parallel 8
+    python benchmarks/plugin_http.py --rounds 10 --parallel 8 --fail-rate 0.1
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import requests
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+
+def stub_stats(base_url, reset=False):
+    request = urllib.request.Request(f"{base_url}/stats{'/reset' if reset else ''}", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+async def blocking_geocode(location):
+    # What GeoPlugin did before: a blocking call inside an async function, new connection every time
+    response = requests.get(f"{os.environ['GEOCODING_API_URL']}?q={location}")
+    response.raise_for_status()
+    position = response.json()[0]
+    return f"Latitude: {position['lat']}, Longitude: {position['lon']}"
+
+
+async def blocking_forecast(latitude, longitude, days):
+    response = requests.get(f"{os.environ['WEATHER_API_URL']}?latitude={latitude}&longitude={longitude}&forecast_days={days}")
+    response.raise_for_status()
+    return response.json()
+
+
+def calls(count, geocode, forecast):
+    places = ["Seattle", "Paris", "Tokyo", "Nairobi", "Lima", "Oslo", "Perth", "Denver"]
+    for index in range(count):
+        if index % 2:
+            yield forecast(47.6 + index, -122.3, 3)
+        else:
+            yield geocode(places[index % len(places)])
+
+
+async def run_rounds(args, geocode, forecast):
+    latencies = []
+    errors = 0
+    for _ in range(args.rounds):
+        start = time.perf_counter()
+        results = await asyncio.gather(*calls(args.parallel, geocode, forecast), return_exceptions=True)
+        latencies.append(time.perf_counter() - start)
+        errors += sum(isinstance(result, Exception) or str(result).startswith("Error") for result in results)
+    return latencies, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--parallel", type=int, default=8, help="tool calls issued at once in every round")
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--latency", type=float, default=0.1, help="stub API latency in seconds")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="share of stub responses that are 503")
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ["GEOCODING_API_URL"] = f"{base_url}/search"
+    os.environ["WEATHER_API_URL"] = f"{base_url}/v1/forecast"
+
+    # Imported after the environment points them at the stub
+    from event_loop import run_async
+    from plugins.geo_cache import GeocodeCache
+    from plugins.geo_coding_plugin import GeoPlugin
+    from plugins.http_client import close_session
+    from plugins.weather_cache import WeatherCache
+    from plugins.weather_plugin import WeatherPlugin
+
+    # Caches that never hit, so every call goes to the stub as it did before them
+    geo = GeoPlugin(GeocodeCache(":memory:", ttl=0, negative_ttl=0))
+    weather = WeatherPlugin(WeatherCache({"current": 0, "hourly": 0, "daily": 0}))
+    modes = {
+        "requests": (blocking_geocode, blocking_forecast),
+        "aiohttp": (geo.get_latitude_longitude, weather.get_future_weather_forecast),
+    }
+    server = subprocess.Popen([
+        sys.executable, str(SRC_DIR / "benchmarks" / "fake_tool_apis.py"),
+        "--port", str(args.port), "--latency", str(args.latency), "--fail-rate", str(args.fail_rate),
+    ])
+    results = {}
+    try:
+        for _ in range(100):
+            try:
+                stub_stats(base_url)
+                break
+            except OSError:
+                time.sleep(0.1)
+        for mode, (geocode, forecast) in modes.items():
+            stub_stats(base_url, reset=True)
+            latencies, errors = run_async(run_rounds(args, geocode, forecast))
+            results[mode] = (latencies, errors, stub_stats(base_url))
+        run_async(close_session())
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'client':<10}{'calls':>7}{'round p50 ms':>14}{'total s':>9}{'max in flight':>15}{'connections':>13}{'errors':>8}")
+    for mode, (latencies, errors, stats) in results.items():
+        ordered = sorted(latencies)
+        print(
+            f"{mode:<10}{args.rounds * args.parallel:>7}{ordered[len(ordered) // 2] * 1000:>14.1f}{sum(ordered):>9.2f}"
+            f"{stats['max_in_flight']:>15}{stats['connections']:>13}{errors:>8}"
+        )
+
+
+if __name__ == "__main__":
+    main()
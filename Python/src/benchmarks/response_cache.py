@@ -0,0 +1,169 @@
+"""
+Hit rate and latency of the chat response cache on a workload of repeated handbook questions.
+
+Every question is the first turn of a new conversation, drawn with a
+Zipf-like skew from a small pool of questions, with random changes of
+case, spacing and punctuation. The same workload runs without the cache
+and with it (a fresh SQLite file each time). By default chat.py talks to
+the local fake server (started automatically), whose embeddings are
+unrelated for different texts, so only the exact tier can hit; with
+--azure it uses the Azure OpenAI deployments from src/.env, where
+rephrased questions can also hit the near-duplicate tier. Turns go
+through chat.process_message, so finish the Semantic-Kernel-Challenge
+there first.
+
+Usage (from the src directory):
+    python benchmarks/response_cache.py --questions 200
+    python benchmarks/response_cache.py --questions 50 --azure
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+from dotenv import load_dotenv  # noqa: E402
+from openai import AsyncAzureOpenAI  # noqa: E402
+from semantic_kernel import Kernel  # noqa: E402
+from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion, AzureTextEmbedding  # noqa: E402
+
+import chat  # noqa: E402
+from event_loop import run_async  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+QUESTIONS = [
+    "What's the PTO policy?",
+    "How many sick days do I get?",
+    "How do I report a safety incident?",
+    "What is the whistleblower policy?",
+    "When are performance reviews held?",
+    "What does the handbook say about data security?",
+    "Can I work from home?",
+    "What are the company values?",
+    "Who do I contact about workplace violence?",
+    "What training is mandatory for new hires?",
+    "How is my personal data kept private?",
+    "What is the mission of the company?",
+]
+
+# Rewordings for --azure, where they should land in the near-duplicate tier
+REPHRASED = {
+    "What's the PTO policy?": "what is our paid time off policy",
+    "How many sick days do I get?": "How many sick days am I entitled to?",
+    "Can I work from home?": "Am I allowed to work from home?",
+}
+
+
+def make_kernel(args):
+    kernel = Kernel()
+    if args.azure:
+        kernel.add_service(AzureChatCompletion())
+        kernel.add_service(AzureTextEmbedding())
+        return kernel
+    client = AsyncAzureOpenAI(azure_endpoint=args.base_url, api_key="fake", api_version="2024-10-21")
+    kernel.add_service(AzureChatCompletion(service_id="chat", deployment_name="fake", async_client=client))
+    kernel.add_service(AzureTextEmbedding(service_id="embedding", deployment_name="fake", async_client=client))
+    return kernel
+
+
+def workload(count, seed, rephrase):
+    rng = random.Random(seed)
+    weights = [1 / rank for rank in range(1, len(QUESTIONS) + 1)]
+    for question in rng.choices(QUESTIONS, weights, k=count):
+        if rephrase and question in REPHRASED and rng.random() < 0.3:
+            question = REPHRASED[question]
+        if rng.random() < 0.3:
+            question = question.lower()
+        if rng.random() < 0.3:
+            question = question.rstrip("?") + "  ?"
+        yield question
+
+
+async def ask(question):
+    metrics = {}
+    async for _ in chat.timed(chat.process_message(question, chat.new_chat_history(), metrics), metrics):
+        pass
+    return metrics
+
+
+def run_workload(args, cache):
+    chat.response_cache = cache
+    latencies = {"miss": [], "hit": []}
+    for question in workload(args.questions, args.seed, args.azure):
+        metrics = run_async(ask(question))
+        latencies["hit" if "cache_hit" in metrics else "miss"].append(metrics["total_time"])
+    return latencies
+
+
+def fake_server_ready(args):
+    with urllib.request.urlopen(f"{args.base_url}/stats") as response:
+        return json.load(response)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--questions", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--azure", action="store_true", help="use the Azure OpenAI deployments configured in src/.env")
+    parser.add_argument("--port", type=int, default=8799, help="port for the local fake server")
+    parser.add_argument("--latency", type=float, default=0.5, help="fake server response latency in seconds")
+    parser.add_argument("--similarity", type=float, default=0.95)
+    args = parser.parse_args()
+    args.base_url = f"http://127.0.0.1:{args.port}"
+
+    server = None
+    if args.azure:
+        load_dotenv(SRC_DIR / ".env", override=True)
+    else:
+        server = subprocess.Popen([
+            sys.executable, str(SRC_DIR / "benchmarks" / "fake_openai.py"),
+            "--port", str(args.port), "--latency", str(args.latency),
+        ])
+        for _ in range(100):
+            try:
+                fake_server_ready(args)
+                break
+            except OSError:
+                time.sleep(0.1)
+
+    try:
+        kernel = make_kernel(args)
+        chat.get_kernel = lambda: kernel
+        with tempfile.TemporaryDirectory() as directory:
+            uncached = run_workload(args, None)
+            cache = ResponseCache(str(Path(directory) / "response_cache.db"), similarity=args.similarity)
+            cached = run_workload(args, cache)
+            stats = cache.stats()
+            cache.close()
+    except NameError as e:
+        sys.exit(f"chat.py is not complete yet ({e}); finish process_message() first")
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{'run':<10}{'questions':>10}{'total s':>9}{'miss p50 ms':>13}{'hit p50 ms':>12}")
+    for name, latencies in (("no cache", uncached), ("cache", cached)):
+        print(
+            f"{name:<10}{len(latencies['miss']) + len(latencies['hit']):>10}"
+            f"{sum(latencies['miss']) + sum(latencies['hit']):>9.2f}"
+            f"{statistics.median(latencies['miss']) * 1000 if latencies['miss'] else 0:>13.1f}"
+            f"{statistics.median(latencies['hit']) * 1000 if latencies['hit'] else 0:>12.1f}"
+        )
+    print(
+        f"hit rate {stats['hit_rate']:.1%} ({stats['exact_hits']} exact, {stats['similar_hits']} near-duplicate), "
+        f"{stats['entries']} entries, saved {stats['saved_seconds']:.2f} s of model time "
+        f"for {stats['lookup_seconds']:.2f} s spent on lookups"
+    )
+
+
+if __name__ == "__main__":
+    main()
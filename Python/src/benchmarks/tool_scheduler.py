@@ -0,0 +1,152 @@
+"""
+Chat turns whose model response calls several tools at once, run through chat.py's ToolScheduler.
+
+The fake model (fake_openai.py --tool-calls) answers every question by
+calling all registered tools in one response: geocoding and weather
+(against the stub APIs in fake_tool_apis.py), the date/time functions and
+a stand-in for the handbook search that takes --search-latency seconds.
+Each turn runs with the scheduler's concurrency cap at 1 (one call after
+another) and at --concurrency, then once more with --timeout below the
+search latency. Reports turn latency and the per-tool latency breakdown.
+Both servers are started automatically. Turns go through
+chat.process_message, so finish the Semantic-Kernel-Challenge there first.
+
+Usage (from the src directory):
+    python benchmarks/tool_scheduler.py --turns 10 --concurrency 4
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+from typing import Annotated
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+CHAT_PORT, TOOLS_PORT = 8799, 8798
+
+
+class HandbookSearchStub:
+    """Stands in for AiSearchPlugin: an async call that takes a fixed time."""
+
+    def __init__(self, latency):
+        self.latency = latency
+
+    async def search(self, query_str: Annotated[str, "Query about employee handbook"]) -> str:
+        await asyncio.sleep(self.latency)
+        return f"Handbook passage about {query_str}."
+
+
+def start(script, *arguments):
+    return subprocess.Popen([sys.executable, str(SRC_DIR / "benchmarks" / script), *arguments])
+
+
+def wait_until_up(url):
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(url).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--turns", type=int, default=10)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--timeout", type=float, default=0.25, help="per-call timeout for the last run")
+    parser.add_argument("--tool-latency", type=float, default=0.2, help="stub geocoding/weather API latency")
+    parser.add_argument("--search-latency", type=float, default=0.3)
+    args = parser.parse_args()
+    os.environ["GEOCODING_API_URL"] = f"http://127.0.0.1:{TOOLS_PORT}/search"
+    os.environ["WEATHER_API_URL"] = f"http://127.0.0.1:{TOOLS_PORT}/v1/forecast"
+
+    # Imported after the environment points the plugins at the stubs
+    from openai import AsyncAzureOpenAI
+    from semantic_kernel import Kernel
+    from semantic_kernel.connectors.ai.open_ai import AzureChatCompletion
+    from semantic_kernel.filters import FilterTypes
+    from semantic_kernel.functions import kernel_function
+
+    import chat
+    from event_loop import run_async
+    from plugins.datetime_plugin import DateTimePlugin
+    from plugins.geo_cache import GeocodeCache
+    from plugins.geo_coding_plugin import GeoPlugin
+    from plugins.http_client import close_session
+    from plugins.weather_cache import WeatherCache
+    from plugins.weather_plugin import WeatherPlugin
+    from tool_scheduler import ToolScheduler
+
+    search = HandbookSearchStub(args.search_latency)
+    search.search = kernel_function(search.search.__func__, name="get_employeehandbook_response",
+                                    description="Gets query for Employee handbook data").__get__(search)
+
+    def make_kernel(scheduler):
+        kernel = Kernel()
+        client = AsyncAzureOpenAI(azure_endpoint=f"http://127.0.0.1:{CHAT_PORT}", api_key="fake", api_version="2024-10-21")
+        kernel.add_service(AzureChatCompletion(deployment_name="fake", async_client=client))
+        kernel.add_plugin(DateTimePlugin(), plugin_name="DateTime")
+        # Caches that never hit, so every call reaches the stub
+        kernel.add_plugin(GeoPlugin(GeocodeCache(":memory:", ttl=0, negative_ttl=0)), plugin_name="Geo")
+        kernel.add_plugin(WeatherPlugin(WeatherCache({"current": 0, "hourly": 0, "daily": 0})), plugin_name="Weather")
+        kernel.add_plugin(search, plugin_name="Handbook")
+        kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, scheduler)
+        return kernel
+
+    async def ask():
+        metrics = {}
+        stream = chat.process_message("What's the weather at the office?", chat.new_chat_history(), metrics)
+        async for _ in chat.timed(stream, metrics):
+            pass
+        return metrics
+
+    runs = {
+        "sequential": ToolScheduler(timeout=30, max_concurrency=1),
+        f"concurrent x{args.concurrency}": ToolScheduler(timeout=30, max_concurrency=args.concurrency),
+        f"timeout {args.timeout:g}s": ToolScheduler(timeout=args.timeout, max_concurrency=args.concurrency),
+    }
+    servers = [
+        start("fake_openai.py", "--port", str(CHAT_PORT), "--latency", "0.02", "--tool-calls"),
+        start("fake_tool_apis.py", "--port", str(TOOLS_PORT), "--latency", str(args.tool_latency)),
+    ]
+    results = {}
+    try:
+        wait_until_up(f"http://127.0.0.1:{CHAT_PORT}/stats")
+        wait_until_up(f"http://127.0.0.1:{TOOLS_PORT}/stats")
+        chat.response_cache = None
+        for name, scheduler in runs.items():
+            kernel = make_kernel(scheduler)
+            chat.get_kernel = lambda: kernel
+            chat.tool_scheduler = scheduler
+            turns = [run_async(ask()) for _ in range(args.turns)]
+            results[name] = turns
+        run_async(close_session())
+    except NameError as e:
+        sys.exit(f"chat.py is not complete yet ({e}); finish process_message() first")
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    for name, turns in results.items():
+        per_tool = {}
+        for metrics in turns:
+            for call in metrics["tool_calls"]:
+                per_tool.setdefault(call["name"], []).append(call)
+        print(f"{name}: turn p50 {statistics.median(m['total_time'] for m in turns) * 1000:.0f} ms, "
+              f"{len(turns[0]['tool_calls'])} tool calls per turn")
+        for tool, calls in sorted(per_tool.items()):
+            statuses = json.dumps({status: sum(c["status"] == status for c in calls) for status in {c["status"] for c in calls}})
+            print(f"    {tool:<42}{statistics.mean(c['seconds'] for c in calls) * 1000:>8.1f} ms"
+                  f"  (waited {statistics.mean(c['waited'] for c in calls) * 1000:.1f} ms)  {statuses}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Upstream Open-Meteo calls made by WeatherPlugin with its grid-snapped cache and in-flight deduplication.
+
+First a burst of --users concurrent forecast requests for one city, with
+coordinates a few hundred metres apart as different geocoders return
+them; then --calls requests spread over a handful of cities, for future
+and past weather. Without the cache every request is an upstream call.
+Runs against the stub APIs in fake_tool_apis.py (started automatically).
+
+Usage (from the src directory):
+    python benchmarks/weather_cache.py --users 50 --calls 300
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+CITIES = {"Seattle": (47.6062, -122.3321), "London": (51.5074, -0.1278), "Tokyo": (35.6762, 139.6503), "Paris": (48.8566, 2.3522)}
+
+
+def stub_stats(base_url, reset=False):
+    request = urllib.request.Request(f"{base_url}/stats{'/reset' if reset else ''}", method="POST" if reset else "GET")
+    with urllib.request.urlopen(request) as response:
+        return json.load(response)
+
+
+def nearby(rng, latitude, longitude):
+    return latitude + rng.uniform(-0.004, 0.004), longitude + rng.uniform(-0.004, 0.004)
+
+
+async def burst(plugin, users, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        plugin.get_future_weather_forecast(*nearby(rng, *CITIES["Seattle"]), 3) for _ in range(users)
+    ))
+    return time.perf_counter() - start
+
+
+async def spread(plugin, calls, seed):
+    rng = random.Random(seed)
+    start = time.perf_counter()
+    for _ in range(calls):
+        latitude, longitude = nearby(rng, *rng.choice(list(CITIES.values())))
+        if rng.random() < 0.2:
+            await plugin.get_past_weather_forecast(latitude, longitude, rng.choice([1, 3, 7]))
+        else:
+            await plugin.get_future_weather_forecast(latitude, longitude, rng.choice([1, 3]))
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=8798)
+    parser.add_argument("--latency", type=float, default=0.1, help="stub API latency in seconds")
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+    os.environ["WEATHER_API_URL"] = f"{base_url}/v1/forecast"
+
+    # Imported after the environment points it at the stub
+    from event_loop import run_async
+    from plugins.http_client import close_session
+    from plugins.weather_plugin import WEATHER_TTL_SECONDS, WeatherPlugin
+    from plugins.weather_cache import WeatherCache
+
+    server = subprocess.Popen([
+        sys.executable, str(SRC_DIR / "benchmarks" / "fake_tool_apis.py"),
+        "--port", str(args.port), "--latency", str(args.latency),
+    ])
+    rows = []
+    try:
+        for _ in range(100):
+            try:
+                stub_stats(base_url)
+                break
+            except OSError:
+                time.sleep(0.1)
+        plugin = WeatherPlugin(WeatherCache(WEATHER_TTL_SECONDS))
+        for name, requests, workload in (
+            ("burst", args.users, burst(plugin, args.users, args.seed)),
+            ("spread", args.calls, spread(plugin, args.calls, args.seed)),
+        ):
+            stub_stats(base_url, reset=True)
+            seconds = run_async(workload)
+            rows.append((name, requests, stub_stats(base_url)["requests"], seconds))
+        stats = plugin.cache.stats()
+        run_async(close_session())
+    finally:
+        server.terminate()
+        server.wait()
+
+    print(f"{'workload':<10}{'requests':>10}{'upstream':>10}{'total s':>9}")
+    for name, requests, upstream, seconds in rows:
+        print(f"{name:<10}{requests:>10}{upstream:>10}{seconds:>9.2f}")
+    print(
+        f"section hit rate {stats['hit_rate']:.1%}, {stats['deduplicated']} requests joined a call in flight, "
+        f"{stats['entries']} entries; without the cache every request is an upstream call "
+        f"(about {(args.users + args.calls) * args.latency:.1f} s at this latency, less for the concurrent burst)"
+    )
+
+
+if __name__ == "__main__":
+    main()
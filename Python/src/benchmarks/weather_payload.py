@@ -0,0 +1,107 @@
+"""
+Tokens a weather tool result puts into the chat history: raw Open-Meteo JSON vs WeatherPlugin's compact table.
+
+Fetches 16-day forecasts and 16 past days through the same cache the
+plugin uses, from the stub APIs in fake_tool_apis.py (started
+automatically; same response shape and value ranges as Open-Meteo), or
+from the real API with --live. --record saves the raw responses as JSON
+fixtures and --fixtures measures saved ones instead of fetching. Tokens
+are counted with history_reducer.count_tokens (tiktoken when installed,
+else an estimate of four characters per token).
+
+Usage (from the src directory):
+    python benchmarks/weather_payload.py
+    python benchmarks/weather_payload.py --live --record benchmarks/fixtures
+    python benchmarks/weather_payload.py --fixtures benchmarks/fixtures
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parents[1]
+sys.path.insert(0, str(SRC_DIR))
+
+# Name, days of forecast or past data, and a selection the model could ask for
+CASES = [
+    ("forecast 16 days", "future", 16, "", ""),
+    ("forecast 3 days", "future", 3, "", ""),
+    ("forecast 16 days, temperature and rain", "future", 16, "temperature,precipitation", ""),
+    ("forecast 16 days, one date", "future", 16, "", "2026-01-02"),
+    ("past 16 days", "past", 16, "", ""),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--live", action="store_true", help="fetch from api.open-meteo.com instead of the stub")
+    parser.add_argument("--record", type=Path, help="directory to save the raw responses in")
+    parser.add_argument("--fixtures", type=Path, help="directory of saved raw responses to measure")
+    parser.add_argument("--port", type=int, default=8798)
+    args = parser.parse_args()
+    base_url = f"http://127.0.0.1:{args.port}"
+    if not args.live and not args.fixtures:
+        os.environ["WEATHER_API_URL"] = f"{base_url}/v1/forecast"
+
+    # Imported after the environment points it at the stub
+    from event_loop import run_async
+    from history_reducer import count_tokens
+    from plugins.http_client import close_session
+    from plugins.weather_cache import WeatherCache
+    from plugins.weather_plugin import (
+        CURRENT_VARIABLES, DAILY_VARIABLES, HOURLY_VARIABLES, UNITS, WEATHER_TTL_SECONDS, fetch_forecast,
+    )
+    from plugins.weather_summary import summarize_forecast
+
+    cache = WeatherCache(WEATHER_TTL_SECONDS)
+
+    async def fetch(kind, days):
+        if kind == "future":
+            sections, params = {"current": CURRENT_VARIABLES, "hourly": HOURLY_VARIABLES}, {**UNITS, "forecast_days": days}
+        else:
+            sections, params = {"daily": DAILY_VARIABLES}, {**UNITS, "past_days": days, "forecast_days": 0}
+        return await cache.get(47.6062, -122.3321, sections, params, fetch_forecast)
+
+    server = None
+    if not args.live and not args.fixtures:
+        server = subprocess.Popen([sys.executable, str(SRC_DIR / "benchmarks" / "fake_tool_apis.py"), "--port", str(args.port)])
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"{base_url}/stats").close()
+                break
+            except OSError:
+                time.sleep(0.1)
+    rows = []
+    try:
+        for name, kind, days, variables, dates in CASES:
+            fixture = f"open_meteo_{kind}_{days}d.json"
+            if args.fixtures:
+                data = json.loads((args.fixtures / fixture).read_text())
+            else:
+                data = run_async(fetch(kind, days))
+            if args.record:
+                args.record.mkdir(parents=True, exist_ok=True)
+                (args.record / fixture).write_text(json.dumps(data))
+            raw = count_tokens(json.dumps(data))
+            start = time.perf_counter()
+            summary = summarize_forecast(data, variables, dates)
+            seconds = time.perf_counter() - start
+            rows.append((name, raw, count_tokens(summary), seconds))
+        if not args.fixtures:
+            run_async(close_session())
+    finally:
+        if server is not None:
+            server.terminate()
+            server.wait()
+
+    print(f"{'payload':<42}{'raw tokens':>12}{'compact':>9}{'ratio':>8}{'summarize ms':>14}")
+    for name, raw, compact, seconds in rows:
+        print(f"{name:<42}{raw:>12}{compact:>9}{raw / compact:>7.1f}x{seconds * 1000:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+Regression check: tagged work items stay consistent across writes on every storage backend.
+
+Starts workitems/api.py in a fresh process per backend, with a temporary
+data directory, and drives it through the FastAPI test client: creates
+items tagged "payments" and "ui; payments", updates the second one's tags,
+deletes the first, and after each step checks the tag filter, tag stats,
+the item count and that Tags read back exactly as written. Exits non-zero
+if any backend disagrees.
+
+Usage (from the src directory):
+    python benchmarks/workitems_backends.py --storage memory columnar sqlite
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+from workitems_startup import WORKITEMS_DIR
+
+# Runs in the child process; prints a JSON line with the failed checks
+PROBE = """
+import json
+from fastapi.testclient import TestClient
+import api
+
+failures = []
+
+def check(name, actual, expected):
+    if actual != expected:
+        failures.append(f"{name}: expected {expected!r}, got {actual!r}")
+
+def ids(**params):
+    return [item["ID"] for item in client.get("/workitems", params=params).json()["items"]]
+
+def tag_counts():
+    stats = client.get("/workitems/stats", params={"groupBy": "tag"}).json()
+    return {group["tag"]: group["count"] for group in stats["groups"]}
+
+with TestClient(api.app, raise_server_exceptions=False) as client:
+    count = len(ids())
+    first, second = 900001, 900002
+    for id, tags in ((first, "payments"), (second, "ui; payments")):
+        item = {"ID": id, "WorkItemType": "Task", "Title": f"Item {id}", "AssignedTo": "", "State": "New", "Tags": tags}
+        check(f"POST {id}", client.post("/workitems", json=item).status_code, 201)
+    check("Tags round trip", client.get(f"/workitems/{second}").json()["Tags"], "ui; payments")
+    check("tag=payments after create", ids(tag="payments"), [first, second])
+    check("payments count after create", tag_counts().get("payments"), 2)
+
+    item = {"ID": second, "WorkItemType": "Task", "Title": f"Item {second}", "AssignedTo": "", "State": "New", "Tags": "misc"}
+    response = client.put(f"/workitems/{second}", json=item)
+    check("PUT status", response.status_code, 200)
+    check("Tags after PUT", client.get(f"/workitems/{second}").json()["Tags"], "misc")
+    check("tag=payments after PUT", ids(tag="payments"), [first])
+    check("tag=ui after PUT", ids(tag="ui"), [])
+    check("tag=misc after PUT", ids(tag="misc"), [second])
+    check("payments count after PUT", tag_counts().get("payments"), 1)
+    check("items after PUT", len(ids()), count + 2)
+
+    check("DELETE status", client.delete(f"/workitems/{first}").status_code, 204)
+    check("tag=payments after DELETE", ids(tag="payments"), [])
+    check("payments count after DELETE", tag_counts().get("payments"), None)
+    check("tag=misc after DELETE", ids(tag="misc"), [second])
+    check("items after DELETE", len(ids()), count + 1)
+
+print(json.dumps({"failures": failures}))
+"""
+
+
+def run(storage, data_dir):
+    env = dict(os.environ, WORKITEMS_STORAGE=storage, WORKITEMS_DATA_DIR=str(data_dir))
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=WORKITEMS_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])["failures"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--storage", nargs="+", default=["memory", "columnar", "sqlite"], choices=["memory", "columnar", "sqlite"])
+    args = parser.parse_args()
+
+    failed = False
+    with tempfile.TemporaryDirectory() as directory:
+        for storage in args.storage:
+            failures = run(storage, os.path.join(directory, storage))
+            print(f"{storage:<10}{'ok' if not failures else 'FAILED'}")
+            for failure in failures:
+                print(f"    {failure}")
+            failed = failed or bool(failures)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
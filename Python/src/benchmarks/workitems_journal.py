@@ -0,0 +1,62 @@
+"""
+Write throughput of the work item journal with per-request vs batched fsync.
+
+Simulates concurrent API handlers that each append a mutation and wait for
+it to become durable, the same way workitems/api.py does.
+
+Usage (from the src directory):
+    python benchmarks/workitems_journal.py --writers 64 --writes 20000
+"""
+import argparse
+import asyncio
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "workitems"))
+
+from journal import MutationLog  # noqa: E402
+
+
+async def run(fsync, writers, writes):
+    with tempfile.TemporaryDirectory() as directory:
+        journal = MutationLog(directory, fsync=fsync)
+        per_writer = writes // writers
+
+        async def writer(writer_id):
+            for i in range(per_writer):
+                record = {
+                    "op": "put",
+                    "item": {
+                        "ID": writer_id * per_writer + i,
+                        "WorkItemType": "Task",
+                        "Title": f"Benchmark item {i}",
+                        "AssignedTo": "User1",
+                        "State": "New",
+                        "Tags": "",
+                    },
+                }
+                await asyncio.wrap_future(journal.append(record))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(writer(w) for w in range(writers)))
+        elapsed = time.perf_counter() - start
+        journal.close()
+        return per_writer * writers, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--writers", type=int, default=64, help="concurrent writers")
+    parser.add_argument("--writes", type=int, default=20000, help="total writes per mode")
+    args = parser.parse_args()
+
+    print(f"{'fsync':<8}{'writes':>10}{'seconds':>10}{'writes/s':>12}")
+    for fsync in ("always", "batch", "off"):
+        total, elapsed = asyncio.run(run(fsync, args.writers, args.writes))
+        print(f"{fsync:<8}{total:>10}{elapsed:>10.2f}{total / elapsed:>12.0f}")
+
+
+if __name__ == "__main__":
+    main()
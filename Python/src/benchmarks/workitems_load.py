@@ -0,0 +1,137 @@
+"""
+Requests per second of the Work Items API as the number of worker processes grows.
+
+Seeds a synthetic backlog, starts the API under uvicorn with the sqlite
+storage and 1..N workers, and drives it from several client processes with
+a mix of item reads, filtered list reads and updates. Reports throughput and
+latency percentiles for each worker count.
+
+Usage (from the src directory):
+    python benchmarks/workitems_load.py --workers 1 2 4 8 --clients 4 --concurrency 32 --duration 10
+"""
+import argparse
+import asyncio
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.request
+from pathlib import Path
+
+import aiohttp
+
+from workitems_startup import STATES, TYPES, WORKITEMS_DIR, generate_csv
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(workers, port, csv_path, data_dir):
+    env = dict(
+        os.environ,
+        WORKITEMS_STORAGE="sqlite",
+        WORKITEMS_CSV=str(csv_path),
+        WORKITEMS_DATA_DIR=str(data_dir),
+    )
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+        cwd=WORKITEMS_DIR,
+        env=env,
+    )
+    deadline = time.monotonic() + 120
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://127.0.0.1:{port}/workitemtypes", timeout=1):
+                # Give the remaining workers a moment to finish booting
+                time.sleep(1 + workers * 0.25)
+                return server
+        except OSError:
+            time.sleep(0.2)
+    server.kill()
+    raise RuntimeError("Work Items API did not start")
+
+
+async def drive(base_url, rows, concurrency, duration, write_ratio, seed):
+    rng = random.Random(seed)
+    latencies = []
+    errors = 0
+    deadline = time.monotonic() + duration
+
+    async def client(session):
+        nonlocal errors
+        while time.monotonic() < deadline:
+            id = rng.randint(1, rows)
+            roll = rng.random()
+            start = time.perf_counter()
+            if roll < write_ratio:
+                request = session.put(f"{base_url}/workitems/{id}", json={
+                    "ID": id, "WorkItemType": "", "Title": "", "AssignedTo": "", "State": rng.choice(STATES), "Tags": "",
+                })
+            elif roll < (1 + write_ratio) / 2:
+                request = session.get(f"{base_url}/workitems/{id}")
+            else:
+                request = session.get(f"{base_url}/workitems", params={"type": rng.choice(TYPES), "limit": "50"})
+            async with request as response:
+                await response.read()
+                if response.status >= 400:
+                    errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    async with aiohttp.ClientSession(connector=connector) as session:
+        await asyncio.gather(*(client(session) for _ in range(concurrency)))
+    return latencies, errors
+
+
+def client_process(args):
+    return asyncio.run(drive(*args))
+
+
+def measure(workers, args, csv_path, directory):
+    port = free_port()
+    server = start_server(workers, port, csv_path, Path(directory) / f"data-{workers}")
+    try:
+        jobs = [
+            (f"http://127.0.0.1:{port}", args.rows, args.concurrency, args.duration, args.write_ratio, seed)
+            for seed in range(args.clients)
+        ]
+        with multiprocessing.Pool(args.clients) as pool:
+            results = pool.map(client_process, jobs)
+    finally:
+        server.terminate()
+        server.wait()
+    latencies = sorted(latency for result, _ in results for latency in result)
+    errors = sum(errors for _, errors in results)
+    p99 = latencies[int(len(latencies) * 0.99)] if latencies else 0.0
+    return len(latencies) / args.duration, statistics.median(latencies) * 1000, p99 * 1000, errors
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--rows", type=int, default=10_000)
+    parser.add_argument("--clients", type=int, default=4, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="open requests per client process")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds per worker count")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="fraction of requests that are updates")
+    args = parser.parse_args()
+
+    print(f"{'workers':>8}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}")
+    with tempfile.TemporaryDirectory() as directory:
+        csv_path = Path(directory) / "workitems.csv"
+        generate_csv(csv_path, args.rows)
+        for workers in args.workers:
+            throughput, p50, p99, errors = measure(workers, args, csv_path, directory)
+            print(f"{workers:>8}{throughput:>10.0f}{p50:>10.1f}{p99:>10.1f}{errors:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""
+Startup time and peak RSS of the Work Items API at different backlog sizes.
+
+Generates a synthetic CSV for each size, then imports workitems/api.py in a
+fresh process pointed at it and reports the time until the store is ready
+and the peak resident set size of that process. The sqlite store is seeded
+into a new database file each time.
+
+Usage (from the src directory):
+    python benchmarks/workitems_startup.py --rows 10000 100000 1000000 --storage memory columnar sqlite
+"""
+import argparse
+import csv
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+WORKITEMS_DIR = Path(__file__).resolve().parents[1] / "workitems"
+
+# Runs in the child process; prints a JSON line with the measurements
+PROBE = """
+import json, resource, sys, time
+start = time.perf_counter()
+import api
+api.store_ready.wait()
+elapsed = time.perf_counter() - start
+peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+# ru_maxrss is KiB on Linux and bytes on macOS
+peak_mb = peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+print(json.dumps({"seconds": elapsed, "peak_rss_mb": peak_mb, "items": len(api.workitems)}))
+"""
+
+TYPES = ["Bug", "Epic", "Feature", "Task", "Test Case", "User Story"]
+STATES = ["New", "Active", "Closed", "Resolved", "Design", "Ready"]
+WORDS = "cart checkout payment login profile newsletter shipping coupon catalog search order invoice".split()
+
+
+def generate_csv(path, rows):
+    rng = random.Random(rows)
+    with open(path, mode="w", encoding="utf-8", newline="") as file:
+        writer = csv.writer(file)
+        writer.writerow(["ID", "WorkItemType", "Title", "AssignedTo", "State", "Tags"])
+        for id in range(1, rows + 1):
+            writer.writerow([
+                id,
+                rng.choice(TYPES),
+                " ".join(rng.choices(WORDS, k=6)),
+                f"User{rng.randint(1, 200)}",
+                rng.choice(STATES),
+                "; ".join(rng.sample(WORDS, k=rng.randint(0, 3))),
+            ])
+
+
+def measure(csv_path, data_dir, storage):
+    env = dict(
+        os.environ,
+        WORKITEMS_STORAGE=storage,
+        WORKITEMS_CSV=str(csv_path),
+        WORKITEMS_DATA_DIR=str(data_dir),
+        WORKITEMS_WARM_LOAD="eager",
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=WORKITEMS_DIR,
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--storage", nargs="+", default=["memory"], choices=["memory", "columnar", "sqlite"])
+    args = parser.parse_args()
+
+    print(f"{'storage':<10}{'rows':>10}{'seconds':>10}{'peak RSS MB':>14}")
+    with tempfile.TemporaryDirectory() as directory:
+        for rows in args.rows:
+            csv_path = Path(directory) / f"workitems-{rows}.csv"
+            generate_csv(csv_path, rows)
+            for storage in args.storage:
+                data_dir = Path(directory) / f"data-{storage}-{rows}"
+                result = measure(csv_path, data_dir, storage)
+                print(f"{storage:<10}{rows:>10}{result['seconds']:>10.2f}{result['peak_rss_mb']:>14.0f}")
+
+
+if __name__ == "__main__":
+    main()
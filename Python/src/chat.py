@@ -8,11 +8,20 @@ from semantic_kernel.connectors.ai.function_choice_behavior import FunctionChoic
 from semantic_kernel.connectors.openapi_plugin import OpenAPIFunctionExecutionParameters
 from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
 from semantic_kernel.contents.chat_history import ChatHistory
+from semantic_kernel.contents.function_call_content import FunctionCallContent
+from semantic_kernel.contents.utils.author_role import AuthorRole
+from semantic_kernel.exceptions import KernelServiceNotFoundError
+from semantic_kernel.filters import FilterTypes
 from semantic_kernel.functions import KernelArguments
 import os
+import threading
+import time
 from pathlib import Path
 
-from plugins.ai_search_plugin import AiSearchPlugin
+from history_reducer import TokenBudgetReducer
+from response_cache import ResponseCache, fingerprint, is_cacheable
+from tool_scheduler import ToolScheduler
+from plugins.ai_search_plugin import AiSearchPlugin, embed_query
 from plugins.geo_coding_plugin import GeoPlugin
 from plugins.datetime_plugin import DateTimePlugin
 from plugins.weather_plugin import WeatherPlugin
@@ -40,7 +49,42 @@ print(f"AZURE_AI_SEARCH_INDEX_NAME: {os.environ.get('AZURE_AI_SEARCH_INDEX_NAME'
 print(f"AZURE_OPENAI_TEXT_TO_IMAGE_DEPLOYMENT_NAME: {os.environ.get('AZURE_OPENAI_TEXT_TO_IMAGE_DEPLOYMENT_NAME')}")
 print("==============================================")
 
-chat_history = ChatHistory()
+# Token budget and message cap for the history sent with each turn, and whether dropped turns are summarized
+CHAT_HISTORY_MAX_TOKENS = int(os.environ.get("CHAT_HISTORY_MAX_TOKENS", "3000"))
+CHAT_HISTORY_MAX_MESSAGES = int(os.environ.get("CHAT_HISTORY_MAX_MESSAGES", "50"))
+CHAT_HISTORY_SUMMARIZE = os.environ.get("CHAT_HISTORY_SUMMARIZE", "false").lower() == "true"
+
+def new_chat_history():
+    """Create an empty chat history bounded by the CHAT_HISTORY_* settings."""
+    return TokenBudgetReducer(max_tokens=CHAT_HISTORY_MAX_TOKENS, target_count=CHAT_HISTORY_MAX_MESSAGES)
+
+# Opt-in cache of answers, shared by every session; see response_cache.py
+RESPONSE_CACHE = os.environ.get("RESPONSE_CACHE", "false").lower() == "true"
+RESPONSE_CACHE_PATH = os.environ.get("RESPONSE_CACHE_PATH", str(Path(__file__).parent / "data" / "response_cache.db"))
+RESPONSE_CACHE_TTL_SECONDS = float(os.environ.get("RESPONSE_CACHE_TTL_SECONDS", "86400"))
+RESPONSE_CACHE_MAX_ENTRIES = int(os.environ.get("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+# Cosine similarity a different prompt needs to share a cached answer; 1 turns the near-duplicate lookup off
+RESPONSE_CACHE_SIMILARITY = float(os.environ.get("RESPONSE_CACHE_SIMILARITY", "0.95"))
+
+response_cache = ResponseCache(
+    RESPONSE_CACHE_PATH,
+    ttl=RESPONSE_CACHE_TTL_SECONDS,
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    similarity=RESPONSE_CACHE_SIMILARITY,
+) if RESPONSE_CACHE else None
+
+# Limits for the tool calls the model makes: seconds per call, and calls running at once per turn
+TOOL_CALL_TIMEOUT_SECONDS = float(os.environ.get("TOOL_CALL_TIMEOUT_SECONDS", "30"))
+TOOL_CALL_MAX_CONCURRENCY = int(os.environ.get("TOOL_CALL_MAX_CONCURRENCY", "4"))
+
+tool_scheduler = ToolScheduler(timeout=TOOL_CALL_TIMEOUT_SECONDS, max_concurrency=TOOL_CALL_MAX_CONCURRENCY)
+
+# History used when a caller doesn't keep its own; the Streamlit app keeps one per browser session
+chat_history = new_chat_history()
+
+# The kernel and its plugins are built once per process and shared by every session
+_kernel = None
+_kernel_lock = threading.Lock()
 
 def initialize_kernel():
     # Semantic-Kernel-Challenge - Add Kernel
@@ -58,9 +102,7 @@ def initialize_kernel():
     return kernel
 
 
-async def process_message(user_input):
-    kernel = initialize_kernel()
-
+def register_plugins(kernel):
     # SK-Plugins-Challenge - Add Time Plugin
 
 
@@ -78,20 +120,182 @@ async def process_message(user_input):
 
     # Image-Generation - Text To Image Plugin
 
-    # Start Semantic-Kernel-Challenge
-    
-    # Get the chat completion service from the kernel
+    return kernel
 
-    # Add the user's message to chat history
 
-    # Create settings for the chat request
-    
-    # Send the chat history to the AI and get a response
-    
-    # Add the AI's response to chat history
-    
-    return result
+def build_kernel():
+    """Build a new kernel with all plugins registered. Use get_kernel() to share one instead."""
+    kernel = register_plugins(initialize_kernel())
+    # Runs the tool calls of each turn concurrently, within the limits above
+    kernel.add_filter(FilterTypes.AUTO_FUNCTION_INVOCATION, tool_scheduler)
+    return kernel
+
+
+def get_kernel():
+    """Return the process-wide kernel, building it on first use."""
+    global _kernel
+    if _kernel is None:
+        with _kernel_lock:
+            # Several sessions may ask at once; only the first one builds
+            if _kernel is None:
+                _kernel = build_kernel()
+    return _kernel
+
+
+async def prepare_turn(session_history):
+    """Return the shared kernel and the history for this turn, reduced to its token budget."""
+    kernel = get_kernel()
+    # Conversation state is per session, so each caller passes its own history
+    history = chat_history if session_history is None else session_history
+    if CHAT_HISTORY_SUMMARIZE and history.service is None:
+        history.service = kernel.get_service(type=AzureChatCompletion)
+    # Trim the history to its token budget before it goes into the prompt
+    await history.reduce()
+    logger.info(
+        "Chat history: %d prompt tokens, %d saved this turn",
+        history.prompt_tokens,
+        history.prompt_tokens_saved,
+    )
+    return kernel, history
+
+
+def cache_context(kernel, chat_history):
+    """Fingerprint of what an answer depends on besides the prompt: the functions the model can call and the conversation so far."""
+    functions = sorted(metadata.fully_qualified_name for metadata in kernel.get_full_list_of_function_metadata())
+    earlier = [f"{message.role.value}: {message.content}" for message in chat_history.messages]
+    return fingerprint(os.environ.get("AZURE_OPENAI_CHAT_DEPLOYMENT_NAME", ""), *functions, "", *earlier)
+
+
+async def lookup_response(kernel, chat_history, user_input):
+    """
+    Look this turn up in the response cache.
+
+    Returns the CacheHit, or None, and the lookup to pass to save_response
+    after a miss (None when caching is off).
+    """
+    if response_cache is None:
+        return None, None
+    start = time.perf_counter()
+    context = cache_context(kernel, chat_history)
+    hit = response_cache.get(user_input, context)
+    embedding = None
+    if hit is None and response_cache.similarity < 1:
+        try:
+            embedding_service = kernel.get_service(type=AzureTextEmbedding)
+        except KernelServiceNotFoundError:
+            embedding_service = None
+        if embedding_service is not None:
+            # Same cache and batcher as the handbook search, which often embeds the same question
+            embedding = await embed_query(embedding_service, user_input)
+            hit = response_cache.get_similar(context, embedding)
+    response_cache.record_lookup(hit, time.perf_counter() - start)
+    if hit is not None:
+        logger.info("Response cache %s hit (similarity %.3f)", hit.kind, hit.similarity)
+    lookup = {"prompt": user_input, "context": context, "embedding": embedding, "start": len(chat_history.messages)}
+    return hit, lookup
+
+
+def save_response(chat_history, lookup, response, latency):
+    """Cache a freshly generated answer, unless it called a function that isn't known to be read-only and stable."""
+    if lookup is None or not response:
+        return
+    # Plugin names are chosen where the plugins are registered, so only the function names are checked
+    called = [
+        item.function_name
+        for message in chat_history.messages[lookup["start"]:]
+        for item in message.items
+        if isinstance(item, FunctionCallContent)
+    ]
+    if not is_cacheable(called):
+        response_cache.record_skip()
+        return
+    response_cache.put(lookup["prompt"], lookup["context"], response, latency, lookup["embedding"])
+
+
+class StreamedAnswer:
+    """
+    The assistant's text from a streaming chat completion, as an async iterable of pieces.
+
+    Function calls are still invoked automatically while it streams; SK
+    adds the calls and their results to the history and streams the
+    follow-up answer. After iterating, text is the final answer.
+    """
+
+    def __init__(self, stream):
+        self._stream = stream
+        self.parts = []
+
+    @property
+    def text(self):
+        return "".join(self.parts)
+
+    async def __aiter__(self):
+        attempt = 0
+        async for chunk in self._stream:
+            # Function results are streamed back too; only the assistant's text goes to the user
+            if chunk is None or chunk.role != AuthorRole.ASSISTANT or not chunk.content:
+                continue
+            if chunk.function_invoke_attempt != attempt:
+                # Text from an earlier request went into the history together with its function calls
+                attempt = chunk.function_invoke_attempt
+                self.parts = []
+            self.parts.append(chunk.content)
+            yield chunk.content
+
+
+async def process_message(user_input, chat_history=None, metrics=None):
+    """
+    Yield the response to user_input as it is generated.
+
+    If a metrics dict is passed, tool_calls (name, seconds and status of
+    each tool call) is written to it when the model called tools, and
+    cache_hit ("exact" or "similar") when the answer came from the
+    response cache. Wrap the stream in timed() for response times.
+    """
+    kernel, chat_history = await prepare_turn(chat_history)
+    hit, lookup = await lookup_response(kernel, chat_history, user_input)
+    if hit is not None:
+        chat_history.add_user_message(user_input)
+        chat_history.add_assistant_message(hit.response)
+        if metrics is not None:
+            metrics["cache_hit"] = hit.kind
+        yield hit.response
+        return
+
+    # Tool calls made while answering are capped, timed out and timed as one turn
+    with tool_scheduler.turn() as tools:
+        start = time.perf_counter()
+
+        # Start Semantic-Kernel-Challenge
+        
+        # Get the chat completion service from the kernel
+
+        # Add the user's message to chat history
+
+        # Create settings for the chat request
+        
+        # Send the chat history to the AI and yield the response as it streams in (see StreamedAnswer)
+        
+        # Add the AI's response to chat history
+        
+        save_response(chat_history, lookup, str(result), time.perf_counter() - start)
+    if metrics is not None:
+        metrics["tool_calls"] = tools.calls
+
+
+async def timed(stream, metrics):
+    """Pass a response stream through, writing time_to_first_token and total_time (seconds) to metrics."""
+    start = time.perf_counter()
+    first_token = None
+    async for text in stream:
+        if first_token is None:
+            first_token = time.perf_counter() - start
+        yield text
+    total = time.perf_counter() - start
+    metrics["time_to_first_token"] = first_token if first_token is not None else total
+    metrics["total_time"] = total
+    logger.info("Streamed response: first token after %.3fs, complete after %.3fs", metrics["time_to_first_token"], total)
 
 def reset_chat_history():
     global chat_history
-    chat_history = ChatHistory()
\ No newline at end of file
+    chat_history = new_chat_history()
\ No newline at end of file
@@ -0,0 +1,76 @@
+import asyncio
+import atexit
+import queue
+import threading
+
+# One event loop for the whole process, running on a daemon thread
+_loop = None
+_loop_lock = threading.Lock()
+
+
+def get_loop():
+    """Return the background event loop, starting it on first use."""
+    global _loop
+    if _loop is None:
+        with _loop_lock:
+            if _loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name="async-loop", daemon=True).start()
+                atexit.register(_stop, loop)
+                _loop = loop
+    return _loop
+
+
+def _stop(loop):
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def run_async(coroutine, timeout=None):
+    """
+    Run a coroutine on the background loop and wait for its result.
+
+    Use this instead of asyncio.run() from Streamlit callbacks. The loop
+    outlives every turn, so the HTTP clients created on it (the shared
+    kernel's Azure OpenAI and AI Search clients) keep their pooled
+    connections, and TLS handshakes, from one turn to the next. asyncio.run()
+    closes its loop after every call, which throws them away.
+    """
+    future = asyncio.run_coroutine_threadsafe(coroutine, get_loop())
+    try:
+        return future.result(timeout)
+    except TimeoutError:
+        future.cancel()
+        raise
+
+
+def iterate_async(async_iterable):
+    """
+    Iterate an async generator on the background loop from synchronous code, e.g. for st.write_stream.
+
+    The generator runs as a single task, so context variables it sets (such
+    as tracing spans) stay valid across its yields.
+    """
+    items = queue.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in async_iterable:
+                items.put((item, None))
+        except BaseException as e:
+            items.put((done, e))
+            raise
+        items.put((done, None))
+
+    future = asyncio.run_coroutine_threadsafe(pump(), get_loop())
+    try:
+        while True:
+            item, error = items.get()
+            if item is done:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        # Stops the generator if the caller gives up early
+        future.cancel()
@@ -0,0 +1,123 @@
+import logging
+from typing import Any
+
+from pydantic import Field
+from semantic_kernel.contents import AuthorRole, ChatHistory, ChatMessageContent
+from semantic_kernel.contents.history_reducer.chat_history_reducer import ChatHistoryReducer
+from semantic_kernel.contents.history_reducer.chat_history_reducer_utils import (
+    SUMMARY_METADATA_KEY,
+    contains_function_call_or_result,
+    extract_range,
+    locate_safe_reduction_index,
+)
+from semantic_kernel.contents.history_reducer.chat_history_summarization_reducer import DEFAULT_SUMMARIZATION_PROMPT
+
+logger = logging.getLogger(__name__)
+
+try:
+    import tiktoken
+    # Downloaded on first use and cached (TIKTOKEN_CACHE_DIR), so this can fail offline
+    _encoding = tiktoken.get_encoding("o200k_base")
+except Exception as e:
+    logger.warning("tiktoken encoding unavailable (%s); estimating token counts from characters", e)
+    _encoding = None
+
+# Fixed cost of each message's role and framing in the prompt
+MESSAGE_OVERHEAD_TOKENS = 4
+
+
+def count_tokens(text):
+    """Count tokens with tiktoken when its encoding is available, else estimate about four characters per token."""
+    if not text:
+        return 0
+    if _encoding is not None:
+        return len(_encoding.encode(text, disallowed_special=()))
+    return len(text) // 4 + 1
+
+
+def count_message_tokens(message):
+    # Items cover plain text as well as function calls (name and arguments) and their results
+    return MESSAGE_OVERHEAD_TOKENS + sum(count_tokens(str(item)) for item in message.items)
+
+
+def count_history_tokens(messages):
+    return sum(count_message_tokens(message) for message in messages)
+
+
+class TokenBudgetReducer(ChatHistoryReducer):
+    """
+    Chat history that keeps the prompt within a token budget.
+
+    reduce() drops the oldest messages until the rest fit in max_tokens and
+    target_count messages, without separating a function call from its
+    result. When a summarization service is set, the dropped messages are
+    folded into one rolling summary kept at the start of the history instead
+    of being discarded.
+
+    Every reduce() records how many prompt tokens the turn saved compared
+    with sending the whole conversation.
+    """
+
+    target_count: int = Field(default=50, gt=0, description="Most messages kept, besides the summary.")
+    max_tokens: int = Field(default=3000, gt=0, description="Token budget for the history sent with each turn.")
+    service: Any = Field(default=None, exclude=True, description="Chat completion service used to summarize, if any.")
+    summarization_instructions: str = DEFAULT_SUMMARIZATION_PROMPT
+    # Tokens of everything dropped so far, less the summary standing in for it
+    dropped_tokens: int = 0
+    prompt_tokens: int = 0
+    prompt_tokens_saved: int = 0
+    total_prompt_tokens_saved: int = 0
+
+    async def reduce(self):
+        """Reduce the history to the budget and record this turn's token savings; returns self if anything changed."""
+        reduced = await self._reduce()
+        self.prompt_tokens = count_history_tokens(self.messages)
+        self.prompt_tokens_saved = self.dropped_tokens
+        self.total_prompt_tokens_saved += self.prompt_tokens_saved
+        return reduced
+
+    async def _reduce(self):
+        messages = self.messages
+        offset = 1 if messages and messages[0].metadata.get(SUMMARY_METADATA_KEY) else 0
+        keep = 0
+        tokens = count_message_tokens(messages[0]) if offset else 0
+        for message in reversed(messages[offset:]):
+            tokens += count_message_tokens(message)
+            if keep and (tokens > self.max_tokens or keep >= self.target_count):
+                break
+            keep += 1
+        start = locate_safe_reduction_index(messages, keep, offset_count=offset)
+        if start is None or start <= offset:
+            return None
+
+        dropped = messages[offset:start]
+        summary = await self._summarize(messages[:offset], dropped) if self.service is not None else None
+        # Without a new summary an existing one is kept as it is
+        head = [summary] if summary is not None else messages[:offset]
+        self.messages = head + messages[start:]
+        self.dropped_tokens += count_history_tokens(messages[:start]) - count_history_tokens(head)
+        logger.info("Reduced chat history from %d to %d messages", len(messages), len(self.messages))
+        return self
+
+    async def _summarize(self, previous_summary, dropped):
+        # Function calls and results are left out of the summary, as in ChatHistorySummarizationReducer
+        transcript = "\n".join(
+            f"{message.role.value}: {message.content}"
+            for message in previous_summary + extract_range(dropped, start=0, filter_func=contains_function_call_or_result)
+        )
+        prompt = ChatHistory(system_message=self.summarization_instructions)
+        prompt.add_user_message(transcript)
+        settings = self.service.get_prompt_execution_settings_class()()
+        try:
+            response = await self.service.get_chat_message_content(prompt, settings)
+        except Exception:
+            # Losing the summary is better than failing the turn; the messages are still truncated
+            logger.exception("Chat history summarization failed")
+            return None
+        if response is None:
+            return None
+        return ChatMessageContent(
+            role=AuthorRole.SYSTEM,
+            content=f"Summary of the earlier conversation: {response.content}",
+            metadata={SUMMARY_METADATA_KEY: True},
+        )
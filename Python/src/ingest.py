@@ -0,0 +1,321 @@
+"""
+Ingest the employee handbook PDF into the configured vector store.
+
+Reads the PDF a page at a time, splits the text into overlapping chunks of
+about --chunk-tokens tokens (on sentence boundaries; a chunk may span a
+page break), embeds new chunks in parallel batches within the embedding
+deployment's request and token rate limits (retrying batches that are
+throttled anyway), and upserts them in bulk into the store AiSearchPlugin
+searches (VECTOR_STORE: Azure AI Search or the local store). Chunk ids
+are hashes of their content, so a re-run only embeds chunks whose text
+changed and deletes the ones that disappeared.
+
+Usage (from the src directory):
+    python ingest.py
+    python ingest.py data/employee_handbook.pdf --chunk-tokens 400 --overlap-tokens 60
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import time
+from collections import namedtuple
+from pathlib import Path
+
+import openai
+from dotenv import load_dotenv
+from pypdf import PdfReader
+
+from history_reducer import count_tokens
+from models.employee_handbook_model import EmployeeHandbookModel
+from plugins.local_vector_store import LocalVectorCollection
+
+load_dotenv(override=True)
+
+DEFAULT_PDF = Path(__file__).parent / "data" / "employee_handbook.pdf"
+# Chunk ids stored by earlier runs, by store, collection and source file, so chunks that disappear can be deleted
+INGEST_MANIFEST_PATH = os.environ.get("INGEST_MANIFEST_PATH", str(Path(__file__).parent / "data" / "ingest_manifest.json"))
+# Limits of the embedding deployment, as set in Azure AI Foundry
+EMBEDDING_REQUESTS_PER_MINUTE = int(os.environ.get("EMBEDDING_REQUESTS_PER_MINUTE", "300"))
+EMBEDDING_TOKENS_PER_MINUTE = int(os.environ.get("EMBEDDING_TOKENS_PER_MINUTE", "120000"))
+# Further tries for an embedding batch that was throttled or hit a transient error
+EMBEDDING_RETRIES = int(os.environ.get("EMBEDDING_RETRIES", "5"))
+# First retry waits about this long, unless the service says how long; every further retry doubles it
+EMBEDDING_BACKOFF_SECONDS = 1.0
+
+# Statuses worth another try: request timeout, rate limiting and transient server errors
+RETRY_STATUSES = {408, 429, 500, 502, 503, 504}
+
+# pages are 1-based; id is the hash of the text
+Chunk = namedtuple("Chunk", ["id", "text", "first_page", "last_page", "tokens"])
+
+
+def iter_pages(path):
+    """Yield (page number, text) one page at a time; pypdf only parses a page when it is read."""
+    reader = PdfReader(path)
+    for number, page in enumerate(reader.pages, start=1):
+        yield number, page.extract_text() or ""
+
+
+def split_sentences(text):
+    text = re.sub(r"\s+", " ", text).strip()
+    # Not after list numbers such as "1.", which start an item rather than end a sentence
+    return [sentence for sentence in re.split(r"(?<=[^\d\s][.!?])\s+(?=[A-Z0-9\"'(•-])", text) if sentence]
+
+
+def _pieces(sentence, max_tokens, piece_tokens):
+    """
+    A sentence, or if it alone is longer than a chunk (e.g. a long list
+    without full stops), runs of its words of at most `piece_tokens`
+    tokens, so chunks still fill up and overlap.
+    """
+    if count_tokens(sentence) <= max_tokens:
+        yield sentence
+        return
+    words, piece = sentence.split(" "), []
+    for word in words:
+        if piece and count_tokens(" ".join(piece + [word])) > piece_tokens:
+            yield " ".join(piece)
+            piece = []
+        piece.append(word)
+    if piece:
+        yield " ".join(piece)
+
+
+def chunk_pages(pages, max_tokens=512, overlap_tokens=64):
+    """
+    Group the sentences of a stream of (page number, text) into chunks of at most `max_tokens` tokens.
+
+    Each chunk starts with the last sentences of the one before, about
+    `overlap_tokens` tokens of them, so a passage cut at a chunk boundary is
+    still whole in one of the two. Only one chunk's worth of text is held at
+    a time.
+    """
+    window = []  # (sentence, tokens, page)
+    fresh = 0  # sentences in the window not already in a previous chunk
+
+    def emit():
+        text = " ".join(sentence for sentence, _, _ in window)
+        return Chunk(
+            id=hashlib.sha256(text.encode()).hexdigest()[:32],
+            text=text,
+            first_page=window[0][2],
+            last_page=window[-1][2],
+            tokens=sum(tokens for _, tokens, _ in window),
+        )
+
+    piece_tokens = max(min(max_tokens // 4, overlap_tokens or max_tokens), 1)
+    for page, text in pages:
+        for sentence in split_sentences(text):
+            for piece in _pieces(sentence, max_tokens, piece_tokens):
+                tokens = count_tokens(piece)
+                if fresh and sum(t for _, t, _ in window) + tokens > max_tokens:
+                    yield emit()
+                    overlap = []
+                    for item in reversed(window):
+                        if sum(t for _, t, _ in overlap) + item[1] > overlap_tokens or item[1] + tokens > max_tokens:
+                            break
+                        overlap.insert(0, item)
+                    window, fresh = overlap, 0
+                window.append((piece, tokens, page))
+                fresh += 1
+    if fresh:
+        yield emit()
+
+
+class RateLimiter:
+    """Token buckets for requests and tokens per minute; acquire() waits until both have room."""
+
+    def __init__(self, requests_per_minute, tokens_per_minute):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self._requests = float(requests_per_minute)
+        self._tokens = float(tokens_per_minute)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited = 0.0
+
+    async def acquire(self, tokens):
+        # A request larger than the whole budget waits for a full bucket
+        tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                elapsed, self._updated = now - self._updated, now
+                self._requests = min(self.requests_per_minute, self._requests + elapsed * self.requests_per_minute / 60)
+                self._tokens = min(self.tokens_per_minute, self._tokens + elapsed * self.tokens_per_minute / 60)
+                if self._requests >= 1 and self._tokens >= tokens:
+                    self._requests -= 1
+                    self._tokens -= tokens
+                    return
+                wait = max(
+                    (1 - self._requests) * 60 / self.requests_per_minute,
+                    (tokens - self._tokens) * 60 / self.tokens_per_minute,
+                )
+                self.waited += wait
+                await asyncio.sleep(wait)
+
+
+def transient_error(error):
+    """The OpenAI error behind a failed embedding call (SK wraps it) if another try may succeed, else None."""
+    while error is not None:
+        if isinstance(error, openai.APIConnectionError):
+            return error
+        if isinstance(error, openai.APIStatusError):
+            return error if error.status_code in RETRY_STATUSES else None
+        error = error.__cause__
+    return None
+
+
+async def embed_chunks(service, chunks, batch_size=16, concurrency=4, limiter=None, retries=EMBEDDING_RETRIES):
+    """
+    Embeddings of the chunks, in order, from batches of `batch_size` sent up to `concurrency` at a time.
+
+    A batch that is throttled or hits a transient error is retried up to
+    `retries` times with exponential backoff and jitter, honouring
+    Retry-After; other errors, and the last failure, are raised. Returns
+    the vectors, the number of requests and how many of them were retries.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    batches = [chunks[start:start + batch_size] for start in range(0, len(chunks), batch_size)]
+    retried = 0
+
+    async def embed(batch):
+        nonlocal retried
+        async with semaphore:
+            for attempt in range(retries + 1):
+                if limiter is not None:
+                    await limiter.acquire(sum(chunk.tokens for chunk in batch))
+                try:
+                    return await service.generate_embeddings([chunk.text for chunk in batch])
+                except Exception as e:
+                    error = transient_error(e)
+                    if error is None or attempt == retries:
+                        raise
+                    delay = EMBEDDING_BACKOFF_SECONDS * 2 ** attempt * (0.5 + random.random())
+                    response = getattr(error, "response", None)
+                    retry_after = response.headers.get("Retry-After", "") if response is not None else ""
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+                    print(f"Embedding batch of {len(batch)} chunks failed ({error}), retrying in {delay:.1f}s")
+                    retried += 1
+                    await asyncio.sleep(delay)
+
+    results = await asyncio.gather(*(embed(batch) for batch in batches))
+    return [vector for vectors in results for vector in vectors], len(batches) + retried, retried
+
+
+def store_identity(collection):
+    """Where the collection's records are kept: the local directory, or the Azure AI Search endpoint and index."""
+    if isinstance(collection, LocalVectorCollection):
+        return f"local:{os.path.abspath(collection.path)}"
+    return f"azure:{os.environ.get('AZURE_AI_SEARCH_ENDPOINT', '')}/{collection.collection_name}"
+
+
+def load_manifest(path):
+    try:
+        with open(path) as manifest:
+            return json.load(manifest)
+    except FileNotFoundError:
+        return {}
+
+
+def save_manifest(path, manifest):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path + ".tmp", "w") as out:
+        json.dump(manifest, out, indent=1)
+    os.replace(path + ".tmp", path)
+
+
+async def ingest(pdf_path, collection, service, chunk_tokens=512, overlap_tokens=64, batch_size=16, concurrency=4,
+                 upsert_batch=500, limiter=None, manifest_path=INGEST_MANIFEST_PATH, title=None):
+    """Bring the collection up to date with the PDF; returns counts and timings of what was done."""
+    start = time.perf_counter()
+    filename = Path(pdf_path).name
+    title = title or Path(pdf_path).stem.replace("_", " ").title()
+    chunks = list(chunk_pages(iter_pages(pdf_path), chunk_tokens, overlap_tokens))
+    # The same text can occur twice (e.g. a repeated disclaimer); one record is enough
+    chunks = list({chunk.id: chunk for chunk in chunks}.values())
+    manifest_key = f"{store_identity(collection)}:{filename}"
+    manifest = load_manifest(manifest_path)
+    await collection.ensure_collection_exists()
+    # The store itself says which chunks it has, so a recreated index or emptied directory is filled again.
+    # A PDF without text (e.g. scanned pages) has no chunks to look up, and SK's get needs at least one key.
+    found = []
+    if chunks:
+        found = await collection.get([chunk.id for chunk in chunks], include_vectors=False) or []
+    stored = {record.id for record in (found if isinstance(found, list) else [found])}
+    new = [chunk for chunk in chunks if chunk.id not in stored]
+    # Chunks of earlier versions of the PDF are only known from the manifest
+    stale = sorted(set(manifest.get(manifest_key, ())) - {chunk.id for chunk in chunks})
+    parsed = time.perf_counter()
+
+    vectors, requests, retries = await embed_chunks(service, new, batch_size, concurrency, limiter) if new else ([], 0, 0)
+    embedded = time.perf_counter()
+
+    records = [
+        EmployeeHandbookModel.model_validate({
+            "id": chunk.id,
+            "content": chunk.text,
+            "title": title,
+            "url": "",
+            "filepath": filename,
+            "meta_json_string": json.dumps({
+                "first_page": chunk.first_page, "last_page": chunk.last_page, "tokens": chunk.tokens,
+            }),
+            "contentVector": [float(value) for value in vector],
+        })
+        for chunk, vector in zip(new, vectors)
+    ]
+    for offset in range(0, len(records), upsert_batch):
+        await collection.upsert(records[offset:offset + upsert_batch])
+    if stale:
+        await collection.delete(stale)
+    manifest[manifest_key] = [chunk.id for chunk in chunks]
+    save_manifest(manifest_path, manifest)
+    return {
+        "chunks": len(chunks),
+        "embedded": len(new),
+        "unchanged": len(chunks) - len(new),
+        "deleted": len(stale),
+        "embedding_requests": requests,
+        "embedding_retries": retries,
+        "rate_limit_wait": limiter.waited if limiter is not None else 0.0,
+        "parse_seconds": parsed - start,
+        "embed_seconds": embedded - parsed,
+        "upsert_seconds": time.perf_counter() - embedded,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("pdf", nargs="?", type=Path, default=DEFAULT_PDF)
+    parser.add_argument("--chunk-tokens", type=int, default=512)
+    parser.add_argument("--overlap-tokens", type=int, default=64)
+    parser.add_argument("--batch-size", type=int, default=16, help="chunks per embedding request")
+    parser.add_argument("--concurrency", type=int, default=4, help="embedding requests in flight")
+    args = parser.parse_args()
+
+    from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
+
+    from event_loop import run_async
+    from plugins.ai_search_plugin import HANDBOOK_COLLECTION_NAME, create_vector_store
+
+    collection = create_vector_store().get_collection(
+        collection_name=HANDBOOK_COLLECTION_NAME, record_type=EmployeeHandbookModel
+    )
+    limiter = RateLimiter(EMBEDDING_REQUESTS_PER_MINUTE, EMBEDDING_TOKENS_PER_MINUTE)
+    result = run_async(ingest(
+        args.pdf, collection, AzureTextEmbedding(), args.chunk_tokens, args.overlap_tokens,
+        args.batch_size, args.concurrency, limiter=limiter,
+    ))
+    print(f"Ingested {args.pdf} into '{HANDBOOK_COLLECTION_NAME}':")
+    for name, value in result.items():
+        print(f"  {name}: {value:.2f}" if isinstance(value, float) else f"  {name}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -28,7 +28,7 @@ from semantic_kernel.data.vector import (
 @dataclass
 class EmployeeHandbookModel(BaseModel):
     id: Annotated[str, VectorStoreField(FieldTypes.KEY)]
-    content: Annotated[str, VectorStoreField(FieldTypes.DATA)]
+    content: Annotated[str, VectorStoreField(FieldTypes.DATA, is_full_text_indexed=True)]
     title: Annotated[str, VectorStoreField(FieldTypes.DATA)]
     url: Annotated[str, VectorStoreField(FieldTypes.DATA)]
     filepath: Annotated[str, VectorStoreField(FieldTypes.DATA)]
@@ -1,17 +1,104 @@
+import asyncio
 import os
 import sys
+import threading
+import time
+from pathlib import Path
 from typing import TypedDict, Annotated
 from semantic_kernel.functions import kernel_function
 from semantic_kernel.connectors.azure_ai_search import AzureAISearchCollection, AzureAISearchStore, AzureAISearchSettings
 from semantic_kernel.connectors.ai.open_ai import AzureTextEmbedding
-from semantic_kernel.data.vector import VectorSearchOptions
+from semantic_kernel.data.vector import VectorSearchOptions, VectorSearchResult
 from semantic_kernel import Kernel
 
 from models.employee_handbook_model import EmployeeHandbookModel
+from plugins.embedding_batcher import EmbeddingBatcher
+from plugins.embedding_cache import EmbeddingCache
+from plugins.hybrid_search import Bm25Index, reciprocal_rank_fusion, rerank
+from plugins.local_vector_store import LocalVectorCollection, LocalVectorStore
+
+# "azure" searches Azure AI Search; "local" searches vectors kept in LOCAL_VECTOR_STORE_DIR, e.g. for offline runs
+VECTOR_STORE = os.environ.get("VECTOR_STORE", "azure").lower()
+LOCAL_VECTOR_STORE_DIR = os.environ.get("LOCAL_VECTOR_STORE_DIR", str(Path(__file__).parents[1] / "data" / "vector_store"))
+# "flat" scores every vector (exact); "ivf" only the LOCAL_VECTOR_IVF_PROBES groups nearest the query
+LOCAL_VECTOR_INDEX = os.environ.get("LOCAL_VECTOR_INDEX", "flat").lower()
+LOCAL_VECTOR_IVF_PROBES = int(os.environ.get("LOCAL_VECTOR_IVF_PROBES", "4"))
+HANDBOOK_COLLECTION_NAME = os.environ.get("AZURE_AI_SEARCH_INDEX_NAME", "employeehandbook")
+# "vector" searches embeddings only; "hybrid" also ranks handbook chunks by keywords and fuses the two lists, in
+# Azure AI Search's own hybrid query, or with a BM25 index kept in the plugin for the local store
+HANDBOOK_SEARCH_MODE = os.environ.get("HANDBOOK_SEARCH_MODE", "vector").lower()
+HANDBOOK_SEARCH_TOP = int(os.environ.get("HANDBOOK_SEARCH_TOP", "3"))
+# Reorder hybrid results by how fully each chunk covers the question's terms
+HANDBOOK_SEARCH_RERANK = os.environ.get("HANDBOOK_SEARCH_RERANK", "false").lower() == "true"
+# How long the local store's keyword index is used before it is rebuilt, to pick up re-ingested chunks
+HANDBOOK_KEYWORD_INDEX_TTL_SECONDS = float(os.environ.get("HANDBOOK_KEYWORD_INDEX_TTL_SECONDS", "600"))
+
+EMBEDDING_CACHE_DIR = os.environ.get("EMBEDDING_CACHE_DIR", str(Path(__file__).parents[1] / "data" / "embedding_cache"))
+# Query embeddings kept in memory, and in the memory-mapped file that survives restarts
+EMBEDDING_CACHE_MEMORY_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_MEMORY_ENTRIES", "1024"))
+EMBEDDING_CACHE_DISK_ENTRIES = int(os.environ.get("EMBEDDING_CACHE_DISK_ENTRIES", "20000"))
+EMBEDDING_DIMENSIONS = 1536
+# How long a query embedding waits for others to share its request, and the most texts per request; "0" sends each alone
+EMBEDDING_BATCH_WAIT_SECONDS = float(os.environ.get("EMBEDDING_BATCH_WAIT_SECONDS", "0.005"))
+EMBEDDING_BATCH_MAX_SIZE = int(os.environ.get("EMBEDDING_BATCH_MAX_SIZE", "16"))
+
+# One cache per process, shared by every AiSearchPlugin
+_embedding_cache = None
+_embedding_cache_lock = threading.Lock()
+
+def get_embedding_cache():
+    global _embedding_cache
+    if _embedding_cache is None:
+        with _embedding_cache_lock:
+            if _embedding_cache is None:
+                _embedding_cache = EmbeddingCache(
+                    EMBEDDING_CACHE_DIR,
+                    dimensions=EMBEDDING_DIMENSIONS,
+                    memory_entries=EMBEDDING_CACHE_MEMORY_ENTRIES,
+                    disk_entries=EMBEDDING_CACHE_DISK_ENTRIES,
+                )
+    return _embedding_cache
+
+# One batcher per embedding service, shared by every AiSearchPlugin and the response cache lookup in chat.py
+_embedding_batchers = {}
+_embedding_batchers_lock = threading.Lock()
+
+def get_embedding_batcher(service):
+    # Keyed by id(); the batcher keeps the service alive, so the id is not reused
+    batcher = _embedding_batchers.get(id(service))
+    if batcher is None:
+        with _embedding_batchers_lock:
+            batcher = _embedding_batchers.get(id(service))
+            if batcher is None:
+                batcher = _embedding_batchers[id(service)] = EmbeddingBatcher(
+                    service, max_wait=EMBEDDING_BATCH_WAIT_SECONDS, max_batch=EMBEDDING_BATCH_MAX_SIZE
+                )
+    return batcher
+
+async def embed_query(service, query, embedding_cache=None):
+    """Embedding of a query or prompt from the embedding cache (process-wide by default), else through the shared batcher."""
+    if embedding_cache is None:
+        embedding_cache = get_embedding_cache()
+    embedding = embedding_cache.get(service.ai_model_id, query)
+    if embedding is None:
+        embedding = await get_embedding_batcher(service).embed(query)
+        embedding_cache.put(service.ai_model_id, query, embedding)
+    return embedding
+
+def create_vector_store():
+    """The vector store the handbook lives in, as configured by VECTOR_STORE."""
+    if VECTOR_STORE == "local":
+        return LocalVectorStore(directory=LOCAL_VECTOR_STORE_DIR, index_kind=LOCAL_VECTOR_INDEX, probes=LOCAL_VECTOR_IVF_PROBES)
+    # Fails early, naming the missing settings, when the endpoint is not configured
+    AzureAISearchSettings()
+    return AzureAISearchStore(
+        api_key=os.environ.get('AZURE_AI_SEARCH_API_KEY'),
+        search_endpoint=os.environ.get('AZURE_AI_SEARCH_ENDPOINT')
+    )
 
 class AiSearchPlugin:
 
-    def __init__(self, kernel: Kernel):
+    def __init__(self, kernel: Kernel, embedding_cache=None, store=None):
         # Print environment variables directly in the plugin to verify they're accessible
         print("\n===== AI Search Plugin Environment Variables =====")
         print(f"AZURE_AI_SEARCH_ENDPOINT: {os.environ.get('AZURE_AI_SEARCH_ENDPOINT')}")
@@ -23,16 +110,26 @@ class AiSearchPlugin:
         if not kernel.get_service(type=AzureTextEmbedding):
             raise Exception("Missing AI Foundry embedding service")
         self.client = kernel.get_service(type=AzureTextEmbedding)
+        self.embedding_cache = embedding_cache if embedding_cache is not None else get_embedding_cache()
+        self.search_mode = HANDBOOK_SEARCH_MODE
+        self.top = HANDBOOK_SEARCH_TOP
+        self.rerank = HANDBOOK_SEARCH_RERANK
+        # Keyword index over every chunk in a local collection, and when it was built
+        self._keyword_index = None
+        self._keyword_index_built = 0.0
+        self._keyword_index_lock = asyncio.Lock()
         
+        if store is not None or VECTOR_STORE == "local":
+            self.store = store if store is not None else create_vector_store()
+            print(f"✅ Using {type(self.store).__name__}")
+            return
+
         # Initialize the AI Search store
         print("Initializing AzureAISearchStore...")
         try:
             self.settings = AzureAISearchSettings()
             print(f"✅ AI Search settings loaded. Endpoint: {self.settings.endpoint}")
-            self.store = AzureAISearchStore(
-                api_key=os.environ.get('AZURE_AI_SEARCH_API_KEY'),
-                search_endpoint=os.environ.get('AZURE_AI_SEARCH_ENDPOINT')
-            )
+            self.store = create_vector_store()
             print("✅ AzureAISearchStore initialized successfully")
         except Exception as e:
             print(f"❌ Failed to initialize AzureAISearchStore: {str(e)}")
@@ -42,14 +139,83 @@ class AiSearchPlugin:
     async def generate_vector(self,query: str) :
         try:
             print(f"Generating embedding for query: '{query}'")
-            response = await self.client.generate_embeddings([query])
-            embedding = response[0]
-            print(f"✅ Embedding generated successfully. Dimensions: {len(embedding)}")
+            embedding = await embed_query(self.client, query, self.embedding_cache)
+            print(f"✅ Embedding ready (cache hit rate {self.embedding_cache.hit_rate:.0%}). Dimensions: {len(embedding)}")
             return embedding
         except Exception as e:
             print(f"❌ Failed to generate embedding: {str(e)}")
             raise
 
+    def _keyword_index_stale(self):
+        return self._keyword_index is None or time.monotonic() - self._keyword_index_built > HANDBOOK_KEYWORD_INDEX_TTL_SECONDS
+
+    async def keyword_index(self, collection):
+        """BM25 index of every chunk in a local collection, built on first use and again after HANDBOOK_KEYWORD_INDEX_TTL_SECONDS."""
+        if self._keyword_index_stale():
+            async with self._keyword_index_lock:
+                # Searches that waited for the lock use the index the first one built
+                if self._keyword_index_stale():
+                    records, page = [], 1000
+                    while True:
+                        batch = await collection.get(top=page, skip=len(records), include_vectors=False) or []
+                        records.extend(batch)
+                        if len(batch) < page:
+                            break
+                    print(f"Built keyword index over {len(records)} chunks")
+                    self._keyword_index = Bm25Index((record.id, f"{record.title} {record.content}") for record in records)
+                    self._keyword_index_built = time.monotonic()
+        return self._keyword_index
+
+    async def hybrid_search(self, collection, query, query_vector):
+        """The top chunks by fusion of vector and keyword rankings, optionally reranked."""
+        candidates = max(self.top * 4, 20)
+        if not isinstance(collection, LocalVectorCollection):
+            # Azure AI Search runs the full-text and vector queries and fuses them (RRF) itself
+            search_results = await collection.hybrid_search(
+                query,
+                vector=query_vector,
+                vector_property_name="contentVector",
+                additional_property_name="content",
+                top=candidates if self.rerank else self.top,
+                include_vectors=False
+            )
+            hits = [result async for result in search_results.results]
+            if not self.rerank:
+                return hits
+            # Term weights for the reranker come from the candidates alone
+            index = Bm25Index((result.record.id, f"{result.record.title} {result.record.content}") for result in hits)
+            records = {result.record.id: result.record for result in hits}
+            fused = rerank(index, query, [(result.record.id, result.score) for result in hits])
+            return [VectorSearchResult(record=records[document_id], score=score) for document_id, score in fused[:self.top]]
+
+        search_results = await collection.search(
+            vector=query_vector,
+            vector_property_name="contentVector",
+            top=candidates,
+            include_vectors=False
+        )
+        vector_hits = [result async for result in search_results.results]
+        index = await self.keyword_index(collection)
+        keyword_hits = index.search(query, candidates)
+        fused = reciprocal_rank_fusion([
+            [result.record.id for result in vector_hits],
+            [document_id for document_id, _ in keyword_hits],
+        ])[:candidates]
+        if self.rerank:
+            fused = rerank(index, query, fused)
+        fused = fused[:self.top]
+        records = {result.record.id: result.record for result in vector_hits}
+        missing = [document_id for document_id, _ in fused if document_id not in records]
+        if missing:
+            found = await collection.get(missing, include_vectors=False) or []
+            records.update((record.id, record) for record in (found if isinstance(found, list) else [found]))
+        # A chunk deleted since the keyword index was built is left out
+        return [VectorSearchResult(record=records[document_id], score=score) for document_id, score in fused if document_id in records]
+
+    def cache_stats(self):
+        """Hit and miss counts of the query embedding cache."""
+        return self.embedding_cache.stats()
+
     @kernel_function(description="Verify Azure AI Search connection and configuration", name="verify_search_connection")
     async def verify_search_connection(self) -> str:
         """Test connectivity to Azure AI Search service and verify configuration."""
@@ -101,6 +267,7 @@ class AiSearchPlugin:
                 print(f"🔍 Found {result_count} results from test query")
                 
                 endpoint = os.environ.get('AZURE_AI_SEARCH_ENDPOINT', 'unknown')
+                stats = self.cache_stats()
                 return f"""
                 Connection successful:
                 - Azure AI Search endpoint: {endpoint}
@@ -108,6 +275,7 @@ class AiSearchPlugin:
                 - Collection '{collection_name}' exists and is accessible
                 - Generated embedding with {len(test_vector)} dimensions
                 - Test search found {result_count} results
+                - Embedding cache: {stats['hit_rate']:.0%} hit rate ({stats['memory_hits']} memory, {stats['disk_hits']} disk, {stats['misses']} misses)
                 """
             except Exception as collection_error:
                 return f"""
@@ -147,19 +315,22 @@ class AiSearchPlugin:
             record_type=EmployeeHandbookModel
         )
         
-        print(f"Executing vector search with query: '{query_str}'")
-        search_results = await collection.search(
-            vector=query_vector, 
-            vector_property_name="contentVector",  # Make sure this matches your index field name
-            top=3,  # Retrieve top 3 results
-            include_vectors=False
-        )
+        if self.search_mode == "hybrid":
+            print(f"Executing hybrid search with query: '{query_str}'")
+            result_list = await self.hybrid_search(collection, query_str, query_vector)
+        else:
+            print(f"Executing vector search with query: '{query_str}'")
+            search_results = await collection.search(
+                vector=query_vector, 
+                vector_property_name="contentVector",  # Make sure this matches your index field name
+                top=self.top,  # Retrieve the top results (3 by default)
+                include_vectors=False
+            )
+            result_list = [result async for result in search_results.results]
 
-        result_list = []
         count = 0
-        async for result in search_results.results:
+        for result in result_list:
             count += 1
-            result_list.append(result)
             print(
                 f"Result {count}: {result.record.id} (with {result.record.title}, score: {result.score})"
             )
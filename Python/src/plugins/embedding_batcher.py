@@ -0,0 +1,86 @@
+import asyncio
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+class EmbeddingBatcher:
+    """
+    Combines embedding requests that arrive close together into one call to the embedding service.
+
+    The first text waiting starts a `max_wait` seconds window; everything
+    that arrives in it, up to `max_batch` texts, goes out in a single
+    generate_embeddings call, and each caller gets its own vector back.
+    Identical texts in a batch are sent once. With the shared kernel every
+    Streamlit session's searches run on the same event loop, so concurrent
+    sessions share batches. A failed call fails every caller in its batch,
+    and a cancelled one cancels them.
+    """
+
+    def __init__(self, service, max_wait=0.005, max_batch=16):
+        self.service = service
+        self.max_wait = max_wait
+        self.max_batch = max_batch
+        # Calls made to the service and texts sent in them
+        self.batches = 0
+        self.inputs = 0
+        # Texts waiting for the next batch, per event loop: [(text, future)]
+        self._pending = {}
+        self._timers = {}
+        self._sending = set()
+
+    async def embed(self, text):
+        if self.max_wait <= 0 or self.max_batch <= 1:
+            self.batches += 1
+            self.inputs += 1
+            return (await self.service.generate_embeddings([text]))[0]
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        pending = self._pending.setdefault(loop, [])
+        pending.append((text, future))
+        if len(pending) >= self.max_batch:
+            self._flush(loop)
+        elif loop not in self._timers:
+            self._timers[loop] = loop.call_later(self.max_wait, self._flush, loop)
+        return await future
+
+    def stats(self):
+        return {
+            "batches": self.batches,
+            "inputs": self.inputs,
+            "mean_batch_size": self.inputs / self.batches if self.batches else 0.0,
+        }
+
+    def _flush(self, loop):
+        timer = self._timers.pop(loop, None)
+        if timer is not None:
+            timer.cancel()
+        batch = self._pending.pop(loop, [])
+        # Callers that gave up (e.g. a tool call timeout) need no vector
+        batch = [(text, future) for text, future in batch if not future.done()]
+        if batch:
+            task = loop.create_task(self._send(batch))
+            # Keep a reference until it is done, so the task is not garbage collected
+            self._sending.add(task)
+            task.add_done_callback(self._sending.discard)
+
+    async def _send(self, batch):
+        texts = list(dict.fromkeys(text for text, _ in batch))
+        self.batches += 1
+        self.inputs += len(texts)
+        try:
+            vectors = await self.service.generate_embeddings(texts)
+            by_text = dict(zip(texts, vectors))
+            for text, future in batch:
+                if not future.done():
+                    future.set_result(by_text[text])
+        except Exception as e:
+            logger.warning("Embedding batch of %d texts failed: %s", len(texts), e)
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+        finally:
+            # Cancelled, e.g. when the loop shuts down: callers must not wait for vectors that will never come
+            for _, future in batch:
+                if not future.done():
+                    future.cancel()
@@ -0,0 +1,160 @@
+import hashlib
+import logging
+import os
+import re
+import threading
+import unicodedata
+from collections import OrderedDict
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def normalize_text(text):
+    """Fold case, Unicode forms and whitespace, so trivially different queries share an embedding."""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFKC", text).casefold()).strip()
+
+
+def embedding_key(deployment, text):
+    return hashlib.sha256(f"{deployment}\0{normalize_text(text)}".encode()).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Cache of text embeddings: an in-memory LRU in front of a memory-mapped file.
+
+    Vectors are stored as float32 (6 KB for 1536 dimensions). The disk tier
+    is a ring of `disk_entries` rows in vectors.npy, opened with
+    numpy.memmap so only the rows that are read are paged in, plus an
+    append-only keys.log of "row key" lines; when the ring is full the
+    oldest rows are overwritten, and the last line for a row wins. A row
+    is written and flushed before its key is logged, so a crash never
+    leaves a key pointing at a half-written vector. Keys are (deployment,
+    normalized text) hashes, so switching embedding models never mixes
+    vectors.
+    """
+
+    def __init__(self, directory, dimensions=1536, memory_entries=1024, disk_entries=20000):
+        self.directory = directory
+        self.dimensions = dimensions
+        self.memory_entries = memory_entries
+        self.disk_entries = disk_entries
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        os.makedirs(directory, exist_ok=True)
+        vectors_path = os.path.join(directory, "vectors.npy")
+        self._keys_path = os.path.join(directory, "keys.log")
+        self._vectors = None
+        if os.path.exists(vectors_path):
+            vectors = np.load(vectors_path, mmap_mode="r+")
+            if vectors.shape == (disk_entries, dimensions) and vectors.dtype == np.float32:
+                self._vectors = vectors
+            else:
+                logger.warning("Embedding cache at %s has shape %s; starting a new one", directory, vectors.shape)
+        if self._vectors is None:
+            self._vectors = np.lib.format.open_memmap(
+                vectors_path, mode="w+", dtype=np.float32, shape=(disk_entries, dimensions)
+            )
+            open(self._keys_path, "w").close()
+        self._slots, self._owners, self._next_slot, lines = self._load_keys()
+        # Rewrite the log once it holds more overwritten entries than live ones
+        if lines > 2 * max(len(self._slots), 1):
+            self._compact()
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    @property
+    def hit_rate(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def get(self, deployment, text):
+        """Return the cached float32 embedding of a text, or None."""
+        key = embedding_key(deployment, text)
+        with self._lock:
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self.memory_hits += 1
+                return vector
+            slot = self._slots.get(key)
+            if slot is not None:
+                vector = np.array(self._vectors[slot])
+                self._remember(key, vector)
+                self.disk_hits += 1
+                return vector
+            self.misses += 1
+            return None
+
+    def put(self, deployment, text, embedding):
+        vector = np.asarray(embedding, dtype=np.float32)
+        if vector.shape != (self.dimensions,):
+            # Another embedding size (a different model); keep it in memory only
+            logger.warning("Not persisting a %s embedding in a %d-dimension cache", vector.shape, self.dimensions)
+            with self._lock:
+                self._remember(embedding_key(deployment, text), vector)
+            return
+        key = embedding_key(deployment, text)
+        with self._lock:
+            self._remember(key, vector)
+            if key in self._slots:
+                return
+            slot = self._next_slot
+            self._vectors[slot] = vector
+            self._vectors.flush()
+            with open(self._keys_path, "a") as keys:
+                keys.write(f"{slot} {key}\n")
+            self._assign(slot, key)
+            self._next_slot = (slot + 1) % self.disk_entries
+
+    def stats(self):
+        return {
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._slots),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+        }
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        if len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _assign(self, slot, key, slots=None, owners=None):
+        slots = self._slots if slots is None else slots
+        owners = self._owners if owners is None else owners
+        # Whatever key had the row before no longer has a vector
+        previous = owners.get(slot)
+        if previous is not None:
+            del slots[previous]
+        slots[key] = slot
+        owners[slot] = key
+
+    def _load_keys(self):
+        slots, owners = {}, {}
+        next_slot = lines = 0
+        with open(self._keys_path) as keys:
+            for line in keys:
+                slot, _, key = line.strip().partition(" ")
+                if not key or not slot.isdigit() or int(slot) >= self.disk_entries:
+                    continue
+                self._assign(int(slot), key, slots, owners)
+                next_slot = (int(slot) + 1) % self.disk_entries
+                lines += 1
+        return slots, owners, next_slot, lines
+
+    def _compact(self):
+        # Oldest row first, so the last line still tells where the next vector goes
+        ordered = sorted(self._owners.items(), key=lambda item: (item[0] - self._next_slot) % self.disk_entries)
+        with open(self._keys_path + ".tmp", "w") as keys:
+            keys.writelines(f"{slot} {key}\n" for slot, key in ordered)
+        os.replace(self._keys_path + ".tmp", self._keys_path)
@@ -0,0 +1,106 @@
+import logging
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+_SCHEMA = """CREATE TABLE IF NOT EXISTS geocodes (
+    key TEXT PRIMARY KEY,
+    lat TEXT,
+    lon TEXT,
+    created REAL NOT NULL
+)"""
+
+# Returned by GeocodeCache.get when a location is not cached at all, as opposed to cached as not found (None)
+MISSING = object()
+
+
+def normalize_location(location):
+    """Fold case, Unicode forms, punctuation and spacing, so "  seattle,WA " and "Seattle, WA" share a key."""
+    text = unicodedata.normalize("NFKC", location).casefold()
+    text = re.sub(r"[^\w,]+", " ", text)
+    return re.sub(r"\s*,\s*", ", ", re.sub(r"\s+", " ", text)).strip(" ,")
+
+
+class GeocodeCache:
+    """
+    Cache of geocoding results: an in-memory LRU in front of a SQLite file.
+
+    Found positions are kept for `ttl` seconds; locations the API did not
+    find are cached too, for `negative_ttl` seconds, so misspellings are
+    not looked up again on every call but a new place is not hidden for
+    long. Counters record how many lookups each tier answered.
+    """
+
+    def __init__(self, path, max_entries=1024, ttl=30 * 86400.0, negative_ttl=3600.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.execute(_SCHEMA)
+
+    @property
+    def hits(self):
+        return self.memory_hits + self.disk_hits
+
+    def get(self, location):
+        """Return the cached (lat, lon) for a location, None if it is cached as not found, or MISSING."""
+        key = normalize_location(location)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and not self._expired(entry, now):
+                self._entries.move_to_end(key)
+                self.memory_hits += 1
+                return entry[0]
+            row = self._connection.execute("SELECT lat, lon, created FROM geocodes WHERE key = ?", (key,)).fetchone()
+            if row is not None:
+                entry = ((row[0], row[1]) if row[0] is not None else None, row[2])
+                if not self._expired(entry, now):
+                    self._remember(key, entry)
+                    self.disk_hits += 1
+                    return entry[0]
+            self.misses += 1
+            return MISSING
+
+    def put(self, location, position):
+        """Cache a (lat, lon) pair, or None for a location that was not found."""
+        key = normalize_location(location)
+        entry = (position, time.time())
+        lat, lon = position if position is not None else (None, None)
+        with self._lock:
+            self._connection.execute("INSERT OR REPLACE INTO geocodes VALUES (?, ?, ?, ?)", (key, lat, lon, entry[1]))
+            self._remember(key, entry)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+    def close(self):
+        self._connection.close()
+
+    def _expired(self, entry, now):
+        position, created = entry
+        return now - created > (self.ttl if position is not None else self.negative_ttl)
+
+    def _remember(self, key, entry):
+        self._entries[key] = entry
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
@@ -1,20 +1,66 @@
 from typing import TypedDict, Annotated, Optional  
-import requests  
-import asyncio  
+import asyncio
+import threading
+from pathlib import Path
 from semantic_kernel.functions import kernel_function
 import os
 from dotenv import load_dotenv
 
+from plugins.geo_cache import MISSING, GeocodeCache
+from plugins.http_client import get_json
+
 load_dotenv(override=True)
 
+GEOCODING_API_URL = os.environ.get("GEOCODING_API_URL", "https://geocode.maps.co/search")
+GEOCODE_CACHE_PATH = os.environ.get("GEOCODE_CACHE_PATH", str(Path(__file__).parents[1] / "data" / "geocode_cache.db"))
+# How long places that were not found stay cached as not found
+GEOCODE_NEGATIVE_TTL_SECONDS = float(os.environ.get("GEOCODE_NEGATIVE_TTL_SECONDS", "3600"))
+
+# One cache per process, shared by every GeoPlugin
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_geocode_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = GeocodeCache(GEOCODE_CACHE_PATH, negative_ttl=GEOCODE_NEGATIVE_TTL_SECONDS)
+    return _cache
+
 class GeoPlugin:  
 
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else get_geocode_cache()
+        # Calls to the rate-limited geocoding API, i.e. cache misses that went upstream
+        self.upstream_calls = 0
+
     @kernel_function(description="Gets the latitude and longitude for a location.")
     async def get_latitude_longitude(self, location:Annotated[str, "The name of the location"]):  
         print(f"lat/long request location: {location}")
-        url = f"https://geocode.maps.co/search?q={location}&api_key={os.getenv('GEOCODING_API_KEY')}"  
-        response = requests.get(url) 
-        data = response.json() 
-        position = data[0]
-        return f"Latitude: {position['lat']}, Longitude: {position['lon']}"
-    
\ No newline at end of file
+        position = await self.geocode(location)
+        if position is None:
+            return f"No location found for '{location}'."
+        return f"Latitude: {position[0]}, Longitude: {position[1]}"
+
+    async def geocode(self, location):
+        """Return (lat, lon) for a location, or None if it was not found, from the cache when possible."""
+        position = self.cache.get(location)
+        if position is not MISSING:
+            return position
+        self.upstream_calls += 1
+        data = await get_json(GEOCODING_API_URL, params={"q": location, "api_key": os.getenv('GEOCODING_API_KEY') or ""})
+        position = (data[0]['lat'], data[0]['lon']) if data else None
+        self.cache.put(location, position)
+        return position
+
+    async def prewarm(self, locations, concurrency=4):
+        """Geocode locations that are not cached yet, e.g. the office cities, a few at a time."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def warm(location):
+            async with semaphore:
+                await self.geocode(location)
+
+        await asyncio.gather(*(warm(location) for location in locations if location.strip()))
+    
@@ -0,0 +1,90 @@
+import asyncio
+import logging
+import os
+import random
+
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# Limits for the plugins' calls to outside APIs
+TOOL_HTTP_TIMEOUT_SECONDS = float(os.environ.get("TOOL_HTTP_TIMEOUT_SECONDS", "10"))
+TOOL_HTTP_RETRIES = int(os.environ.get("TOOL_HTTP_RETRIES", "3"))
+TOOL_HTTP_POOL_SIZE = int(os.environ.get("TOOL_HTTP_POOL_SIZE", "20"))
+# First retry waits about this long; every further retry doubles it
+TOOL_HTTP_BACKOFF_SECONDS = 0.5
+
+# Statuses worth another try: rate limiting and transient server errors
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# One session per event loop, since a session is bound to the loop that created it
+_sessions = {}
+# Closes of sessions whose loop has gone, kept referenced until they finish
+_closing = set()
+
+
+def get_session():
+    """
+    Return the aiohttp session shared by the plugins, creating it on first use.
+
+    The session pools connections (keep-alive, cached DNS) and is bound to
+    the event loop that created it; normally that is event_loop's
+    persistent loop, and another session is only made for code running on
+    another one. Sessions left behind by loops that have since closed are
+    closed here.
+    """
+    loop = asyncio.get_running_loop()
+    session = _sessions.get(loop)
+    if session is None or session.closed:
+        for other in [other for other in _sessions if other.is_closed()]:
+            # Their connections went with the loop, so closing only releases the connector, from any loop
+            task = loop.create_task(_sessions.pop(other).close())
+            _closing.add(task)
+            task.add_done_callback(_closing.discard)
+        session = _sessions[loop] = aiohttp.ClientSession(
+            connector=aiohttp.TCPConnector(limit=TOOL_HTTP_POOL_SIZE, ttl_dns_cache=300),
+            timeout=aiohttp.ClientTimeout(total=TOOL_HTTP_TIMEOUT_SECONDS, sock_connect=min(3, TOOL_HTTP_TIMEOUT_SECONDS)),
+            raise_for_status=False,
+        )
+    return session
+
+
+async def close_session():
+    """Close every session: those of loops still running on their own loop, the rest from this one."""
+    sessions = list(_sessions.items())
+    _sessions.clear()
+    loop = asyncio.get_running_loop()
+    for other, session in sessions:
+        if other is not loop and other.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), other))
+        else:
+            await session.close()
+
+
+async def get_json(url, params=None, retries=None):
+    """
+    GET a URL and return its JSON body.
+
+    Connection errors, timeouts and retryable statuses are retried with
+    exponential backoff and jitter (honouring Retry-After), up to `retries`
+    times; the last failure is raised as aiohttp.ClientError or
+    asyncio.TimeoutError.
+    """
+    retries = TOOL_HTTP_RETRIES if retries is None else retries
+    for attempt in range(retries + 1):
+        delay = TOOL_HTTP_BACKOFF_SECONDS * 2 ** attempt * (0.5 + random.random())
+        try:
+            async with get_session().get(url, params=params) as response:
+                if response.status in RETRY_STATUSES and attempt < retries:
+                    retry_after = response.headers.get("Retry-After", "")
+                    if retry_after.isdigit():
+                        delay = float(retry_after)
+                    logger.warning("GET %s returned %d, retrying in %.1fs", url, response.status, delay)
+                else:
+                    response.raise_for_status()
+                    return await response.json(content_type=None)
+        except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+            if attempt == retries:
+                raise
+            logger.warning("GET %s failed (%r), retrying in %.1fs", url, e, delay)
+        await asyncio.sleep(delay)
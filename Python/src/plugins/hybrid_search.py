@@ -0,0 +1,103 @@
+import math
+import re
+from collections import Counter
+
+# Words, plus terms that must stay whole to be found: e-mail addresses, phone and form numbers, hyphenated names
+TOKEN = re.compile(r"[a-z0-9]+(?:[-@.'][a-z0-9]+)*")
+STOP_WORDS = frozenset(
+    "a an and are as at be by can do does for from how i if in is it my of on or our should the their there "
+    "this to was we what when where which who why will with you your".split()
+)
+
+
+def tokenize(text):
+    return [token for token in TOKEN.findall(text.casefold()) if token not in STOP_WORDS]
+
+
+class Bm25Index:
+    """
+    Okapi BM25 keyword index over (id, text) documents, held in memory.
+
+    Catches what embeddings tend to blur: exact policy names, e-mail
+    addresses, phone and form numbers. Meant for one handbook's worth of
+    chunks; rebuild it to pick up new documents. The Work Items API has
+    its own index in workitems/search.py: that app runs on its own, and it
+    tokenizes like SQLite FTS5 and updates postings in place instead.
+    """
+
+    def __init__(self, documents, k1=1.2, b=0.75):
+        self.k1 = k1
+        self.b = b
+        self.ids = []
+        self.tokens = []
+        self.postings = {}  # term -> [(document number, term frequency)]
+        for number, (document_id, text) in enumerate(documents):
+            tokens = tokenize(text)
+            self.ids.append(document_id)
+            self.tokens.append(tokens)
+            for term, frequency in Counter(tokens).items():
+                self.postings.setdefault(term, []).append((number, frequency))
+        self.lengths = [len(tokens) for tokens in self.tokens]
+        self.average_length = sum(self.lengths) / len(self.lengths) if self.lengths else 0.0
+
+    def __len__(self):
+        return len(self.ids)
+
+    def idf(self, term):
+        matches = len(self.postings.get(term, ()))
+        return math.log(1 + (len(self.ids) - matches + 0.5) / (matches + 0.5))
+
+    def search(self, query, top=10):
+        """[(id, score)] of the `top` best matching documents, best first."""
+        scores = {}
+        for term in set(tokenize(query)):
+            idf = self.idf(term)
+            for number, frequency in self.postings.get(term, ()):
+                normalization = self.k1 * (1 - self.b + self.b * self.lengths[number] / self.average_length)
+                scores[number] = scores.get(number, 0.0) + idf * frequency * (self.k1 + 1) / (frequency + normalization)
+        best = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top]
+        return [(self.ids[number], score) for number, score in best]
+
+
+def reciprocal_rank_fusion(rankings, k=60):
+    """
+    Merge ranked id lists into one: each list adds 1 / (k + rank) to an id's score.
+
+    Only ranks are used, so lists with incomparable scores (BM25 and cosine
+    similarity) combine without any calibration.
+    """
+    scores = {}
+    for ranking in rankings:
+        for rank, document_id in enumerate(ranking, start=1):
+            scores[document_id] = scores.get(document_id, 0.0) + 1.0 / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+def rerank(index, query, candidates):
+    """
+    Reorder fused (id, score) candidates by how fully they cover the query.
+
+    A lightweight local stand-in for a cross-encoder: the IDF-weighted
+    share of query terms in the passage, plus the share of the query's
+    adjacent word pairs that appear as phrases. The fused score breaks ties.
+    """
+    terms = tokenize(query)
+    if not terms:
+        return candidates
+    weights = {term: index.idf(term) for term in terms}
+    total = sum(weights.values()) or 1.0
+    pairs = set(zip(terms, terms[1:]))
+    positions = {document_id: number for number, document_id in enumerate(index.ids)}
+
+    def coverage(document_id):
+        number = positions.get(document_id)
+        if number is None:
+            return 0.0
+        tokens = index.tokens[number]
+        present = set(tokens)
+        score = sum(weight for term, weight in weights.items() if term in present) / total
+        if pairs:
+            score += 0.5 * len(pairs & set(zip(tokens, tokens[1:]))) / len(pairs)
+        return score
+
+    return sorted(candidates, key=lambda candidate: (coverage(candidate[0]), candidate[1]), reverse=True)
@@ -0,0 +1,358 @@
+import asyncio
+import json
+import logging
+import os
+import threading
+from collections.abc import Sequence
+from typing import Any, ClassVar
+
+import numpy as np
+from pydantic import PrivateAttr
+from semantic_kernel.data.vector import (
+    DistanceFunction,
+    GetFilteredRecordOptions,
+    KernelSearchResults,
+    SearchType,
+    VectorSearch,
+    VectorSearchOptions,
+    VectorStore,
+    VectorStoreCollection,
+)
+from semantic_kernel.exceptions import VectorSearchExecutionException, VectorStoreOperationException
+
+logger = logging.getLogger(__name__)
+
+INDEX_KINDS = ("flat", "ivf")
+# Distance functions this store can rank by; DEFAULT is cosine similarity, as in Azure AI Search
+DISTANCE_FUNCTIONS = {
+    DistanceFunction.DEFAULT,
+    DistanceFunction.COSINE_SIMILARITY,
+    DistanceFunction.COSINE_DISTANCE,
+    DistanceFunction.DOT_PROD,
+}
+
+
+class IvfIndex:
+    """
+    Inverted file index: vectors are grouped around k-means centroids and a
+    search only scores the groups whose centroids are closest to the query.
+    """
+
+    def __init__(self, centroids, order, offsets):
+        self.centroids = centroids
+        # Row numbers sorted by group; group i is order[offsets[i]:offsets[i + 1]]
+        self.order = order
+        self.offsets = offsets
+
+    @classmethod
+    def build(cls, unit_vectors, lists=None, iterations=10, seed=0):
+        rows = len(unit_vectors)
+        lists = max(1, min(lists or int(np.sqrt(rows)), rows))
+        rng = np.random.default_rng(seed)
+        centroids = np.array(unit_vectors[rng.choice(rows, lists, replace=False)])
+        for _ in range(iterations):
+            assignments = np.argmax(unit_vectors @ centroids.T, axis=1)
+            for group in range(lists):
+                members = unit_vectors[assignments == group]
+                if len(members):
+                    centroid = members.sum(axis=0)
+                    centroids[group] = centroid / (np.linalg.norm(centroid) or 1.0)
+        assignments = np.argmax(unit_vectors @ centroids.T, axis=1)
+        order = np.argsort(assignments, kind="stable")
+        offsets = np.searchsorted(assignments[order], np.arange(lists + 1))
+        return cls(centroids.astype(np.float32), order, offsets)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            return cls(data["centroids"], data["order"], data["offsets"])
+
+    def save(self, path):
+        np.savez(path, centroids=self.centroids, order=self.order, offsets=self.offsets)
+
+    def candidates(self, unit_query, probes):
+        nearest = np.argsort(self.centroids @ unit_query)[::-1][:probes]
+        return np.concatenate([self.order[self.offsets[group]:self.offsets[group + 1]] for group in nearest])
+
+
+class LocalVectorCollection(VectorStoreCollection, VectorSearch):
+    """
+    A vector store collection kept in a local directory, searched with NumPy.
+
+    Each vector field is a float32 matrix in <field>.npy, opened memory-mapped,
+    and the other fields are one JSON line per row in records.jsonl. Search
+    ranks by cosine similarity (or dot product): "flat" scores every row,
+    which is exact; "ivf" scores only the rows in the `probes` k-means groups
+    closest to the query, trading some recall for speed on large
+    collections. Upserts and deletes rewrite the files, which suits a
+    handbook that is ingested in bulk and then only read; the IVF groups are
+    computed on the first search after a write, not once per write.
+    """
+
+    directory: str
+    index_kind: str = "flat"
+    probes: int = 4
+    supported_key_types: ClassVar[set[str] | None] = {"str", "int"}
+    supported_search_types: ClassVar[set[SearchType]] = {SearchType.VECTOR}
+
+    _records: list = PrivateAttr(default_factory=list)
+    _rows: dict = PrivateAttr(default_factory=dict)
+    _vectors: dict = PrivateAttr(default_factory=dict)
+    _inverse_norms: dict = PrivateAttr(default_factory=dict)
+    _indexes: dict = PrivateAttr(default_factory=dict)
+    _lock: Any = PrivateAttr(default_factory=threading.Lock)
+
+    def model_post_init(self, __context: object | None = None):
+        super().model_post_init(__context)
+        if self.index_kind not in INDEX_KINDS:
+            raise VectorStoreOperationException(f"Unknown index kind '{self.index_kind}'; use one of {INDEX_KINDS}")
+        self._load()
+
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.collection_name)
+
+    def _vector_path(self, field):
+        return os.path.join(self.path, f"{field.storage_name or field.name}.npy")
+
+    def _index_path(self, name):
+        return os.path.join(self.path, f"{name}.ivf.npz")
+
+    def _load(self):
+        self._records, self._rows, self._vectors, self._inverse_norms, self._indexes = [], {}, {}, {}, {}
+        records_path = os.path.join(self.path, "records.jsonl")
+        if not os.path.exists(records_path):
+            return
+        with open(records_path) as records:
+            self._records = [json.loads(line) for line in records if line.strip()]
+        self._rows = {record[self._key_field_storage_name]: row for row, record in enumerate(self._records)}
+        for field in self.definition.vector_fields:
+            name = field.storage_name or field.name
+            if not os.path.exists(self._vector_path(field)):
+                continue
+            vectors = np.load(self._vector_path(field), mmap_mode="r")
+            if len(vectors) != len(self._records):
+                logger.warning("Ignoring %s: %d vectors for %d records", self._vector_path(field), len(vectors), len(self._records))
+                continue
+            self._vectors[name] = vectors
+            norms = np.linalg.norm(vectors, axis=1)
+            self._inverse_norms[name] = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+            if self.index_kind == "ivf" and os.path.exists(self._index_path(name)):
+                self._indexes[name] = IvfIndex.load(self._index_path(name))
+
+    def _matrix(self, field, rows=None):
+        """A field's vectors as an in-memory float32 array (zeros if there are none yet)."""
+        name = field.storage_name or field.name
+        if name in self._vectors:
+            return np.array(self._vectors[name] if rows is None else self._vectors[name][rows])
+        return np.zeros((len(self._records) if rows is None else len(rows), field.dimensions or 0), dtype=np.float32)
+
+    def _write(self, records, matrices):
+        """Replace the collection's files: records without their vectors, and one matrix per vector field."""
+        os.makedirs(self.path, exist_ok=True)
+        # Windows cannot replace a file that is still mapped, so the memmaps are closed first; _load reopens them
+        self._vectors = {}
+        try:
+            for field in self.definition.vector_fields:
+                name = field.storage_name or field.name
+                np.save(self._vector_path(field) + ".tmp.npy", matrices[name])
+                os.replace(self._vector_path(field) + ".tmp.npy", self._vector_path(field))
+                if os.path.exists(self._index_path(name)):
+                    os.remove(self._index_path(name))
+            records_path = os.path.join(self.path, "records.jsonl")
+            with open(records_path + ".tmp", "w") as out:
+                out.writelines(json.dumps(record) + "\n" for record in records)
+            os.replace(records_path + ".tmp", records_path)
+        finally:
+            self._load()
+
+    def _with_vectors(self, row):
+        record = dict(self._records[row])
+        for name, vectors in self._vectors.items():
+            record[name] = vectors[row].tolist()
+        return record
+
+    async def _inner_upsert(self, records: Sequence[Any], **kwargs: Any) -> Sequence[Any]:
+        vector_names = [field.storage_name or field.name for field in self.definition.vector_fields]
+        with self._lock:
+            merged = list(self._records)
+            rows = dict(self._rows)
+            for record in records:
+                key = record[self._key_field_storage_name]
+                if key not in rows:
+                    rows[key] = len(merged)
+                    merged.append(None)
+                merged[rows[key]] = {k: v for k, v in record.items() if k not in vector_names}
+            matrices = {}
+            for field, name in zip(self.definition.vector_fields, vector_names):
+                vectors = [(rows[record[self._key_field_storage_name]], record.get(name)) for record in records]
+                dimensions = field.dimensions or next((len(vector) for _, vector in vectors if vector is not None), 0)
+                matrix = self._matrix(field)
+                if matrix.shape[1] != dimensions:
+                    matrix = np.zeros((len(self._records), dimensions), dtype=np.float32)
+                matrix = np.vstack([matrix, np.zeros((len(merged) - len(matrix), dimensions), dtype=np.float32)])
+                for row, vector in vectors:
+                    matrix[row] = vector if vector is not None else 0.0
+                matrices[name] = matrix
+            self._write(merged, matrices)
+        return [record[self._key_field_storage_name] for record in records]
+
+    async def _inner_get(
+        self, keys: Sequence[Any] | None = None, options: GetFilteredRecordOptions | None = None, **kwargs: Any
+    ) -> Sequence[Any] | None:
+        if keys:
+            return [self._with_vectors(self._rows[key]) for key in keys if key in self._rows]
+        if options is None:
+            return None
+        return [self._with_vectors(row) for row in range(len(self._records))[options.skip:options.skip + options.top]]
+
+    async def _inner_delete(self, keys: Sequence[Any], **kwargs: Any) -> None:
+        with self._lock:
+            removed = {self._rows[key] for key in keys if key in self._rows}
+            if removed:
+                kept = [row for row in range(len(self._records)) if row not in removed]
+                self._write(
+                    [self._records[row] for row in kept],
+                    {field.storage_name or field.name: self._matrix(field, kept) for field in self.definition.vector_fields},
+                )
+
+    def _serialize_dicts_to_store_models(self, records: Sequence[dict[str, Any]], **kwargs: Any) -> Sequence[Any]:
+        return records
+
+    def _deserialize_store_models_to_dicts(self, records: Sequence[Any], **kwargs: Any) -> Sequence[dict[str, Any]]:
+        return records
+
+    async def ensure_collection_exists(self, **kwargs: Any) -> None:
+        if not os.path.exists(os.path.join(self.path, "records.jsonl")):
+            with self._lock:
+                self._write([], {field.storage_name or field.name: self._matrix(field) for field in self.definition.vector_fields})
+
+    async def collection_exists(self, **kwargs: Any) -> bool:
+        return os.path.exists(os.path.join(self.path, "records.jsonl"))
+
+    async def ensure_collection_deleted(self, **kwargs: Any) -> None:
+        with self._lock:
+            for name in os.listdir(self.path) if os.path.isdir(self.path) else []:
+                os.remove(os.path.join(self.path, name))
+            if os.path.isdir(self.path):
+                os.rmdir(self.path)
+            self._load()
+
+    async def _inner_search(
+        self,
+        search_type: SearchType,
+        options: VectorSearchOptions,
+        values: Any | None = None,
+        vector: Sequence[float | int] | None = None,
+        **kwargs: Any,
+    ) -> KernelSearchResults:
+        if vector is None:
+            vector = await self._generate_vector_from_values(values, options)
+        if options.filter:
+            raise VectorSearchExecutionException("The local vector store does not support filters.")
+        field = self.definition.try_get_vector_field(options.vector_property_name)
+        if field is None:
+            raise VectorSearchExecutionException(f"Vector field '{options.vector_property_name}' not found.")
+        if field.distance_function not in DISTANCE_FUNCTIONS:
+            raise VectorSearchExecutionException(f"Distance function '{field.distance_function}' is not supported.")
+        name = field.storage_name or field.name
+        if self.index_kind == "ivf" and name in self._vectors and name not in self._indexes:
+            # k-means over the whole field takes a while, so the first search after a write builds it off the event loop
+            await asyncio.to_thread(self._ivf_index, name)
+        rows, scores = self.nearest(name, vector, options.skip + options.top, field.distance_function)
+        rows, scores = rows[options.skip:], scores[options.skip:]
+        results = [(self._with_vectors(row) if options.include_vectors else self._records[row], score)
+                   for row, score in zip(rows.tolist(), scores.tolist())]
+        return KernelSearchResults(
+            results=self._get_vector_search_results_from_results(results, options),
+            total_count=len(self._records) if options.include_total_count else None,
+        )
+
+    def nearest(self, name, vector, count, distance_function=DistanceFunction.DEFAULT):
+        """Rows of the `count` vectors closest to `vector` in field `name`, and their scores, closest first."""
+        vectors = self._vectors.get(name)
+        if vectors is None or not len(vectors) or count <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32)
+        dot_product = distance_function == DistanceFunction.DOT_PROD
+        if not dot_product:
+            query = query / (np.linalg.norm(query) or 1.0)
+        index = self._ivf_index(name) if self.index_kind == "ivf" else None
+        if index is not None:
+            candidates = index.candidates(query, self.probes)
+            # Rows in file order, so the memmap reads them sequentially
+            candidates.sort()
+            scores = vectors[candidates] @ query
+            if not dot_product:
+                scores *= self._inverse_norms[name][candidates]
+        else:
+            candidates = None
+            scores = vectors @ query
+            if not dot_product:
+                scores *= self._inverse_norms[name]
+        count = min(count, len(scores))
+        best = np.argpartition(-scores, count - 1)[:count] if count < len(scores) else np.arange(len(scores))
+        best = best[np.argsort(-scores[best], kind="stable")]
+        rows = candidates[best] if candidates is not None else best
+        scores = scores[best]
+        if distance_function == DistanceFunction.COSINE_DISTANCE:
+            scores = 1.0 - scores
+        return rows, scores
+
+    def _ivf_index(self, name):
+        """The field's IVF index; after a write it is built, and saved for the next load, by the first search."""
+        index = self._indexes.get(name)
+        if index is None:
+            with self._lock:
+                index = self._indexes.get(name)
+                if index is None:
+                    index = IvfIndex.build(self._vectors[name] * self._inverse_norms[name][:, None])
+                    index.save(self._index_path(name))
+                    self._indexes[name] = index
+        return index
+
+    def _get_record_from_result(self, result: Any) -> Any:
+        return result[0]
+
+    def _get_score_from_result(self, result: Any) -> float | None:
+        return result[1]
+
+    def _lambda_parser(self, node: Any) -> Any:
+        raise VectorSearchExecutionException("The local vector store does not support filters.")
+
+
+class LocalVectorStore(VectorStore):
+    """
+    Vector store whose collections are directories under `directory`, for offline and development runs.
+
+    Collections are loaded once and reused, so repeated get_collection calls
+    (one per search in AiSearchPlugin) do not re-read the files.
+    """
+
+    directory: str
+    index_kind: str = "flat"
+    probes: int = 4
+
+    _collections: dict = PrivateAttr(default_factory=dict)
+
+    def get_collection(self, record_type, *, definition=None, collection_name=None, embedding_generator=None, **kwargs):
+        key = (record_type, collection_name)
+        if definition is None and embedding_generator is None and not kwargs and key in self._collections:
+            return self._collections[key]
+        collection = LocalVectorCollection(
+            record_type=record_type,
+            definition=definition,
+            collection_name=collection_name,
+            embedding_generator=embedding_generator or self.embedding_generator,
+            directory=self.directory,
+            index_kind=self.index_kind,
+            probes=self.probes,
+            **kwargs,
+        )
+        self._collections[key] = collection
+        return collection
+
+    async def list_collection_names(self, **kwargs) -> Sequence[str]:
+        if not os.path.isdir(self.directory):
+            return []
+        return [name for name in os.listdir(self.directory) if os.path.exists(os.path.join(self.directory, name, "records.jsonl"))]
@@ -0,0 +1,118 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+
+logger = logging.getLogger(__name__)
+
+# Fields of an Open-Meteo response that describe the location rather than one section of data
+COMMON_FIELDS = ("latitude", "longitude", "generationtime_ms", "utc_offset_seconds", "timezone",
+                 "timezone_abbreviation", "elevation")
+
+
+class WeatherCache:
+    """
+    In-memory cache of Open-Meteo forecasts.
+
+    Coordinates are snapped to a grid of `grid` degrees (about the
+    resolution of the forecast models), so nearby requests for the same
+    city share entries, and the snapped coordinates are what is sent
+    upstream. Each section of a response (current, hourly, daily) is cached
+    on its own under (grid cell, section, variables, other parameters) and
+    expires after that section's TTL; a request only fetches the sections
+    it is missing. Concurrent requests that miss the same sections share one
+    upstream call.
+    """
+
+    def __init__(self, ttls, grid=0.1, max_entries=512):
+        self.ttls = ttls
+        self.grid = grid
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.upstream_calls = 0
+        # Requests that found an identical upstream call already in flight and waited for it
+        self.deduplicated = 0
+        self._entries = OrderedDict()
+        self._in_flight = {}
+
+    def snap(self, latitude, longitude):
+        """Return the centre of the grid cell holding a point, rounded so equal cells compare equal."""
+        return (
+            round(round(float(latitude) / self.grid) * self.grid, 6),
+            round(round(float(longitude) / self.grid) * self.grid, 6),
+        )
+
+    async def get(self, latitude, longitude, sections, params, fetch, ttl=None, scope=""):
+        """
+        Return the forecast for a point, fetching only the sections that are not cached.
+
+        sections maps a section name to its comma-separated variables, e.g.
+        {"hourly": "temperature_2m,rain"}; params are the other query
+        parameters. fetch(query) makes the upstream call and returns the
+        JSON. ttl overrides the per-section TTLs, and scope is added to the
+        keys, e.g. the date for data relative to today.
+        """
+        latitude, longitude = self.snap(latitude, longitude)
+        shared = (latitude, longitude, tuple(sorted(params.items())), scope)
+        keys = {section: (section, variables) + shared for section, variables in sections.items()}
+        now = time.monotonic()
+        found = {}
+        for section, key in keys.items():
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] > now:
+                self._entries.move_to_end(key)
+                found[section] = entry[1]
+        self.hits += len(found)
+        self.misses += len(keys) - len(found)
+
+        missing = {section: sections[section] for section in sections if section not in found}
+        if missing:
+            request_key = tuple(keys[section] for section in missing)
+            future = self._in_flight.get(request_key)
+            if future is None:
+                query = {"latitude": latitude, "longitude": longitude, **missing, **params}
+                future = asyncio.ensure_future(self._fetch(fetch, query, {s: keys[s] for s in missing}, ttl))
+                self._in_flight[request_key] = future
+                future.add_done_callback(lambda _: self._in_flight.pop(request_key, None))
+            else:
+                self.deduplicated += 1
+            # A caller that gives up must not cancel the call other callers are waiting for
+            found.update(await asyncio.shield(future))
+
+        response = {}
+        for section in sections:
+            for field in COMMON_FIELDS:
+                if field in found[section]:
+                    response.setdefault(field, found[section][field])
+        for section in sections:
+            response.update({field: value for field, value in found[section].items() if field not in COMMON_FIELDS})
+        return response
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "upstream_calls": self.upstream_calls,
+            "deduplicated": self.deduplicated,
+        }
+
+    async def _fetch(self, fetch, query, keys, ttl):
+        self.upstream_calls += 1
+        data = await fetch(query)
+        common = {field: data[field] for field in COMMON_FIELDS if field in data}
+        fetched = {}
+        now = time.monotonic()
+        for section, key in keys.items():
+            fetched[section] = {
+                **common,
+                **{field: data[field] for field in (section, f"{section}_units") if field in data},
+            }
+            self._entries[key] = (now + (ttl if ttl is not None else self.ttls[section]), fetched[section])
+            self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return fetched
@@ -1,12 +1,57 @@
 from typing import Annotated
-import requests
+import asyncio
+import datetime
 import os
+import threading
+import aiohttp
 from semantic_kernel.functions import kernel_function
 from dotenv import load_dotenv
 
+from plugins.http_client import get_json
+from plugins.weather_cache import WeatherCache
+from plugins.weather_summary import summarize_forecast
+
 load_dotenv(override=True)
 
+WEATHER_API_URL = os.environ.get("WEATHER_API_URL", "https://api.open-meteo.com/v1/forecast")
+
+# Units every request asks for
+UNITS = {"temperature_unit": "fahrenheit", "wind_speed_unit": "mph", "precipitation_unit": "inch"}
+
+# Variables requested for each section of a forecast
+CURRENT_VARIABLES = "temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,rain,showers,snowfall,weather_code,wind_speed_10m,wind_direction_10m,wind_gusts_10m"
+HOURLY_VARIABLES = "temperature_2m,relative_humidity_2m,apparent_temperature,precipitation_probability,precipitation,rain,showers,snowfall,weather_code,cloud_cover,wind_speed_10m,uv_index"
+DAILY_VARIABLES = "weather_code,temperature_2m_max,temperature_2m_min,apparent_temperature_max,apparent_temperature_min,sunrise,sunset,daylight_duration,uv_index_max,precipitation_sum,rain_sum,showers_sum,snowfall_sum,precipitation_hours,wind_speed_10m_max,wind_gusts_10m_max"
+
+# Grid the coordinates are snapped to, and how long each kind of data stays fresh
+WEATHER_GRID_DEGREES = float(os.environ.get("WEATHER_GRID_DEGREES", "0.1"))
+WEATHER_TTL_SECONDS = {
+    "current": float(os.environ.get("WEATHER_TTL_CURRENT_SECONDS", "600")),
+    "hourly": float(os.environ.get("WEATHER_TTL_HOURLY_SECONDS", "3600")),
+    "daily": float(os.environ.get("WEATHER_TTL_DAILY_SECONDS", "10800")),
+}
+# Days that are over don't change; entries for them are also keyed by today's date
+WEATHER_TTL_PAST_SECONDS = float(os.environ.get("WEATHER_TTL_PAST_SECONDS", "86400"))
+
+# One cache per process, shared by every WeatherPlugin
+_cache = None
+_cache_lock = threading.Lock()
+
+def get_weather_cache():
+    global _cache
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                _cache = WeatherCache(WEATHER_TTL_SECONDS, grid=WEATHER_GRID_DEGREES)
+    return _cache
+
+async def fetch_forecast(query):
+    return await get_json(WEATHER_API_URL, params=query)
+
 class WeatherPlugin:
+    def __init__(self, cache=None):
+        self.cache = cache if cache is not None else get_weather_cache()
+
     @kernel_function(
         name="get_future_weather_forecast",
         description="Get weather forecast for a specific location and number of days in the future"
@@ -15,14 +60,22 @@ class WeatherPlugin:
         self,
         latitude: Annotated[float, "The latitude of the location"],
         longitude: Annotated[float, "The longitude of the location"],
-        days: Annotated[int, "Number of days to forecast (1-16)"]
+        days: Annotated[int, "Number of days to forecast (1-16)"],
+        variables: Annotated[str, "Optional comma-separated variables to include, e.g. 'temperature,precipitation'; empty for all"] = "",
+        dates: Annotated[str, "Optional comma-separated dates (YYYY-MM-DD) to include; empty for all"] = "",
     ): 
         try:
-            response = requests.get(url=f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&current=temperature_2m,relative_humidity_2m,apparent_temperature,precipitation,rain,showers,snowfall,weather_code,wind_speed_10m,wind_direction_10m,wind_gusts_10m&hourly=temperature_2m,relative_humidity_2m,apparent_temperature,precipitation_probability,precipitation,rain,showers,snowfall,weather_code,cloud_cover,wind_speed_10m,uv_index&temperature_unit=fahrenheit&wind_speed_unit=mph&precipitation_unit=inch&forecast_days={days}")
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            data = await self.cache.get(
+                latitude,
+                longitude,
+                {"current": CURRENT_VARIABLES, "hourly": HOURLY_VARIABLES},
+                {**UNITS, "forecast_days": days},
+                fetch_forecast,
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             return f"Error fetching weather data: {str(e)}"
+        # Per-day aggregates instead of the raw hourly arrays, which would cost tens of thousands of tokens
+        return summarize_forecast(data, variables, dates)
         
 
     @kernel_function(
@@ -33,13 +86,24 @@ class WeatherPlugin:
         self,
         latitude: Annotated[float, "The latitude of the location"],
         longitude: Annotated[float, "The longitude of the location"],
-        daysInPast: Annotated[int, "Number of days to forecast (1-16)"]
+        daysInPast: Annotated[int, "Number of days to forecast (1-16)"],
+        variables: Annotated[str, "Optional comma-separated variables to include, e.g. 'temperature,precipitation'; empty for all"] = "",
+        dates: Annotated[str, "Optional comma-separated dates (YYYY-MM-DD) to include; empty for all"] = "",
     ): 
         try:
-            response = requests.get(url=f"https://api.open-meteo.com/v1/forecast?latitude={latitude}&longitude={longitude}&daily=weather_code,temperature_2m_max,temperature_2m_min,apparent_temperature_max,apparent_temperature_min,sunrise,sunset,daylight_duration,uv_index_max,precipitation_sum,rain_sum,showers_sum,snowfall_sum,precipitation_hours,wind_speed_10m_max,wind_gusts_10m_max&temperature_unit=fahrenheit&wind_speed_unit=mph&precipitation_unit=inch&past_days={daysInPast}")
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
+            # Only the days that are over, so the answer can be kept until tomorrow
+            data = await self.cache.get(
+                latitude,
+                longitude,
+                {"daily": DAILY_VARIABLES},
+                {**UNITS, "past_days": daysInPast, "forecast_days": 0},
+                fetch_forecast,
+                ttl=WEATHER_TTL_PAST_SECONDS,
+                scope=datetime.date.today().isoformat(),
+            )
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
             return f"Error fetching weather data: {str(e)}"
+        # A compact table instead of the raw JSON
+        return summarize_forecast(data, variables, dates)
         
     
\ No newline at end of file
@@ -0,0 +1,149 @@
+import statistics
+from collections import Counter
+
+# WMO weather interpretation codes used by Open-Meteo
+WEATHER_CODES = {
+    0: "Clear sky", 1: "Mainly clear", 2: "Partly cloudy", 3: "Overcast",
+    45: "Fog", 48: "Depositing rime fog",
+    51: "Light drizzle", 53: "Moderate drizzle", 55: "Dense drizzle",
+    56: "Light freezing drizzle", 57: "Dense freezing drizzle",
+    61: "Slight rain", 63: "Moderate rain", 65: "Heavy rain",
+    66: "Light freezing rain", 67: "Heavy freezing rain",
+    71: "Slight snowfall", 73: "Moderate snowfall", 75: "Heavy snowfall", 77: "Snow grains",
+    80: "Slight rain showers", 81: "Moderate rain showers", 82: "Violent rain showers",
+    85: "Slight snow showers", 86: "Heavy snow showers",
+    95: "Thunderstorm", 96: "Thunderstorm with slight hail", 99: "Thunderstorm with heavy hail",
+}
+
+# How a day of hourly values is reduced, by variable; anything else gets min/mean/max
+HOURLY_TOTALS = {"precipitation", "rain", "showers", "snowfall"}
+HOURLY_MAXIMUMS = {"precipitation_probability", "uv_index", "wind_gusts_10m"}
+
+
+def describe_weather_code(code):
+    code = int(code)
+    return f"{WEATHER_CODES.get(code, 'Unknown')} ({code})"
+
+
+def dominant_weather_code(codes):
+    """Most frequent code of the day; on a tie the more severe (higher) code wins."""
+    counts = Counter(int(code) for code in codes if code is not None)
+    if not counts:
+        return None
+    return max(counts, key=lambda code: (counts[code], code))
+
+
+def select_variables(names, variables):
+    """Names matching any of the comma-separated terms in `variables` (substrings, e.g. "temperature"); all if none match."""
+    terms = [term.strip().casefold().replace(" ", "_") for term in (variables or "").split(",") if term.strip()]
+    selected = [name for name in names if any(term in name for term in terms)]
+    return selected or list(names)
+
+
+def select_dates(dates):
+    return {date.strip() for date in (dates or "").split(",") if date.strip()}
+
+
+def summarize_forecast(data, variables="", dates=""):
+    """
+    Reduce an Open-Meteo response to a compact text table for the model.
+
+    Current conditions become one line, hourly data one row per day (totals
+    for precipitation, maximums for probabilities, UV and gusts, min/mean/max
+    for the rest, and the dominant weather code) and daily data one row per
+    day as it is. `variables` and `dates` (comma-separated; dates as
+    YYYY-MM-DD) narrow the output; the weather code is always kept.
+    """
+    wanted_dates = select_dates(dates)
+    lines = [
+        f"Weather for latitude {data.get('latitude')}, longitude {data.get('longitude')} "
+        f"(times in {data.get('timezone', 'GMT')})"
+    ]
+    if "current" in data:
+        lines.append(_current_line(data["current"], data.get("current_units", {}), variables))
+    if "hourly" in data:
+        lines.extend(_hourly_table(data["hourly"], data.get("hourly_units", {}), variables, wanted_dates))
+    if "daily" in data:
+        lines.extend(_daily_table(data["daily"], data.get("daily_units", {}), variables, wanted_dates))
+    return "\n".join(lines)
+
+
+def _format(value):
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{round(value, 2):g}"
+    return str(value)
+
+
+def _unit(units, name):
+    unit = units.get(name)
+    return unit if unit and unit not in ("iso8601", "unixtime", "wmo code") else ""
+
+
+def _header(name, unit):
+    return f"{name} ({unit})" if unit else name
+
+
+def _current_line(current, units, variables):
+    names = [name for name in current if name not in ("time", "interval", "weather_code")]
+    parts = [describe_weather_code(current["weather_code"])] if current.get("weather_code") is not None else []
+    parts += [f"{name} {_format(current[name])} {_unit(units, name)}".rstrip() for name in select_variables(names, variables)]
+    return f"Now ({current.get('time', '')}): " + ", ".join(parts)
+
+
+def _hourly_table(hourly, units, variables, wanted_dates):
+    names = select_variables([name for name in hourly if name not in ("time", "weather_code")], variables)
+    days = {}
+    for index, time in enumerate(hourly.get("time", [])):
+        date = time[:10]
+        if not wanted_dates or date in wanted_dates:
+            days.setdefault(date, []).append(index)
+
+    header = ["date"]
+    if "weather_code" in hourly:
+        header.append("weather")
+    for name in names:
+        if name in HOURLY_TOTALS:
+            header.append(_header(f"{name} total", _unit(units, name)))
+        elif name in HOURLY_MAXIMUMS:
+            header.append(_header(f"{name} max", _unit(units, name)))
+        else:
+            header.append(_header(f"{name} min/mean/max", _unit(units, name)))
+    rows = ["Hourly data by day:", " | ".join(header)]
+    for date, indexes in days.items():
+        row = [date]
+        if "weather_code" in hourly:
+            code = dominant_weather_code(hourly["weather_code"][i] for i in indexes)
+            row.append(describe_weather_code(code) if code is not None else "-")
+        for name in names:
+            values = [hourly[name][i] for i in indexes if hourly[name][i] is not None]
+            if not values:
+                row.append("-")
+            elif name in HOURLY_TOTALS:
+                row.append(_format(float(sum(values))))
+            elif name in HOURLY_MAXIMUMS:
+                row.append(_format(max(values)))
+            else:
+                row.append("/".join(_format(float(v)) for v in (min(values), round(statistics.fmean(values), 1), max(values))))
+        rows.append(" | ".join(row))
+    return rows
+
+
+def _daily_table(daily, units, variables, wanted_dates):
+    names = select_variables([name for name in daily if name not in ("time", "weather_code")], variables)
+    header = ["date"] + (["weather"] if "weather_code" in daily else []) + [_header(name, _unit(units, name)) for name in names]
+    rows = ["Daily data:", " | ".join(header)]
+    for index, date in enumerate(daily.get("time", [])):
+        if wanted_dates and date not in wanted_dates:
+            continue
+        row = [date]
+        if "weather_code" in daily:
+            code = daily["weather_code"][index]
+            row.append(describe_weather_code(code) if code is not None else "-")
+        for name in names:
+            value = daily[name][index]
+            # Sunrise and sunset come as full timestamps; the date is already in the first column
+            row.append(value[11:] if isinstance(value, str) and value.startswith(date) else _format(value))
+        rows.append(" | ".join(row))
+    return rows
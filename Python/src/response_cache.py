@@ -0,0 +1,236 @@
+import hashlib
+import logging
+import re
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Read-only functions whose results don't change with the time of asking; an answer is only cached if every
+# function it called is listed. Anything else (the time, the weather, work items, which the same tools also
+# create and delete, image generation) makes the answer uncacheable.
+CACHEABLE_FUNCTIONS = frozenset({
+    "get_employeehandbook_response",
+    "get_latitude_longitude",
+    "get_year_from_date",
+    "get_month_from_date",
+    "get_day_of_week",
+})
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS responses (
+        key TEXT PRIMARY KEY,
+        context TEXT NOT NULL,
+        prompt TEXT NOT NULL,
+        response TEXT NOT NULL,
+        embedding BLOB,
+        latency REAL NOT NULL,
+        created REAL NOT NULL,
+        last_used REAL NOT NULL
+    )""",
+    "CREATE INDEX IF NOT EXISTS responses_last_used ON responses (last_used)",
+)
+
+# kind is "exact" or "similar"; latency is how long the cached answer originally took
+CacheHit = namedtuple("CacheHit", ["response", "kind", "latency", "similarity"])
+
+
+def normalize_prompt(prompt):
+    """Fold case, whitespace and trailing punctuation, so trivially different phrasings share a key."""
+    return re.sub(r"\s+", " ", prompt.casefold()).strip().rstrip("?!. ")
+
+
+def fingerprint(*parts):
+    """Stable hash of the strings that make up a cache context, such as the available tools and earlier messages."""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode())
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def is_cacheable(function_names):
+    return all(name in CACHEABLE_FUNCTIONS for name in function_names)
+
+
+class ResponseCache:
+    """
+    Cache of chat answers, persisted in a SQLite file.
+
+    An answer is found again either by exact key (the normalized prompt
+    and its context) or, when the caller has an embedding of the prompt, by
+    a near-duplicate prompt in the same context whose embedding's cosine
+    similarity is at least `similarity`. Entries expire `ttl` seconds after
+    they are stored, and beyond `max_entries` the least recently used are
+    evicted.
+
+    The context is an opaque fingerprint from the caller; only prompts
+    asked in the same context can share an answer.
+    """
+
+    def __init__(self, path, ttl=86400.0, max_entries=1000, similarity=0.95):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.similarity = similarity
+        self.lookups = 0
+        self.exact_hits = 0
+        self.similar_hits = 0
+        self.skipped = 0
+        # Time the cached answers originally took, and time spent looking them up
+        self.saved_seconds = 0.0
+        self.lookup_seconds = 0.0
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        for statement in _SCHEMA:
+            self._connection.execute(statement)
+        # Prompt embeddings per context, for the near-duplicate lookup
+        self._vectors = {}
+        self._matrices = {}
+        with self._lock:
+            self._expire(time.time())
+            for key, context, blob in self._connection.execute(
+                "SELECT key, context, embedding FROM responses WHERE embedding IS NOT NULL"
+            ):
+                self._vectors.setdefault(context, {})[key] = np.frombuffer(blob, dtype=np.float32)
+
+    @property
+    def hits(self):
+        return self.exact_hits + self.similar_hits
+
+    @property
+    def hit_rate(self):
+        return self.hits / self.lookups if self.lookups else 0.0
+
+    def get(self, prompt, context):
+        """Return the cached answer to exactly this prompt in this context, or None."""
+        with self._lock:
+            row = self._load(fingerprint(normalize_prompt(prompt), context), time.time())
+        if row is None:
+            return None
+        return CacheHit(row[0], "exact", row[1], 1.0)
+
+    def get_similar(self, context, embedding):
+        """Return the cached answer to the most similar prompt in this context, or None if none is similar enough."""
+        query = _unit(embedding)
+        with self._lock:
+            vectors = self._vectors.get(context)
+            if not vectors:
+                return None
+            keys, matrix = self._matrix(context)
+            if matrix.shape[1] != query.shape[0]:
+                return None
+            scores = matrix @ query
+            best = int(np.argmax(scores))
+            if scores[best] < self.similarity:
+                return None
+            row = self._load(keys[best], time.time())
+        if row is None:
+            return None
+        return CacheHit(row[0], "similar", row[1], float(scores[best]))
+
+    def put(self, prompt, context, response, latency, embedding=None):
+        """Store an answer and the time it took to produce, evicting expired and least recently used entries."""
+        key = fingerprint(normalize_prompt(prompt), context)
+        vector = _unit(embedding) if embedding is not None else None
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (key, context, prompt, response, vector.tobytes() if vector is not None else None, latency, now, now),
+            )
+            if vector is not None:
+                self._vectors.setdefault(context, {})[key] = vector
+                self._matrices.pop(context, None)
+            self._expire(now)
+            self._evict()
+
+    def record_lookup(self, hit, seconds):
+        """Count one lookup that took `seconds` (including computing the prompt embedding, if any)."""
+        self.lookups += 1
+        self.lookup_seconds += seconds
+        if hit is None:
+            return
+        if hit.kind == "exact":
+            self.exact_hits += 1
+        else:
+            self.similar_hits += 1
+        self.saved_seconds += hit.latency
+
+    def record_skip(self):
+        """Count an answer that was not cached because it called a function outside CACHEABLE_FUNCTIONS."""
+        self.skipped += 1
+
+    def stats(self):
+        with self._lock:
+            entries = self._connection.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {
+            "entries": entries,
+            "lookups": self.lookups,
+            "exact_hits": self.exact_hits,
+            "similar_hits": self.similar_hits,
+            "hit_rate": self.hit_rate,
+            "skipped": self.skipped,
+            "saved_seconds": self.saved_seconds,
+            "lookup_seconds": self.lookup_seconds,
+        }
+
+    def clear(self):
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+            self._vectors.clear()
+            self._matrices.clear()
+
+    def close(self):
+        self._connection.close()
+
+    def _load(self, key, now):
+        row = self._connection.execute(
+            "SELECT response, latency FROM responses WHERE key = ? AND created > ?", (key, now - self.ttl)
+        ).fetchone()
+        if row is not None:
+            self._connection.execute("UPDATE responses SET last_used = ? WHERE key = ?", (now, key))
+        return row
+
+    def _matrix(self, context):
+        cached = self._matrices.get(context)
+        if cached is None:
+            vectors = self._vectors[context]
+            cached = self._matrices[context] = (list(vectors), np.stack(list(vectors.values())))
+        return cached
+
+    def _expire(self, now):
+        expired = self._connection.execute(
+            "DELETE FROM responses WHERE created <= ? RETURNING key, context", (now - self.ttl,)
+        ).fetchall()
+        self._forget(expired)
+
+    def _evict(self):
+        evicted = self._connection.execute(
+            """DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            ) RETURNING key, context""",
+            (self.max_entries,),
+        ).fetchall()
+        if evicted:
+            logger.info("Evicted %d least recently used cached responses", len(evicted))
+        self._forget(evicted)
+
+    def _forget(self, rows):
+        for key, context in rows:
+            vectors = self._vectors.get(context)
+            if vectors is not None and vectors.pop(key, None) is not None:
+                self._matrices.pop(context, None)
+                if not vectors:
+                    del self._vectors[context]
+
+
+def _unit(vector):
+    vector = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
@@ -0,0 +1,89 @@
+import asyncio
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+
+from semantic_kernel.functions import FunctionResult
+
+logger = logging.getLogger(__name__)
+
+# Tool calls of the turn being processed; tasks started for the calls inherit it
+_current_turn = contextvars.ContextVar("tool_turn", default=None)
+
+
+class ToolTurn:
+    """Concurrency limit and latency record for the tool calls of one chat turn."""
+
+    def __init__(self, max_concurrency):
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        # One dict per call: name, seconds (including any wait for a slot), waited, status
+        self.calls = []
+
+    def breakdown(self):
+        """Total seconds per tool, slowest first."""
+        totals = {}
+        for call in self.calls:
+            totals[call["name"]] = totals.get(call["name"], 0.0) + call["seconds"]
+        return dict(sorted(totals.items(), key=lambda item: item[1], reverse=True))
+
+
+class ToolScheduler:
+    """
+    Auto function invocation filter that schedules the tool calls of a chat turn.
+
+    Semantic Kernel already starts the function calls of one model response
+    together (asyncio.gather); this filter caps how many of a turn's calls
+    run at once, stops any call that takes longer than `timeout` seconds
+    (the model gets a timeout message as that call's result, and the
+    other calls carry on), and records how long each call took.
+
+    Wrap each turn in `with scheduler.turn() as tools:` to get its calls in
+    tools.calls; calls made outside a turn share one limit across the
+    process and are only logged.
+    """
+
+    def __init__(self, timeout=30.0, max_concurrency=4):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self._outside_turns = None
+
+    @contextmanager
+    def turn(self):
+        tools = ToolTurn(self.max_concurrency)
+        token = _current_turn.set(tools)
+        try:
+            yield tools
+        finally:
+            _current_turn.reset(token)
+            if tools.calls:
+                logger.info(
+                    "Tool calls this turn: %s",
+                    ", ".join(f"{call['name']} {call['seconds']:.3f}s ({call['status']})" for call in tools.calls),
+                )
+
+    async def __call__(self, context, next):
+        tools = _current_turn.get()
+        if tools is None:
+            if self._outside_turns is None:
+                self._outside_turns = ToolTurn(self.max_concurrency)
+            tools = self._outside_turns
+            # Nobody reads these; keep only the latest
+            del tools.calls[:-100]
+        name = context.function.fully_qualified_name
+        start = time.perf_counter()
+        async with tools.semaphore:
+            waited = time.perf_counter() - start
+            try:
+                await asyncio.wait_for(next(context), self.timeout)
+                # Kernel turns exceptions from the function into a result with this message
+                result = context.function_result.value if context.function_result is not None else None
+                status = "error" if str(result).startswith("An error occurred while invoking") else "ok"
+            except asyncio.TimeoutError:
+                logger.warning("Tool call %s timed out after %gs", name, self.timeout)
+                context.function_result = FunctionResult(
+                    function=context.function.metadata,
+                    value=f"The tool call {name} timed out after {self.timeout:g} seconds.",
+                )
+                status = "timeout"
+        tools.calls.append({"name": name, "seconds": time.perf_counter() - start, "waited": waited, "status": status})
@@ -1,11 +1,35 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import Body, FastAPI, Header, HTTPException, Query, Request, Response
 import pandas as pd
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from pydantic_core import to_json
+from typing import Literal, Optional
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, StreamingResponse
+from contextlib import asynccontextmanager
+import asyncio
+import logging
 import os
-import csv
+import threading
+import time
 import uvicorn
 
+from columnar import ColumnarWorkItemRepository
+from http_cache import ResponseCache, etag_matches, http_date
+from journal import MutationLog
+from loader import DEFAULT_CHUNK_SIZE, format_csv_rows, iter_row_chunks
+from repository import WorkItemRepository, WorkItemNotFoundError, DuplicateWorkItemError, BatchError, VersionConflictError
+from sqlite_store import SYNCHRONOUS, SqliteWorkItemRepository
+
+
+@asynccontextmanager
+async def lifespan(app):
+    if WARM_LOAD == "background":
+        threading.Thread(target=load_store, name="workitems-load", daemon=True).start()
+    yield
+    # Flush anything still queued in the journal before the process exits
+    if journal is not None:
+        journal.close()
 
 app = FastAPI(
     title="Work Items API",
@@ -14,6 +38,7 @@ app = FastAPI(
     servers=[
         {"url": "http://localhost:8000", "description": "Local development server"},
     ],
+    lifespan=lifespan,
 )
 class WorkItemsDTO(BaseModel):
     ID: int
@@ -23,35 +48,162 @@ class WorkItemsDTO(BaseModel):
     State: str
     Tags: str
 
+class WorkItemFieldsDTO(BaseModel):
+    """Work item with only the fields requested through `fields=` projection."""
+    ID: int
+    WorkItemType: Optional[str] = None
+    Title: Optional[str] = None
+    AssignedTo: Optional[str] = None
+    State: Optional[str] = None
+    Tags: Optional[str] = None
+
+class WorkItemPageDTO(BaseModel):
+    """One page of work items, and the cursor for the next page (null on the last page)."""
+    items: list[WorkItemFieldsDTO]
+    nextAfter: Optional[int] = None
+
+class WorkItemSearchHitDTO(BaseModel):
+    ID: int
+    Title: str
+
+class WorkItemGroupCountDTO(BaseModel):
+    """Number of items in one group; only the grouped fields are present."""
+    state: Optional[str] = None
+    type: Optional[str] = None
+    assignedTo: Optional[str] = None
+    tag: Optional[str] = None
+    count: int
+
+class WorkItemStatsDTO(BaseModel):
+    total: int
+    groups: list[WorkItemGroupCountDTO]
+
+# Work item fields mapped to the keys used in WorkItemGroupCountDTO
+STATS_KEYS = {"State": "state", "WorkItemType": "type", "AssignedTo": "assignedTo", "Tags": "tag"}
+
+class BatchItemResult(BaseModel):
+    ID: int
+    status: int
+    detail: Optional[str] = None
+    item: Optional[WorkItemsDTO] = None
+
+class BatchResult(BaseModel):
+    """Per-item outcome of a batch. Batches are atomic: either every item is applied or none is."""
+    applied: bool
+    results: list[BatchItemResult]
+
 # Get the directory where this script is located
 script_dir = os.path.dirname(os.path.abspath(__file__))
-# Construct path to workitems.csv
-csv_path = os.path.join(script_dir, "data", "workitems.csv")
-
-workitems = []
-workItemTypes = set()
-workItemStates = set()
-
-def load_work_items_from_csv(file_path):
-    if os.path.exists(file_path):
-        with open(file_path, mode='r', encoding='utf-8-sig') as file:
-            reader = csv.DictReader(file)
-            for row in reader:
-                print(row)
-                work_item = WorkItemsDTO(
-                    ID=int(row['ID']),
-                    WorkItemType=row['WorkItemType'],
-                    Title=row['Title'],
-                    AssignedTo=row['AssignedTo'],
-                    State=row['State'],
-                    Tags=row['Tags']
-                )
-                workitems.append(work_item)
-                workItemTypes.add(work_item.WorkItemType)
-                workItemStates.add(work_item.State)
-
-# Load the workitems using the absolute path
-load_work_items_from_csv(csv_path)
+# Construct path to workitems.csv; WORKITEMS_CSV points at a different seed file (CSV or NDJSON)
+csv_path = os.environ.get("WORKITEMS_CSV", os.path.join(script_dir, "data", "workitems.csv"))
+# Mutations are journaled and compacted into a snapshot; the seed CSV itself is never rewritten
+data_dir = os.environ.get("WORKITEMS_DATA_DIR", os.path.join(script_dir, "data"))
+snapshot_path = os.path.join(data_dir, "workitems.snapshot.csv")
+# WORKITEMS_FSYNC: "batch" (group commit), "always" (fsync per write) or "off"
+FSYNC = os.environ.get("WORKITEMS_FSYNC", "batch")
+# Number of journaled writes after which the log is folded into a new snapshot
+COMPACT_EVERY = int(os.environ.get("WORKITEMS_COMPACT_EVERY", "10000"))
+# WORKITEMS_WARM_LOAD: "eager" loads before the app is importable, "background" serves 503s until loaded
+WARM_LOAD = os.environ.get("WORKITEMS_WARM_LOAD", "eager")
+# Rows streamed per chunk by the loader and the export endpoint
+CHUNK_SIZE = int(os.environ.get("WORKITEMS_CHUNK_SIZE", str(DEFAULT_CHUNK_SIZE)))
+# WORKITEMS_STORAGE: "memory" keeps one model per item, "columnar" keeps compact encoded columns,
+# "sqlite" keeps the items in a SQLite database that several worker processes can share
+STORAGE = os.environ.get("WORKITEMS_STORAGE", "memory")
+SQLITE_PATH = os.environ.get("WORKITEMS_SQLITE_PATH", os.path.join(data_dir, "workitems.db"))
+# Number of uvicorn worker processes when run as a script; more than one requires the sqlite storage
+WORKERS = int(os.environ.get("WORKITEMS_WORKERS", "1"))
+# Number of serialized list/filter responses kept for reuse until the next mutation
+RESPONSE_CACHE_SIZE = int(os.environ.get("WORKITEMS_RESPONSE_CACHE_SIZE", "256"))
+
+logger = logging.getLogger(__name__)
+
+# Rows come out of the columnar and sqlite stores already validated, so skip re-validation when building DTOs
+if STORAGE == "columnar":
+    workitems = ColumnarWorkItemRepository(row_factory=WorkItemsDTO.model_construct)
+elif STORAGE == "sqlite":
+    os.makedirs(os.path.dirname(os.path.abspath(SQLITE_PATH)), exist_ok=True)
+    workitems = SqliteWorkItemRepository(SQLITE_PATH, row_factory=WorkItemsDTO.model_construct, synchronous=SYNCHRONOUS[FSYNC])
+else:
+    workitems = WorkItemRepository()
+# The sqlite store is durable by itself; the in-memory stores journal their mutations
+journal = None if STORAGE == "sqlite" else MutationLog(os.path.join(data_dir, "journal"), fsync=FSYNC)
+store_ready = threading.Event()
+response_cache = ResponseCache(RESPONSE_CACHE_SIZE)
+work_items_adapter = TypeAdapter(list[WorkItemsDTO])
+
+def iter_work_items(file_path, chunk_size=CHUNK_SIZE):
+    """Stream work items from a CSV or NDJSON file, validating one chunk of rows at a time."""
+    for chunk in iter_row_chunks(file_path, chunk_size):
+        yield from work_items_adapter.validate_python(chunk)
+
+def load_work_items(file_path, chunk_size=CHUNK_SIZE):
+    """Stream a CSV or NDJSON file into the repository."""
+    loaded = 0
+    for work_item in iter_work_items(file_path, chunk_size):
+        workitems.add(work_item)
+        loaded += 1
+    return loaded
+
+def apply_journal_record(record):
+    if record["op"] == "put":
+        workitems.put(WorkItemsDTO(**record["item"]))
+    elif record["op"] == "delete" and record["ID"] in workitems:
+        workitems.delete(record["ID"])
+    elif record["op"] == "batch":
+        for entry in record["records"]:
+            apply_journal_record(entry)
+
+def replay_journal():
+    replayed = 0
+    for record in journal.replay():
+        apply_journal_record(record)
+        replayed += 1
+    return replayed
+
+def compact_journal():
+    # The copy is taken now, in step with the log rotation; rows are serialized on the compaction thread
+    journal.compact(snapshot_path, workitems.snapshot_rows(), list(WorkItemsDTO.model_fields))
+
+async def store_call(function, *args):
+    """
+    Run function(*args) against the store.
+
+    SQLite calls can wait up to the busy timeout for another worker's write
+    lock, so they run in the threadpool rather than stalling the event loop.
+    The in-memory stores are never blocked and aren't thread-safe, so their
+    calls stay on the loop, which also keeps journal order equal to apply order.
+    """
+    if STORAGE == "sqlite":
+        return await run_in_threadpool(function, *args)
+    return function(*args)
+
+async def persist(record):
+    if journal is None:
+        return
+    # Appending happens before the first await, so the log order matches the order mutations were applied
+    await asyncio.wrap_future(journal.append(record))
+    if journal.records_since_rotation >= COMPACT_EVERY:
+        compact_journal()
+
+def load_store():
+    """Load the latest snapshot (or the seed file) and replay the journal on top of it."""
+    start = time.perf_counter()
+    if STORAGE == "sqlite":
+        # Only the first worker to start on an empty database loads the seed file
+        loaded = workitems.seed(iter_work_items(csv_path))
+        store_ready.set()
+        logger.info("Seeded %d work items into %s in %.2fs", loaded, SQLITE_PATH, time.perf_counter() - start)
+        return
+    loaded = load_work_items(snapshot_path if os.path.exists(snapshot_path) else csv_path)
+    replayed = replay_journal()
+    if replayed:
+        compact_journal()
+    store_ready.set()
+    logger.info("Loaded %d work items and replayed %d journal records in %.2fs", loaded, replayed, time.perf_counter() - start)
+
+if WARM_LOAD != "background":
+    load_store()
 
 
 app.add_middleware(
@@ -62,59 +214,356 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-@app.get("/workitems", response_model=list[WorkItemsDTO])
-async def get_all_work_items():
-    return workitems
+@app.middleware("http")
+async def wait_for_store(request: Request, call_next):
+    # During a background warm load only the docs and the OpenAPI spec are served
+    if not store_ready.is_set() and request.url.path not in ("/openapi.json", "/docs", "/redoc"):
+        return JSONResponse(status_code=503, content={"detail": "Work items are still loading"}, headers={"Retry-After": "1"})
+    return await call_next(request)
+
+# ETags are "<epoch>-<version>"; the epoch keeps them unique when versions restart with a new store
+def store_validators(version):
+    return {"ETag": f'W/"{workitems.epoch}-{version}"', "Last-Modified": http_date(workitems.last_modified)}
+
+def item_validators(id):
+    version, modified = workitems.item_version(id)
+    return {"ETag": f'"{workitems.epoch}-{version}"', "Last-Modified": http_date(modified)}
+
+def cached_json(request, build):
+    """
+    Serve a JSON body derived from the whole store.
+
+    The response carries the store's ETag, If-None-Match gets a 304, and the
+    serialized body from build() is cached per URL until the next mutation.
+    build returns (body bytes, extra headers).
+
+    The version is read once, before build(): with the sqlite store another
+    worker can commit while the body is being built, and a body cached under
+    that newer version would be served until the next mutation. Tagged with
+    the older version it is at worst rebuilt on the next request.
+    """
+    version = workitems.version
+    headers = store_validators(version)
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    key = (request.url.path, tuple(sorted(request.query_params.multi_items())))
+    cached = response_cache.get(key, version)
+    if cached is None:
+        cached = build()
+        response_cache.put(key, version, cached)
+    body, extra_headers = cached
+    return Response(content=body, media_type="application/json", headers={**headers, **extra_headers})
+
+def if_match_versions(if_match):
+    """
+    Return the item versions an If-Match header accepts, or None if any will do.
+
+    The versions are checked by the store inside the mutation itself, so the
+    check can't race with a write from another request or worker.
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    versions = set()
+    for candidate in if_match.split(","):
+        epoch, _, version = candidate.strip().removeprefix("W/").strip('"').rpartition("-")
+        if epoch == workitems.epoch and version.isdigit():
+            versions.add(int(version))
+    return versions
+
+def precondition_failed():
+    return HTTPException(status_code=412, detail="Work item has changed since it was read")
+
+# Query parameter names accepted by groupBy, mapped to work item fields
+GROUP_BY_FIELDS = {"state": "State", "type": "WorkItemType", "assignedTo": "AssignedTo", "tag": "Tags"}
+
+def build_filters(state, work_item_type, assigned_to, tag):
+    return {
+        field: value
+        for field, value in (
+            ("State", state),
+            ("WorkItemType", work_item_type),
+            ("AssignedTo", assigned_to),
+            ("Tags", tag),
+        )
+        if value is not None
+    }
+
+@app.get(
+    "/workitems",
+    response_model=WorkItemPageDTO,
+    response_model_exclude_unset=True,
+    description=(
+        "List work items ordered by ID. Use the filters to return only matching items, "
+        "`limit` and `after` to page through results (when `nextAfter` in the response is not null, "
+        "there are more items: pass it as `after` to get the next page), "
+        "and `fields` to return only the listed fields."
+    ),
+)
+async def get_all_work_items(
+    request: Request,
+    state: Optional[str] = Query(None, description="Only items in this state, e.g. New, Active, Closed"),
+    work_item_type: Optional[str] = Query(None, alias="type", description="Only items of this type, e.g. Bug, Task, User Story"),
+    assigned_to: Optional[str] = Query(None, alias="assignedTo", description="Only items assigned to this user; empty for unassigned items"),
+    tag: Optional[str] = Query(None, description="Only items carrying this tag"),
+    q: Optional[str] = Query(None, description="Case-insensitive substring to match in the title"),
+    limit: Optional[int] = Query(None, ge=1, le=1000, description="Maximum number of items to return"),
+    after: Optional[int] = Query(None, description="Return items with an ID greater than this cursor"),
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return, e.g. ID,Title,State. ID is always included"),
+):
+    filters = build_filters(state, work_item_type, assigned_to, tag)
+    include = None
+    if fields:
+        include = {field.strip() for field in fields.split(",") if field.strip()} | {"ID"}
+        unknown = include - WorkItemsDTO.model_fields.keys()
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(sorted(unknown))}")
+
+    def build():
+        page, next_after = workitems.query(filters, q=q, after=after, limit=limit)
+        body = to_json({"items": [item.model_dump(include=include) for item in page], "nextAfter": next_after})
+        return body, ({"X-Next-After": str(next_after)} if next_after is not None else {})
+
+    return await store_call(cached_json, request, build)
+
+@app.get(
+    "/workitems/stats",
+    response_model=WorkItemStatsDTO,
+    response_model_exclude_none=True,
+    description=(
+        "Count work items grouped by state, type, assignedTo and/or tag, optionally filtered. "
+        "Use this instead of listing items to answer questions like 'how many open bugs per assignee'. "
+        "When grouping or filtering by tag, an item is counted once per tag."
+    ),
+)
+async def get_work_item_stats(
+    request: Request,
+    group_by: str = Query(..., alias="groupBy", description="Comma-separated fields to group by: state, type, assignedTo, tag"),
+    state: Optional[str] = Query(None, description="Only count items in this state"),
+    work_item_type: Optional[str] = Query(None, alias="type", description="Only count items of this type"),
+    assigned_to: Optional[str] = Query(None, alias="assignedTo", description="Only count items assigned to this user; empty for unassigned items"),
+    tag: Optional[str] = Query(None, description="Only count items carrying this tag"),
+):
+    names = [name.strip() for name in group_by.split(",") if name.strip()]
+    unknown = [name for name in names if name not in GROUP_BY_FIELDS]
+    if not names or unknown:
+        raise HTTPException(status_code=400, detail=f"groupBy must list fields from: {', '.join(GROUP_BY_FIELDS)}")
+    fields = tuple(dict.fromkeys(GROUP_BY_FIELDS[name] for name in names))
+
+    def build():
+        total, groups = workitems.stats(fields, build_filters(state, work_item_type, assigned_to, tag))
+        stats = WorkItemStatsDTO(
+            total=total,
+            groups=[
+                WorkItemGroupCountDTO(count=count, **{STATS_KEYS[field]: value for field, value in zip(fields, key)})
+                for key, count in sorted(groups.items(), key=lambda group: -group[1])
+            ],
+        )
+        return stats.model_dump_json(exclude_none=True).encode(), {}
+
+    return await store_call(cached_json, request, build)
+
+@app.get(
+    "/workitems/search",
+    response_model=list[WorkItemSearchHitDTO],
+    description=(
+        "Full-text search over work item titles and tags, best match first. Returns only IDs and titles; "
+        "use this to find the items about a topic instead of listing every work item, then fetch details by ID."
+    ),
+)
+async def search_work_items(
+    request: Request,
+    q: str = Query(..., min_length=1, description="Words to search for, e.g. payments checkout"),
+    limit: int = Query(10, ge=1, le=100, description="Maximum number of results"),
+):
+    def build():
+        hits = workitems.search(q, limit)
+        return to_json([{"ID": item.ID, "Title": item.Title} for item in hits]), {}
+
+    return await store_call(cached_json, request, build)
+
+@app.get(
+    "/workitems/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {"application/x-ndjson": {}, "text/csv": {}}}},
+    description="Stream every work item as NDJSON or CSV. Rows are written as they are read, not buffered.",
+)
+async def export_work_items(format: Literal["ndjson", "csv"] = Query("ndjson", description="ndjson or csv")):
+    ids = await store_call(workitems.ids)
+    fieldnames = list(WorkItemsDTO.model_fields)
+
+    async def rows():
+        for start in range(0, len(ids), CHUNK_SIZE):
+            # Items deleted since the export started are skipped
+            chunk = await store_call(workitems.get_many, ids[start:start + CHUNK_SIZE])
+            if format == "ndjson":
+                yield "".join(item.model_dump_json() + "\n" for item in chunk)
+            else:
+                yield format_csv_rows((item.model_dump() for item in chunk), fieldnames, header=start == 0)
+            # Let other requests run between chunks
+            await asyncio.sleep(0)
+        if not ids and format == "csv":
+            yield format_csv_rows([], fieldnames, header=True)
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/csv"
+    return StreamingResponse(
+        rows(),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="workitems.{format}"'},
+    )
 
 @app.get("/workitems/{id}", response_model=WorkItemsDTO)
-async def get_work_item_by_id(id: int):
-    work_item = next((item for item in workitems if item.ID == id), None)
-    if not work_item:
+async def get_work_item_by_id(id: int, request: Request):
+    def read():
+        return workitems.get(id), item_validators(id)
+
+    try:
+        work_item, headers = await store_call(read)
+    except WorkItemNotFoundError:
         raise HTTPException(status_code=404, detail="Work item not found")
-    return work_item
+    if etag_matches(request.headers.get("If-None-Match"), headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=work_item.model_dump_json(), media_type="application/json", headers=headers)
 
 @app.post("/workitems", response_model=WorkItemsDTO, status_code=201)
-async def create_work_item(new_work_item: WorkItemsDTO):
-    workitems.append(new_work_item)
-    workItemTypes.add(new_work_item.WorkItemType)
-    workItemStates.add(new_work_item.State)
+async def create_work_item(new_work_item: WorkItemsDTO, response: Response):
+    def create():
+        workitems.add(new_work_item)
+        return item_validators(new_work_item.ID)
+
+    try:
+        response.headers.update(await store_call(create))
+    except DuplicateWorkItemError:
+        raise HTTPException(status_code=409, detail="Work item already exists")
+    await persist({"op": "put", "item": new_work_item.model_dump()})
     return new_work_item
 
-@app.put("/workitems/{id}", response_model=WorkItemsDTO)
-async def update_work_item(id: int, updated_work_item: WorkItemsDTO):
-    work_item = next((item for item in workitems if item.ID == id), None)
-    if not work_item:
+@app.put(
+    "/workitems/{id}",
+    response_model=WorkItemsDTO,
+    responses={412: {"description": "If-Match did not match the item's current ETag"}},
+)
+async def update_work_item(
+    id: int,
+    updated_work_item: WorkItemsDTO,
+    response: Response,
+    if_match: Optional[str] = Header(None, alias="If-Match", description="Only update if the item still has this ETag"),
+):
+    # Only non-empty fields are applied; the ID itself is never changed
+    changes = {
+        field: value
+        for field, value in updated_work_item.model_dump(exclude={"ID"}).items()
+        if value
+    }
+    def update():
+        work_item = workitems.update(id, changes, if_versions=if_match_versions(if_match))
+        return work_item, item_validators(id)
+
+    try:
+        work_item, headers = await store_call(update)
+    except WorkItemNotFoundError:
         raise HTTPException(status_code=404, detail="Work item not found")
-    if updated_work_item.WorkItemType:
-        work_item.WorkItemType = updated_work_item.WorkItemType
-        workItemTypes.add(updated_work_item.WorkItemType)
-    if updated_work_item.Title:
-        work_item.Title = updated_work_item.Title
-    if updated_work_item.AssignedTo:
-        work_item.AssignedTo = updated_work_item.AssignedTo
-    if updated_work_item.State:
-        work_item.State = updated_work_item.State
-        workItemStates.add(updated_work_item.State)
-    if updated_work_item.Tags:
-        work_item.Tags = updated_work_item.Tags
+    except VersionConflictError:
+        raise precondition_failed()
+    response.headers.update(headers)
+    await persist({"op": "put", "item": work_item.model_dump()})
     return work_item
 
-@app.delete("/workitems/{id}", status_code=204)
-async def delete_work_item(id: int):
-    global workitems
-    work_item = next((item for item in workitems if item.ID == id), None)
-    if not work_item:
+@app.delete(
+    "/workitems/{id}",
+    status_code=204,
+    responses={412: {"description": "If-Match did not match the item's current ETag"}},
+)
+async def delete_work_item(
+    id: int,
+    if_match: Optional[str] = Header(None, alias="If-Match", description="Only delete if the item still has this ETag"),
+):
+    def delete():
+        workitems.delete(id, if_versions=if_match_versions(if_match))
+
+    try:
+        await store_call(delete)
+    except WorkItemNotFoundError:
         raise HTTPException(status_code=404, detail="Work item not found")
-    workitems = [item for item in workitems if item.ID != id]
+    except VersionConflictError:
+        raise precondition_failed()
+    await persist({"op": "delete", "ID": id})
     return
 
+def batch_failure(ids, error, status_code, detail):
+    results = [
+        BatchItemResult(ID=id, status=status_code, detail=detail)
+        if position in error.errors
+        else BatchItemResult(ID=id, status=424, detail="Not applied because another item in the batch failed")
+        for position, id in enumerate(ids)
+    ]
+    return JSONResponse(
+        status_code=status_code,
+        content=BatchResult(applied=False, results=results).model_dump(mode="json"),
+    )
+
+@app.post(
+    "/workitems:batch",
+    response_model=BatchResult,
+    status_code=201,
+    responses={409: {"model": BatchResult, "description": "One or more IDs already exist; nothing was created"}},
+    description="Create several work items in one atomic call. Prefer this over repeated POST /workitems.",
+)
+async def create_work_items_batch(new_work_items: list[WorkItemsDTO]):
+    try:
+        created = await store_call(workitems.add_many, new_work_items)
+    except BatchError as e:
+        return batch_failure([item.ID for item in new_work_items], e, 409, "Work item already exists")
+    await persist({"op": "batch", "records": [{"op": "put", "item": item.model_dump()} for item in created]})
+    return BatchResult(
+        applied=True,
+        results=[BatchItemResult(ID=item.ID, status=201, item=item) for item in created],
+    )
+
+@app.put(
+    "/workitems:batch",
+    response_model=BatchResult,
+    responses={404: {"model": BatchResult, "description": "One or more IDs were not found; nothing was updated"}},
+    description="Update several work items in one atomic call. As with PUT /workitems/{id}, only non-empty fields are applied.",
+)
+async def update_work_items_batch(updated_work_items: list[WorkItemsDTO]):
+    updates = [
+        (item.ID, {field: value for field, value in item.model_dump(exclude={"ID"}).items() if value})
+        for item in updated_work_items
+    ]
+    try:
+        updated = await store_call(workitems.update_many, updates)
+    except BatchError as e:
+        return batch_failure([id for id, _ in updates], e, 404, "Work item not found")
+    await persist({"op": "batch", "records": [{"op": "put", "item": item.model_dump()} for item in updated]})
+    return BatchResult(
+        applied=True,
+        results=[BatchItemResult(ID=item.ID, status=200, item=item) for item in updated],
+    )
+
+@app.post(
+    "/workitems:batchDelete",
+    response_model=BatchResult,
+    responses={404: {"model": BatchResult, "description": "One or more IDs were not found; nothing was deleted"}},
+    description="Delete several work items by ID in one atomic call.",
+)
+async def delete_work_items_batch(ids: list[int] = Body(..., description="IDs of the work items to delete")):
+    try:
+        await store_call(workitems.delete_many, ids)
+    except BatchError as e:
+        return batch_failure(ids, e, 404, "Work item not found")
+    await persist({"op": "batch", "records": [{"op": "delete", "ID": id} for id in ids]})
+    return BatchResult(applied=True, results=[BatchItemResult(ID=id, status=204) for id in ids])
+
 @app.get("/workitemtypes", response_model=list[str])
 async def get_work_item_types():
-    return list(workItemTypes)
+    return await store_call(workitems.values, "WorkItemType")
 
 @app.get("/workitemstates", response_model=list[str])
 async def get_work_item_states():
-    return list(workItemStates)
+    return await store_call(workitems.values, "State")
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="127.0.0.1", port=8000)
\ No newline at end of file
+    if WORKERS > 1 and STORAGE != "sqlite":
+        raise SystemExit("WORKITEMS_WORKERS > 1 needs WORKITEMS_STORAGE=sqlite; other stores are per process")
+    # Workers import the app by name, each in its own process
+    uvicorn.run("api:app" if WORKERS > 1 else app, host="127.0.0.1", port=8000, workers=WORKERS)
\ No newline at end of file
@@ -0,0 +1,284 @@
+from collections import defaultdict
+
+import numpy as np
+
+from repository import (
+    FIELDS,
+    DuplicateWorkItemError,
+    WorkItemNotFoundError,
+    WorkItemStore,
+    split_tags,
+)
+
+# Low-cardinality fields stored as integer codes into a per-column dictionary
+CATEGORICAL_FIELDS = ("WorkItemType", "AssignedTo", "State")
+
+# Rebuild the columns once this many rows are tombstoned and they make up half the table
+_COMPACT_MIN_DEAD = 1024
+
+
+class _Column:
+    """A typed NumPy array that grows by doubling, so appends are amortised O(1)."""
+
+    def __init__(self, dtype, capacity=1024):
+        self._data = np.empty(capacity, dtype=dtype)
+        self.size = 0
+
+    @property
+    def values(self):
+        # A view of the filled part; don't keep it across appends
+        return self._data[:self.size]
+
+    def append(self, value):
+        if self.size == len(self._data):
+            grown = np.empty(len(self._data) * 2, dtype=self._data.dtype)
+            grown[:self.size] = self._data[:self.size]
+            self._data = grown
+        self._data[self.size] = value
+        self.size += 1
+
+    def __getitem__(self, row):
+        return self._data[row]
+
+    def __setitem__(self, row, value):
+        self._data[row] = value
+
+    def keep(self, mask):
+        kept = self.values[mask]
+        self._data = np.empty(max(len(kept) * 2, 1024), dtype=self._data.dtype)
+        self._data[:len(kept)] = kept
+        self.size = len(kept)
+
+
+class _Dictionary:
+    """Dictionary encoding: each distinct string is stored once and referred to by its code."""
+
+    def __init__(self):
+        self.values = []
+        self.codes = {}
+
+    def encode(self, value):
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+        return code
+
+
+class ColumnarWorkItemRepository(WorkItemStore):
+    """
+    Work item store with a columnar layout.
+
+    IDs and the dictionary-encoded categorical columns live in NumPy arrays
+    and titles in a plain list. Tags strings are dictionary-encoded as
+    written, so they read back unchanged; the individual tags are interned
+    in a separate vocabulary that only backs the tag filters. Rows are
+    turned into objects by row_factory only when they are read, so filters
+    run as vectorised array operations instead of touching per-item objects.
+
+    Deleted rows are tombstoned and the columns are rebuilt once tombstones
+    make up half the table.
+    """
+
+    def __init__(self, row_factory):
+        super().__init__()
+        self._row_factory = row_factory
+        self._ids = _Column(np.int64)
+        self._alive = _Column(np.bool_)
+        self._versions = _Column(np.int64)
+        self._modified = _Column(np.float64)
+        self._codes = {field: _Column(np.int32) for field in CATEGORICAL_FIELDS}
+        self._dictionaries = {field: _Dictionary() for field in CATEGORICAL_FIELDS}
+        self._titles = []
+        self._tags = _Column(np.int32)
+        self._tag_strings = _Dictionary()
+        self._tag_vocabulary = _Dictionary()
+        # Tags are multi-valued, so they get an inverted index (tag code -> IDs) rather than a column scan
+        self._tag_postings = defaultdict(set)
+        self._row_of = {}
+        self._dead = 0
+
+    def __len__(self):
+        return len(self._row_of)
+
+    def __contains__(self, id):
+        return id in self._row_of
+
+    def __iter__(self):
+        return (self._materialize(self._row_of[id]) for id in self.ids())
+
+    def ids(self):
+        """Return all IDs in ascending order."""
+        return np.sort(self._ids.values[self._alive.values]).tolist()
+
+    def get(self, id):
+        row = self._row_of.get(id)
+        if row is None:
+            raise WorkItemNotFoundError(id)
+        return self._materialize(row)
+
+    def item_version(self, id):
+        row = self._row_of.get(id)
+        if row is None:
+            raise WorkItemNotFoundError(id)
+        return int(self._versions[row]), float(self._modified[row])
+
+    def add(self, work_item):
+        if work_item.ID in self._row_of:
+            raise DuplicateWorkItemError(work_item.ID)
+        row = self._ids.size
+        version, modified = self._touch()
+        self._ids.append(work_item.ID)
+        self._alive.append(True)
+        self._versions.append(version)
+        self._modified.append(modified)
+        for field in CATEGORICAL_FIELDS:
+            self._codes[field].append(self._dictionaries[field].encode(getattr(work_item, field)))
+        self._titles.append(work_item.Title)
+        self._tags.append(self._encode_tags(work_item.ID, work_item.Tags))
+        self._row_of[work_item.ID] = row
+        self._track(work_item)
+        return self._materialize(row)
+
+    def put(self, work_item):
+        """Insert or replace an item, as used when replaying the journal."""
+        if work_item.ID in self._row_of:
+            return self.update(work_item.ID, {field: getattr(work_item, field) for field in FIELDS if field != "ID"})
+        return self.add(work_item)
+
+    def update(self, id, changes, if_versions=None):
+        row = self._row_of.get(id)
+        if row is None:
+            raise WorkItemNotFoundError(id)
+        self._check_version(id, if_versions)
+        self._untrack(self._materialize(row))
+        for field, value in changes.items():
+            if field in CATEGORICAL_FIELDS:
+                self._codes[field][row] = self._dictionaries[field].encode(value)
+            elif field == "Title":
+                self._titles[row] = value
+            elif field == "Tags":
+                self._drop_tags(id, self._tags[row])
+                self._tags[row] = self._encode_tags(id, value)
+        self._versions[row], self._modified[row] = self._touch()
+        work_item = self._materialize(row)
+        self._track(work_item)
+        return work_item
+
+    def delete(self, id, if_versions=None):
+        if id not in self._row_of:
+            raise WorkItemNotFoundError(id)
+        self._check_version(id, if_versions)
+        row = self._row_of.pop(id)
+        work_item = self._materialize(row)
+        self._untrack(work_item)
+        self._drop_tags(id, self._tags[row])
+        self._alive[row] = False
+        self._titles[row] = None
+        self._touch()
+        self._dead += 1
+        if self._dead >= _COMPACT_MIN_DEAD and self._dead * 2 >= self._ids.size:
+            self._compact()
+        return work_item
+
+    def ids_where(self, field, value):
+        if field == "Tags":
+            code = self._tag_vocabulary.codes.get(value)
+            return set(self._tag_postings.get(code, ()))
+        code = self._dictionaries[field].codes.get(value)
+        if code is None:
+            return set()
+        mask = self._alive.values & (self._codes[field].values == code)
+        return set(self._ids.values[mask].tolist())
+
+    def snapshot_rows(self):
+        """Return a lazy iterable of row dicts over a copy of the current columns."""
+        alive = self._alive.values.copy()
+        ids = self._ids.values.copy()
+        codes = {field: self._codes[field].values.copy() for field in CATEGORICAL_FIELDS}
+        titles = list(self._titles)
+        tags = self._tags.values.copy()
+        dictionaries = {field: list(self._dictionaries[field].values) for field in CATEGORICAL_FIELDS}
+        tag_strings = list(self._tag_strings.values)
+
+        def rows():
+            for row in np.flatnonzero(alive):
+                values = {field: dictionaries[field][codes[field][row]] for field in CATEGORICAL_FIELDS}
+                yield {
+                    "ID": int(ids[row]),
+                    "Title": titles[row],
+                    "Tags": tag_strings[tags[row]],
+                    **values,
+                }
+
+        return rows()
+
+    def query(self, filters=None, q=None, after=None, limit=None):
+        """
+        Return one page of items ordered by ID, plus the cursor for the next page.
+
+        Same contract as WorkItemRepository.query; the categorical filters are
+        evaluated as one vectorised mask over the code columns.
+        """
+        mask = self._alive.values.copy()
+        for field, value in (filters or {}).items():
+            if field == "Tags":
+                code = self._tag_vocabulary.codes.get(value)
+                rows = [self._row_of[id] for id in self._tag_postings.get(code, ())]
+                tag_mask = np.zeros_like(mask)
+                tag_mask[rows] = True
+                mask &= tag_mask
+            else:
+                code = self._dictionaries[field].codes.get(value)
+                if code is None:
+                    return [], None
+                mask &= self._codes[field].values == code
+        if after is not None:
+            mask &= self._ids.values > after
+
+        rows = np.flatnonzero(mask)
+        if q:
+            needle = q.lower()
+            rows = np.array([row for row in rows if needle in self._titles[row].lower()], dtype=np.intp)
+        rows = rows[np.argsort(self._ids.values[rows], kind="stable")]
+        page_rows = rows if limit is None else rows[:limit]
+        page = [self._materialize(row) for row in page_rows]
+        next_after = page[-1].ID if page and len(page_rows) < len(rows) else None
+        return page, next_after
+
+    def _materialize(self, row):
+        values = {
+            field: self._dictionaries[field].values[self._codes[field][row]]
+            for field in CATEGORICAL_FIELDS
+        }
+        return self._row_factory(
+            ID=int(self._ids[row]),
+            Title=self._titles[row],
+            Tags=self._tag_strings.values[self._tags[row]],
+            **values,
+        )
+
+    def _encode_tags(self, id, tags):
+        for tag in split_tags(tags):
+            self._tag_postings[self._tag_vocabulary.encode(tag)].add(id)
+        return self._tag_strings.encode(tags)
+
+    def _drop_tags(self, id, code):
+        for tag in split_tags(self._tag_strings.values[code]):
+            tag_code = self._tag_vocabulary.codes.get(tag)
+            postings = self._tag_postings.get(tag_code)
+            if postings is None:
+                continue
+            postings.discard(id)
+            if not postings:
+                del self._tag_postings[tag_code]
+
+    def _compact(self):
+        mask = self._alive.values.copy()
+        for column in (self._ids, self._versions, self._modified, self._tags, *self._codes.values()):
+            column.keep(mask)
+        self._alive.keep(mask)
+        self._titles = [title for title, alive in zip(self._titles, mask) if alive]
+        self._row_of = {int(id): row for row, id in enumerate(self._ids.values)}
+        self._dead = 0
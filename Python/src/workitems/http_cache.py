@@ -0,0 +1,60 @@
+from collections import OrderedDict
+from email.utils import formatdate
+import threading
+
+
+def http_date(timestamp):
+    """Format a POSIX timestamp as an HTTP date for Last-Modified."""
+    return formatdate(timestamp, usegmt=True)
+
+
+def etag_matches(header, etag):
+    """
+    Check an If-None-Match header value against etag.
+
+    Uses the weak comparison from RFC 9110, which is what If-None-Match
+    requires.
+    """
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(candidate.strip().removeprefix("W/") == opaque for candidate in header.split(","))
+
+
+class ResponseCache:
+    """
+    LRU cache of serialized response bodies.
+
+    Each entry remembers the store version it was built from. A lookup with
+    a different version is a miss and drops the entry, so every mutation
+    invalidates the cached responses without having to find them. Safe to
+    use from the threadpool.
+    """
+
+    def __init__(self, max_entries=256):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, version):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None or entry[0] != version:
+                if entry is not None:
+                    del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, version, value):
+        with self._lock:
+            self._entries[key] = (version, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
@@ -0,0 +1,195 @@
+import concurrent.futures
+import csv
+import glob
+import json
+import logging
+import os
+import queue
+import threading
+
+logger = logging.getLogger(__name__)
+
+FSYNC_MODES = ("always", "batch", "off")
+
+_ROTATE = object()
+_STOP = object()
+
+
+def _fsync_directory(path):
+    # Make renames/creates inside the directory durable (not supported on Windows)
+    if os.name == "nt":
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_snapshot(path, rows, fieldnames):
+    """Atomically replace the CSV snapshot at path with rows."""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, mode="w", encoding="utf-8", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fieldnames)
+        writer.writeheader()
+        writer.writerows(rows)
+        file.flush()
+        os.fsync(file.fileno())
+    os.replace(tmp_path, path)
+    _fsync_directory(os.path.dirname(os.path.abspath(path)))
+
+
+class MutationLog:
+    """
+    Append-only JSONL log of work item mutations.
+
+    Records are written by a single writer thread. In "batch" mode the thread
+    drains everything queued while the previous fsync was running and commits
+    it with one fsync (group commit); "always" fsyncs every record and "off"
+    only flushes to the OS. append() returns a future that resolves once the
+    record is durable under the chosen mode.
+
+    The log is split into numbered segments. rotate() seals the current
+    segment so compact() can fold the sealed segments into a snapshot while
+    new mutations keep going to a fresh segment.
+    """
+
+    def __init__(self, directory, fsync="batch", max_batch=1024):
+        if fsync not in FSYNC_MODES:
+            raise ValueError(f"fsync must be one of {FSYNC_MODES}, got {fsync!r}")
+        self.directory = directory
+        self.fsync = fsync
+        self.max_batch = max_batch
+        self.records_since_rotation = 0
+        os.makedirs(directory, exist_ok=True)
+
+        for path in self.segments():
+            # Segments left empty by earlier runs carry nothing to replay
+            if os.path.getsize(path) == 0:
+                os.remove(path)
+        existing = self.segments()
+        # Never append to an existing segment, its tail may be torn from a crash
+        self._segment_number = self._number(existing[-1]) + 1 if existing else 1
+        self._file = open(self._segment_path(self._segment_number), mode="a", encoding="utf-8")
+        self._queue = queue.SimpleQueue()
+        self._compacting = threading.Lock()
+        self._writer = threading.Thread(target=self._run, name="workitems-journal", daemon=True)
+        self._writer.start()
+
+    def segments(self):
+        return sorted(glob.glob(os.path.join(self.directory, "*.jsonl")), key=self._number)
+
+    def replay(self):
+        """Yield every record from the existing segments in commit order."""
+        for path in self.segments():
+            with open(path, mode="r", encoding="utf-8") as file:
+                for line_number, line in enumerate(file, start=1):
+                    try:
+                        yield json.loads(line)
+                    except json.JSONDecodeError:
+                        # Only the last line of a segment can be torn; anything after it was never acknowledged
+                        logger.warning("Ignoring torn journal record at %s:%d", path, line_number)
+                        break
+
+    def append(self, record):
+        future = concurrent.futures.Future()
+        self._queue.put((json.dumps(record, separators=(",", ":")), future))
+        self.records_since_rotation += 1
+        return future
+
+    def rotate(self):
+        """Seal the current segment and return the paths of all sealed segments."""
+        future = concurrent.futures.Future()
+        self._queue.put((_ROTATE, future))
+        self.records_since_rotation = 0
+        return future
+
+    def compact(self, snapshot_path, rows, fieldnames):
+        """
+        Fold the log into a new snapshot in a background thread.
+
+        rows is an iterable of dicts that must reflect every mutation appended
+        so far. It is consumed on the background thread, so callers pass a
+        lazy view over a copy taken in the same step as this call. Returns
+        False if a compaction is already running.
+        """
+        if not self._compacting.acquire(blocking=False):
+            return False
+        sealed = self.rotate()
+
+        def run():
+            try:
+                sealed_segments = sealed.result()
+                write_snapshot(snapshot_path, rows, fieldnames)
+                for path in sealed_segments:
+                    os.remove(path)
+                logger.info("Compacted %d journal segment(s) into %s", len(sealed_segments), snapshot_path)
+            except Exception:
+                logger.exception("Journal compaction failed")
+            finally:
+                self._compacting.release()
+
+        threading.Thread(target=run, name="workitems-compaction", daemon=True).start()
+        return True
+
+    def close(self):
+        future = concurrent.futures.Future()
+        self._queue.put((_STOP, future))
+        future.result()
+        self._writer.join()
+
+    def _number(self, path):
+        return int(os.path.splitext(os.path.basename(path))[0])
+
+    def _segment_path(self, number):
+        return os.path.join(self.directory, f"{number:06d}.jsonl")
+
+    def _sync(self):
+        self._file.flush()
+        if self.fsync != "off":
+            os.fsync(self._file.fileno())
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Everything that queued up during the previous write joins this commit
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            done = []
+            try:
+                for line, future in batch:
+                    if line is _ROTATE or line is _STOP:
+                        self._sync()
+                        for waiting in done:
+                            waiting.set_result(None)
+                        done = []
+                        if line is _STOP:
+                            self._file.close()
+                            future.set_result(None)
+                            return
+                        self._file.close()
+                        sealed = [path for path in self.segments() if self._number(path) <= self._segment_number]
+                        self._segment_number += 1
+                        self._file = open(self._segment_path(self._segment_number), mode="a", encoding="utf-8")
+                        future.set_result(sealed)
+                        continue
+                    self._file.write(line + "\n")
+                    if self.fsync == "always":
+                        self._sync()
+                    done.append(future)
+                if self.fsync == "batch":
+                    self._sync()
+                else:
+                    self._file.flush()
+            except Exception as e:
+                logger.exception("Journal write failed")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+            for future in done:
+                future.set_result(None)
@@ -0,0 +1,46 @@
+import csv
+import io
+import json
+import os
+
+# Rows validated and indexed per chunk while loading
+DEFAULT_CHUNK_SIZE = 5000
+
+
+def iter_row_chunks(file_path, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Stream raw work item rows from a CSV or NDJSON (.ndjson/.jsonl) file.
+
+    Yields lists of at most chunk_size dicts so the caller can validate a
+    chunk at a time without holding the raw file contents in memory.
+    """
+    if not os.path.exists(file_path):
+        return
+    is_ndjson = file_path.endswith((".ndjson", ".jsonl"))
+    with open(file_path, mode="r", encoding="utf-8-sig", newline="") as file:
+        if is_ndjson:
+            rows = (json.loads(line) for line in file if line.strip())
+        else:
+            reader = csv.reader(file)
+            header = next(reader, None)
+            if header is None:
+                return
+            rows = (dict(zip(header, values)) for values in reader)
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+
+def format_csv_rows(rows, fieldnames, header=False):
+    """Render rows (dicts) as a block of CSV text."""
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=fieldnames)
+    if header:
+        writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
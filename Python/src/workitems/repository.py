@@ -0,0 +1,375 @@
+from bisect import bisect_left, bisect_right, insort
+from collections import Counter, defaultdict
+import time
+
+from search import SearchIndex
+
+FIELDS = ("ID", "WorkItemType", "Title", "AssignedTo", "State", "Tags")
+# Fields that get a secondary index. Tags are indexed per individual tag.
+INDEXED_FIELDS = ("State", "WorkItemType", "AssignedTo", "Tags")
+# Key layout of the counter cells. Tag cells prefix the item's cell with one of its tags.
+CELL_FIELDS = ("WorkItemType", "State", "AssignedTo")
+TAG_CELL_FIELDS = ("Tags",) + CELL_FIELDS
+
+
+class WorkItemNotFoundError(KeyError):
+    pass
+
+
+class DuplicateWorkItemError(ValueError):
+    pass
+
+
+class VersionConflictError(Exception):
+    """Raised when a conditional mutation finds the item at a different version."""
+
+
+class BatchError(Exception):
+    """Raised when a batch fails validation; nothing in the batch has been applied."""
+
+    def __init__(self, errors):
+        super().__init__(f"{len(errors)} item(s) in the batch failed validation")
+        # Maps the position of each failing entry in the batch to its error
+        self.errors = errors
+
+
+def title_trigrams(text):
+    """Return the set of lower-cased character trigrams used by the title index."""
+    text = text.lower()
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def split_tags(tags):
+    """Split an Azure DevOps style tag string ("tag1; tag2") into individual tags."""
+    if not tags:
+        return []
+    return [tag.strip() for tag in tags.split(";") if tag.strip()]
+
+
+class WorkItemCounters:
+    """
+    Item counts maintained incrementally on every mutation.
+
+    Items are counted per (WorkItemType, State, AssignedTo) cell, and once
+    per tag in (tag, WorkItemType, State, AssignedTo) cells. Any group-by
+    with equality filters over those fields is answered by summing cells,
+    which costs O(distinct combinations) rather than a pass over the items.
+    """
+
+    def __init__(self):
+        self._cells = Counter()
+        self._tag_cells = Counter()
+
+    def add(self, work_item):
+        self._change(work_item, 1)
+
+    def remove(self, work_item):
+        self._change(work_item, -1)
+
+    def group_by(self, fields, filters=None):
+        """
+        Return (total, groups) for the items matching filters.
+
+        groups maps a tuple of the values of fields to the number of items.
+        When grouping or filtering by Tags, an item counts once per tag.
+        """
+        filters = filters or {}
+        use_tags = "Tags" in fields or "Tags" in filters
+        groups = Counter()
+        for key, count in self._matching(use_tags, filters):
+            groups[tuple(key[self._position(use_tags, field)] for field in fields)] += count
+        total = sum(count for _, count in self._matching("Tags" in filters, filters))
+        return total, dict(groups)
+
+    def _position(self, use_tags, field):
+        return (TAG_CELL_FIELDS if use_tags else CELL_FIELDS).index(field)
+
+    def _matching(self, use_tags, filters):
+        cells = self._tag_cells if use_tags else self._cells
+        positions = {field: self._position(use_tags, field) for field in filters}
+        for key, count in cells.items():
+            if all(key[positions[field]] == value for field, value in filters.items()):
+                yield key, count
+
+    def _change(self, work_item, delta):
+        cell = tuple(getattr(work_item, field) for field in CELL_FIELDS)
+        self._bump(self._cells, cell, delta)
+        for tag in split_tags(work_item.Tags):
+            self._bump(self._tag_cells, (tag,) + cell, delta)
+
+    def _bump(self, counter, key, delta):
+        counter[key] += delta
+        if counter[key] <= 0:
+            # Drop empty cells so the distinct values never go stale
+            del counter[key]
+
+
+class WorkItemStore:
+    """
+    Behaviour shared by the work item storage backends.
+
+    Subclasses provide the single-item operations (get/add/put/update/delete)
+    and queries, report every item they add or remove through _track() and
+    _untrack() and call _touch() once per mutated item. Batches are
+    validated here as a whole before any item is applied; stats and
+    distinct values are answered from the counters and search from the
+    full-text index, both of which _track() keeps current.
+
+    version increases by one on every mutation and, together with
+    last_modified, identifies the state of the whole store; item_version()
+    gives the (version, timestamp) at which a single item last changed.
+    Versions are only comparable within one epoch.
+    """
+
+    def __init__(self):
+        self._counters = WorkItemCounters()
+        self._search_index = SearchIndex()
+        self.version = 0
+        self.last_modified = time.time()
+        # Versions restart from zero with the process, so the epoch is the start time
+        self.epoch = format(int(self.last_modified * 1000), "x")
+
+    def _touch(self):
+        self.version += 1
+        self.last_modified = time.time()
+        return self.version, self.last_modified
+
+    def _track(self, work_item):
+        self._counters.add(work_item)
+        self._search_index.add(work_item)
+
+    def _untrack(self, work_item):
+        self._counters.remove(work_item)
+        self._search_index.remove(work_item)
+
+    def _check_version(self, id, if_versions):
+        # if_versions is the collection of versions the caller expects the item to be at, or None for any
+        if if_versions is not None and self.item_version(id)[0] not in if_versions:
+            raise VersionConflictError(id)
+
+    def values(self, field):
+        """Return the distinct values currently held by an indexed field."""
+        _, groups = self.stats((field,))
+        return [value for (value,) in groups]
+
+    def counts(self, field):
+        """Return {value: number of items} for an indexed field."""
+        _, groups = self.stats((field,))
+        return {value: count for (value,), count in groups.items()}
+
+    def stats(self, fields, filters=None):
+        """Return (total, groups) of item counts grouped by fields; see WorkItemCounters.group_by."""
+        return self._counters.group_by(fields, filters)
+
+    def search(self, q, limit=10):
+        """Return up to limit items whose title or tags match q, best BM25 match first."""
+        return [self.get(id) for id, _ in self._search_index.search(q, limit)]
+
+    def get_many(self, ids):
+        """Return the items with ascending ids, skipping any that no longer exist."""
+        return [self.get(id) for id in ids if id in self]
+
+    def add_many(self, work_items):
+        """Insert all of work_items, or none of them if any ID is taken or repeated."""
+        errors = {}
+        seen = set()
+        for position, work_item in enumerate(work_items):
+            if work_item.ID in self or work_item.ID in seen:
+                errors[position] = DuplicateWorkItemError(work_item.ID)
+            seen.add(work_item.ID)
+        if errors:
+            raise BatchError(errors)
+        return [self.add(work_item) for work_item in work_items]
+
+    def update_many(self, updates):
+        """Apply a list of (id, changes) pairs, or none of them if any ID is missing."""
+        errors = {
+            position: WorkItemNotFoundError(id)
+            for position, (id, _) in enumerate(updates)
+            if id not in self
+        }
+        if errors:
+            raise BatchError(errors)
+        return [self.update(id, changes) for id, changes in updates]
+
+    def delete_many(self, ids):
+        """Delete all of ids, or none of them if any ID is missing or repeated."""
+        errors = {}
+        seen = set()
+        for position, id in enumerate(ids):
+            if id not in self or id in seen:
+                errors[position] = WorkItemNotFoundError(id)
+            seen.add(id)
+        if errors:
+            raise BatchError(errors)
+        return [self.delete(id) for id in ids]
+
+
+class WorkItemRepository(WorkItemStore):
+    """
+    In-memory work item store.
+
+    Items are held in a hash index keyed by ID, so point lookups and updates
+    are O(1); deletes add only a bisect into the sorted ID list. Secondary
+    indexes map each value of the fields in INDEXED_FIELDS to the set of IDs
+    holding it and are kept in step with every create/update/delete. A
+    trigram index over titles backs substring search, and the sorted ID list
+    backs keyset pagination.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._items = {}
+        self._indexes = {field: defaultdict(set) for field in INDEXED_FIELDS}
+        self._title_index = defaultdict(set)
+        self._ordered_ids = []
+        self._item_versions = {}
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, id):
+        return id in self._items
+
+    def __iter__(self):
+        return iter(self._items.values())
+
+    def ids(self):
+        """Return a copy of all IDs in ascending order."""
+        return list(self._ordered_ids)
+
+    def get(self, id):
+        try:
+            return self._items[id]
+        except KeyError:
+            raise WorkItemNotFoundError(id) from None
+
+    def item_version(self, id):
+        try:
+            return self._item_versions[id]
+        except KeyError:
+            raise WorkItemNotFoundError(id) from None
+
+    def add(self, work_item):
+        if work_item.ID in self._items:
+            raise DuplicateWorkItemError(work_item.ID)
+        self._items[work_item.ID] = work_item
+        self._index(work_item)
+        if not self._ordered_ids or work_item.ID > self._ordered_ids[-1]:
+            self._ordered_ids.append(work_item.ID)
+        else:
+            insort(self._ordered_ids, work_item.ID)
+        return work_item
+
+    def put(self, work_item):
+        """Insert or replace an item, as used when replaying the journal."""
+        if work_item.ID in self._items:
+            self._unindex(self._items[work_item.ID])
+            self._items[work_item.ID] = work_item
+            self._index(work_item)
+            return work_item
+        return self.add(work_item)
+
+    def update(self, id, changes, if_versions=None):
+        """Apply a dict of field changes to an existing item and re-index it."""
+        work_item = self.get(id)
+        self._check_version(id, if_versions)
+        self._unindex(work_item)
+        for field, value in changes.items():
+            setattr(work_item, field, value)
+        self._index(work_item)
+        return work_item
+
+    def delete(self, id, if_versions=None):
+        if id not in self._items:
+            raise WorkItemNotFoundError(id)
+        self._check_version(id, if_versions)
+        work_item = self._items.pop(id)
+        self._unindex(work_item)
+        del self._ordered_ids[bisect_left(self._ordered_ids, id)]
+        del self._item_versions[id]
+        self._touch()
+        return work_item
+
+    def ids_where(self, field, value):
+        """Return the set of IDs whose indexed field equals value (or contains the tag)."""
+        bucket = self._indexes[field].get(value)
+        return set(bucket) if bucket else set()
+
+    def snapshot_rows(self):
+        """Return a lazy iterable of row dicts over a copy of the current items."""
+        return ({field: getattr(item, field) for field in FIELDS} for item in list(self._items.values()))
+
+    def query(self, filters=None, q=None, after=None, limit=None):
+        """
+        Return one page of items ordered by ID, plus the cursor for the next page.
+
+        filters maps indexed field names to the value to match (Tags matches a
+        single tag). q is a case-insensitive title substring. after is the last
+        ID of the previous page. The returned cursor is None on the last page.
+        """
+        candidates = None
+        buckets = [self._indexes[field].get(value, set()) for field, value in (filters or {}).items()]
+        # Intersect starting from the smallest bucket so the work is bounded by the most selective filter
+        for bucket in sorted(buckets, key=len):
+            candidates = set(bucket) if candidates is None else candidates & bucket
+            if not candidates:
+                return [], None
+        if q:
+            candidates = self._match_title(q.lower(), candidates)
+
+        ordered = self._ordered_ids if candidates is None else sorted(candidates)
+        start = bisect_right(ordered, after) if after is not None else 0
+        end = len(ordered) if limit is None else min(start + limit, len(ordered))
+        page = [self._items[id] for id in ordered[start:end]]
+        next_after = page[-1].ID if page and end < len(ordered) else None
+        return page, next_after
+
+    def _match_title(self, needle, candidates):
+        grams = title_trigrams(needle)
+        if grams:
+            for gram in sorted(grams, key=lambda gram: len(self._title_index.get(gram, ()))):
+                postings = self._title_index.get(gram, set())
+                candidates = set(postings) if candidates is None else candidates & postings
+                if not candidates:
+                    return set()
+        elif candidates is None:
+            # Needles shorter than a trigram can't use the index
+            candidates = self._items.keys()
+        # Trigram hits are only candidates; confirm the actual substring
+        return {id for id in candidates if needle in self._items[id].Title.lower()}
+
+    def _index_keys(self, work_item):
+        for field in INDEXED_FIELDS:
+            value = getattr(work_item, field)
+            if field == "Tags":
+                for tag in split_tags(value):
+                    yield field, tag
+            else:
+                yield field, value
+
+    def _index(self, work_item):
+        # Every add/put/update ends by indexing the item, so this is where it gets its new version
+        self._item_versions[work_item.ID] = self._touch()
+        self._track(work_item)
+        for field, value in self._index_keys(work_item):
+            self._indexes[field][value].add(work_item.ID)
+        for gram in title_trigrams(work_item.Title):
+            self._title_index[gram].add(work_item.ID)
+
+    def _unindex(self, work_item):
+        self._untrack(work_item)
+        for field, value in self._index_keys(work_item):
+            bucket = self._indexes[field].get(value)
+            if bucket is None:
+                continue
+            bucket.discard(work_item.ID)
+            if not bucket:
+                del self._indexes[field][value]
+        for gram in title_trigrams(work_item.Title):
+            postings = self._title_index.get(gram)
+            if postings is None:
+                continue
+            postings.discard(work_item.ID)
+            if not postings:
+                del self._title_index[gram]
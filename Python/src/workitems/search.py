@@ -0,0 +1,75 @@
+from collections import Counter, defaultdict
+import heapq
+import math
+import re
+
+# BM25 term-frequency saturation and document-length normalisation
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_TOKEN = re.compile(r"\w+")
+
+
+def tokenize(text):
+    """Split text into lower-cased word tokens, as used for indexing and queries."""
+    return _TOKEN.findall(text.lower()) if text else []
+
+
+def document_terms(work_item):
+    """Return the term frequencies of an item's title and tags."""
+    return Counter(tokenize(work_item.Title) + tokenize(work_item.Tags))
+
+
+class SearchIndex:
+    """
+    Inverted index over work item titles and tags with BM25 ranking.
+
+    postings maps each term to {ID: term frequency}. Items are added and
+    removed one at a time as the store changes, so the index never needs a
+    rebuild; a search only touches the postings of the query terms.
+    """
+
+    def __init__(self):
+        self._postings = defaultdict(dict)
+        self._lengths = {}
+        self._total_length = 0
+
+    def __len__(self):
+        return len(self._lengths)
+
+    def add(self, work_item):
+        terms = document_terms(work_item)
+        for term, frequency in terms.items():
+            self._postings[term][work_item.ID] = frequency
+        length = sum(terms.values())
+        self._lengths[work_item.ID] = length
+        self._total_length += length
+
+    def remove(self, work_item):
+        for term in document_terms(work_item):
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(work_item.ID, None)
+            if not postings:
+                del self._postings[term]
+        self._total_length -= self._lengths.pop(work_item.ID, 0)
+
+    def search(self, q, limit=10):
+        """Return up to limit (ID, score) pairs for the query, best match first."""
+        count = len(self._lengths)
+        if not count:
+            return []
+        average_length = self._total_length / count or 1
+        scores = defaultdict(float)
+        for term in set(tokenize(q)):
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+            for id, frequency in postings.items():
+                norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[id] / average_length)
+                scores[id] += idf * frequency * (BM25_K1 + 1) / (frequency + norm)
+        # Ties go to the lower ID so results are stable
+        best = heapq.nsmallest(limit, ((-score, id) for id, score in scores.items()))
+        return [(id, -score) for score, id in best]
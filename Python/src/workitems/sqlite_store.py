@@ -0,0 +1,409 @@
+from contextlib import contextmanager
+import json
+import sqlite3
+import threading
+import time
+
+from repository import (
+    FIELDS,
+    INDEXED_FIELDS,
+    DuplicateWorkItemError,
+    WorkItemNotFoundError,
+    WorkItemStore,
+    split_tags,
+)
+from search import tokenize
+
+# PRAGMA synchronous level for each WORKITEMS_FSYNC mode; in WAL mode NORMAL only fsyncs at checkpoints
+SYNCHRONOUS = {"always": "FULL", "batch": "NORMAL", "off": "OFF"}
+
+_COLUMNS = ", ".join(FIELDS)
+
+# store_meta.seeded: the seed file has not been loaded, has been loaded, or is being loaded by some process
+_NOT_SEEDED, _SEEDED, _SEEDING = 0, 1, 2
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS workitems (
+        ID INTEGER PRIMARY KEY,
+        WorkItemType TEXT NOT NULL,
+        Title TEXT NOT NULL,
+        AssignedTo TEXT NOT NULL,
+        State TEXT NOT NULL,
+        Tags TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        modified REAL NOT NULL
+    )""",
+    # One row per individual tag, so tag filters and tag group-bys are index lookups
+    """CREATE TABLE IF NOT EXISTS workitem_tags (
+        tag TEXT NOT NULL,
+        ID INTEGER NOT NULL,
+        PRIMARY KEY (tag, ID)
+    ) WITHOUT ROWID""",
+    "CREATE INDEX IF NOT EXISTS workitem_tags_id ON workitem_tags (ID)",
+    "CREATE INDEX IF NOT EXISTS workitems_type ON workitems (WorkItemType, ID)",
+    "CREATE INDEX IF NOT EXISTS workitems_assigned_to ON workitems (AssignedTo, ID)",
+    "CREATE INDEX IF NOT EXISTS workitems_state ON workitems (State, ID)",
+    # Full-text index over titles and tags, keyed by rowid = ID and ranked with FTS5's bm25()
+    "CREATE VIRTUAL TABLE IF NOT EXISTS workitem_search USING fts5 (Title, Tags)",
+    # Single row holding the store-wide version shared by every process
+    """CREATE TABLE IF NOT EXISTS store_meta (
+        id INTEGER PRIMARY KEY CHECK (id = 1),
+        epoch TEXT NOT NULL,
+        version INTEGER NOT NULL,
+        last_modified REAL NOT NULL,
+        seeded INTEGER NOT NULL
+    )""",
+)
+
+
+class SqliteWorkItemRepository(WorkItemStore):
+    """
+    Work item store backed by a SQLite database in WAL mode.
+
+    Unlike the in-memory backends, all state (items, versions, the epoch)
+    lives in the database file, so several API worker processes can share
+    one consistent store. WAL lets readers run alongside the single writer;
+    every mutation, and every batch as a whole, runs in one BEGIN IMMEDIATE
+    transaction, so conditional updates and batch validation see the same
+    state they modify. Stats are answered with GROUP BY queries and search
+    with an FTS5 table instead of the in-process counters and search index,
+    which other workers could not keep in step.
+
+    Each thread gets its own connection.
+    """
+
+    def __init__(self, path, row_factory, synchronous="NORMAL", timeout=30.0):
+        # Deliberately no WorkItemStore.__init__: version, last_modified and epoch come from the database
+        self.path = path
+        self._row_factory = row_factory
+        self._synchronous = synchronous
+        self._timeout = timeout
+        self._local = threading.local()
+        with self._write() as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+            now = time.time()
+            connection.execute(
+                "INSERT OR IGNORE INTO store_meta VALUES (1, ?, 0, ?, 0)",
+                (format(int(now * 1000), "x"), now),
+            )
+
+    @property
+    def version(self):
+        return self._meta("version")
+
+    @property
+    def last_modified(self):
+        return self._meta("last_modified")
+
+    @property
+    def epoch(self):
+        return self._meta("epoch")
+
+    def __len__(self):
+        return self._connection().execute("SELECT COUNT(*) FROM workitems").fetchone()[0]
+
+    def __contains__(self, id):
+        return self._connection().execute("SELECT 1 FROM workitems WHERE ID = ?", (id,)).fetchone() is not None
+
+    def __iter__(self):
+        rows = self._connection().execute(f"SELECT {_COLUMNS} FROM workitems ORDER BY ID")
+        return (self._materialize(row) for row in rows)
+
+    def ids(self):
+        """Return all IDs in ascending order."""
+        return [id for (id,) in self._connection().execute("SELECT ID FROM workitems ORDER BY ID")]
+
+    def get(self, id):
+        row = self._connection().execute(f"SELECT {_COLUMNS} FROM workitems WHERE ID = ?", (id,)).fetchone()
+        if row is None:
+            raise WorkItemNotFoundError(id)
+        return self._materialize(row)
+
+    def get_many(self, ids):
+        """Return the items with ascending ids, skipping any that no longer exist, in one query."""
+        rows = self._connection().execute(
+            f"SELECT {_COLUMNS} FROM workitems WHERE ID IN (SELECT value FROM json_each(?)) ORDER BY ID",
+            (json.dumps(list(ids)),),
+        )
+        return [self._materialize(row) for row in rows]
+
+    def item_version(self, id):
+        row = self._connection().execute("SELECT version, modified FROM workitems WHERE ID = ?", (id,)).fetchone()
+        if row is None:
+            raise WorkItemNotFoundError(id)
+        return row
+
+    def add(self, work_item):
+        with self._write() as connection:
+            try:
+                self._insert(connection, work_item, *self._touch())
+            except sqlite3.IntegrityError:
+                raise DuplicateWorkItemError(work_item.ID) from None
+        return work_item
+
+    def put(self, work_item):
+        """Insert or replace an item."""
+        with self._write() as connection:
+            self._remove(connection, work_item.ID)
+            self._insert(connection, work_item, *self._touch())
+        return work_item
+
+    def update(self, id, changes, if_versions=None):
+        """Apply a dict of field changes to an existing item."""
+        with self._write() as connection:
+            current = self.get(id)
+            self._check_version(id, if_versions)
+            values = {field: changes.get(field, getattr(current, field)) for field in FIELDS if field != "ID"}
+            version, modified = self._touch()
+            connection.execute(
+                "UPDATE workitems SET WorkItemType = ?, Title = ?, AssignedTo = ?, State = ?, Tags = ?,"
+                " version = ?, modified = ? WHERE ID = ?",
+                (*values.values(), version, modified, id),
+            )
+            if "Tags" in changes:
+                connection.execute("DELETE FROM workitem_tags WHERE ID = ?", (id,))
+                self._insert_tags(connection, id, values["Tags"])
+            connection.execute(
+                "UPDATE workitem_search SET Title = ?, Tags = ? WHERE rowid = ?", (values["Title"], values["Tags"], id)
+            )
+            return self._row_factory(ID=id, **values)
+
+    def delete(self, id, if_versions=None):
+        with self._write() as connection:
+            work_item = self.get(id)
+            self._check_version(id, if_versions)
+            self._remove(connection, id)
+            self._touch()
+        return work_item
+
+    def add_many(self, work_items):
+        # One transaction around the base class validate-then-apply makes the batch atomic across workers
+        with self._write():
+            return super().add_many(work_items)
+
+    def update_many(self, updates):
+        with self._write():
+            return super().update_many(updates)
+
+    def delete_many(self, ids):
+        with self._write():
+            return super().delete_many(ids)
+
+    def seed(self, work_items, batch_size=5000):
+        """
+        Insert work_items unless the store has been seeded before.
+
+        When several workers start at once exactly one of them claims the
+        load; the others wait for it to finish and then skip. Items are
+        committed batch_size at a time, so other workers never wait long for
+        the write lock. A load whose process died part way is taken over,
+        skipping the items already committed, once it has made no progress
+        for the lock timeout. Returns the number of items inserted.
+        """
+        if not self._claim_seed():
+            return 0
+        loaded = 0
+        batch = []
+        for work_item in work_items:
+            batch.append(work_item)
+            if len(batch) == batch_size:
+                loaded += self._seed_batch(batch)
+                batch = []
+        loaded += self._seed_batch(batch)
+        with self._write() as connection:
+            connection.execute("UPDATE store_meta SET seeded = ?", (_SEEDED,))
+        return loaded
+
+    def ids_where(self, field, value):
+        if field == "Tags":
+            rows = self._connection().execute("SELECT ID FROM workitem_tags WHERE tag = ?", (value,))
+        elif field in INDEXED_FIELDS:
+            rows = self._connection().execute(f"SELECT ID FROM workitems WHERE {field} = ?", (value,))
+        else:
+            raise KeyError(field)
+        return {id for (id,) in rows}
+
+    def snapshot_rows(self):
+        """Return a lazy iterable of row dicts over the items as of this call."""
+        rows = self._connection().execute(f"SELECT {_COLUMNS} FROM workitems ORDER BY ID").fetchall()
+        return (dict(zip(FIELDS, row)) for row in rows)
+
+    def query(self, filters=None, q=None, after=None, limit=None):
+        """
+        Return one page of items ordered by ID, plus the cursor for the next page.
+
+        Same contract as WorkItemRepository.query, answered by a single SELECT
+        over the (field, ID) indexes. One row past the limit is fetched to
+        tell whether there is a next page.
+        """
+        clauses, params = self._where(filters)
+        if q:
+            # SQLite's lower() only folds ASCII, unlike str.lower() in the other backends
+            clauses.append("instr(lower(Title), ?) > 0")
+            params.append(q.lower())
+        if after is not None:
+            clauses.append("ID > ?")
+            params.append(after)
+        sql = f"SELECT {_COLUMNS} FROM workitems"
+        if clauses:
+            sql += " WHERE " + " AND ".join(clauses)
+        sql += " ORDER BY ID"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit + 1)
+        rows = self._connection().execute(sql, params).fetchall()
+        page = [self._materialize(row) for row in rows[:limit]]
+        next_after = page[-1].ID if page and limit is not None and len(rows) > limit else None
+        return page, next_after
+
+    def stats(self, fields, filters=None):
+        """
+        Return (total, groups) of item counts grouped by fields.
+
+        Same contract as WorkItemCounters.group_by: when grouping or filtering
+        by Tags an item counts once per tag.
+        """
+        filters = filters or {}
+        columns = ", ".join("workitem_tags.tag" if field == "Tags" else f"workitems.{field}" for field in fields)
+        use_tags = "Tags" in fields or "Tags" in filters
+        clauses, params = self._where(filters, join_tags=use_tags)
+        source = "workitems JOIN workitem_tags USING (ID)" if use_tags else "workitems"
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        connection = self._connection()
+        groups = {
+            tuple(row[:-1]): row[-1]
+            for row in connection.execute(f"SELECT {columns}, COUNT(*) FROM {source}{where} GROUP BY {columns}", params)
+        }
+        # The total counts items, or items carrying the filtered tag, never one row per tag
+        clauses, params = self._where(filters)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        total = connection.execute(f"SELECT COUNT(*) FROM workitems{where}", params).fetchone()[0]
+        return total, groups
+
+    def search(self, q, limit=10):
+        """Return up to limit items whose title or tags match q, best BM25 match first."""
+        terms = tokenize(q)
+        if not terms:
+            return []
+        # Quoted terms joined with OR, so query text can't be read as FTS5 syntax
+        match = " OR ".join('"' + term.replace('"', '""') + '"' for term in dict.fromkeys(terms))
+        rows = self._connection().execute(
+            f"SELECT {', '.join('workitems.' + field for field in FIELDS)} FROM workitem_search"
+            " JOIN workitems ON workitems.ID = workitem_search.rowid"
+            " WHERE workitem_search MATCH ? ORDER BY bm25(workitem_search), workitems.ID LIMIT ?",
+            (match, limit),
+        )
+        return [self._materialize(row) for row in rows]
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # Autocommit mode; writes open their own BEGIN IMMEDIATE transactions in _write()
+            connection = sqlite3.connect(self.path, timeout=self._timeout, isolation_level=None)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute(f"PRAGMA synchronous={self._synchronous}")
+            self._local.connection = connection
+        return connection
+
+    @contextmanager
+    def _write(self):
+        connection = self._connection()
+        if connection.in_transaction:
+            # Nested inside a batch; the outer transaction commits
+            yield connection
+            return
+        # IMMEDIATE takes the write lock up front, so checks and writes can't interleave with another worker's
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            yield connection
+        except BaseException:
+            connection.execute("ROLLBACK")
+            raise
+        connection.execute("COMMIT")
+
+    def _claim_seed(self):
+        """Return True if this process is to load the seed file, after waiting out any other process's load."""
+        while True:
+            with self._write() as connection:
+                seeded, last_modified = connection.execute("SELECT seeded, last_modified FROM store_meta").fetchone()
+                if seeded == _SEEDED:
+                    return False
+                # Every committed batch moves last_modified on, so a load that stopped moving is abandoned
+                if seeded == _NOT_SEEDED or time.time() - last_modified > self._timeout:
+                    connection.execute("UPDATE store_meta SET seeded = ?, last_modified = ?", (_SEEDING, time.time()))
+                    return True
+            time.sleep(0.1)
+
+    def _seed_batch(self, work_items):
+        with self._write() as connection:
+            # Items get consecutive versions as with individual adds, but store_meta is written once per batch
+            version = connection.execute("SELECT version FROM store_meta").fetchone()[0]
+            modified = time.time()
+            inserted = 0
+            for work_item in work_items:
+                # Items committed by an abandoned load are already there
+                if self._insert(connection, work_item, version + inserted + 1, modified, skip_existing=True):
+                    inserted += 1
+            connection.execute(
+                "UPDATE store_meta SET version = ?, last_modified = ?", (version + inserted, modified)
+            )
+        return inserted
+
+    def _touch(self):
+        modified = time.time()
+        (version,) = self._connection().execute(
+            "UPDATE store_meta SET version = version + 1, last_modified = ? RETURNING version", (modified,)
+        ).fetchone()
+        return version, modified
+
+    def _meta(self, column):
+        return self._connection().execute(f"SELECT {column} FROM store_meta").fetchone()[0]
+
+    def _where(self, filters, join_tags=False):
+        clauses, params = [], []
+        for field, value in (filters or {}).items():
+            if field == "Tags":
+                clauses.append("workitem_tags.tag = ?" if join_tags else "ID IN (SELECT ID FROM workitem_tags WHERE tag = ?)")
+            elif field in INDEXED_FIELDS:
+                clauses.append(f"workitems.{field} = ?")
+            else:
+                raise KeyError(field)
+            params.append(value)
+        return clauses, params
+
+    def _insert(self, connection, work_item, version, modified, skip_existing=False):
+        """Insert an item; returns False if skip_existing is set and its ID is already taken."""
+        inserted = connection.execute(
+            f"INSERT {'OR IGNORE ' if skip_existing else ''}INTO workitems ({_COLUMNS}, version, modified)"
+            " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (*(getattr(work_item, field) for field in FIELDS), version, modified),
+        ).rowcount
+        if not inserted:
+            return False
+        self._insert_tags(connection, work_item.ID, work_item.Tags)
+        connection.execute(
+            "INSERT INTO workitem_search (rowid, Title, Tags) VALUES (?, ?, ?)",
+            (work_item.ID, work_item.Title, work_item.Tags),
+        )
+        return True
+
+    def _remove(self, connection, id):
+        connection.execute("DELETE FROM workitems WHERE ID = ?", (id,))
+        connection.execute("DELETE FROM workitem_tags WHERE ID = ?", (id,))
+        connection.execute("DELETE FROM workitem_search WHERE rowid = ?", (id,))
+
+    def _insert_tags(self, connection, id, tags):
+        connection.executemany(
+            "INSERT OR IGNORE INTO workitem_tags (tag, ID) VALUES (?, ?)",
+            ((tag, id) for tag in split_tags(tags)),
+        )
+
+    def _materialize(self, row):
+        return self._row_factory(**dict(zip(FIELDS, row)))